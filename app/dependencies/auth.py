@@ -3,8 +3,8 @@ from fastapi import HTTPException
 # auth.py
 import logging
 from fastapi import HTTPException
-import boto3
 from botocore.exceptions import ClientError
+from common.aws import aws_clients
 from common.config import COGNITO_USER_POOL_ID, COGNITO_CLIENT_ID, AWS_REGION
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 class CognitoClient:
 
     def __init__(self):
-        self.client = boto3.client("cognito-idp", region_name=AWS_REGION)
+        self.client = aws_clients.client("cognito-idp", region_name=AWS_REGION)
         self.userPoolId = COGNITO_USER_POOL_ID
         self.client_id = COGNITO_CLIENT_ID
 
@@ -1,9 +1,19 @@
 from fastapi import HTTPException, Request
+from common.config import AUTH_MODE
+from app.dependencies.token_verifier import get_token_verifier
 
-def get_current_user(event: dict = None, request: Request = None):
-    """ Extracts the current user from the event context."""
-    if event is None and request is not None:
-        event = getattr(request.scope.get("aws.event"), "copy", lambda: {})()
+
+def get_current_user(request: Request):
+    """ Extracts the current user from the Lambda event context.
+
+    The event is read from the ASGI scope that Mangum fills in, never from a
+    parameter: FastAPI would take one for the request body and read the whole
+    body before the route runs, which defeats streamed uploads.
+    """
+    if AUTH_MODE == "local":
+        return get_bearer_token_claims(request)
+
+    event = getattr(request.scope.get("aws.event"), "copy", lambda: {})()
 
     if not isinstance(event, dict):
         raise HTTPException(status_code=400, detail="Invalid event payload: not a dictionary")
@@ -21,3 +31,11 @@ def get_current_user(event: dict = None, request: Request = None):
         raise HTTPException(status_code=401, detail="Unauthorized: missing claims")
 
     return claims
+
+
+def get_bearer_token_claims(request: Request) -> dict:
+    """ Verifies the Authorization bearer token in-process and returns its claims."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Unauthorized: missing bearer token")
+    return get_token_verifier().verify(token)
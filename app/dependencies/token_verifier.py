@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Optional
+from fastapi import HTTPException
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTError
+from common.config import (COGNITO_REGION, COGNITO_USER_POOL_ID, COGNITO_CLIENT_ID,
+                           JWKS_CACHE_TTL_SECONDS, JWKS_MIN_REFRESH_SECONDS, TOKEN_CACHE_MAX_ENTRIES)
+from common.logger import logger
+
+
+def fetch_jwks(url: str) -> dict:
+    """Download a JSON Web Key Set."""
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.load(response)
+
+
+class JWKSCache:
+    """In-memory cache of the user pool signing keys.
+
+    Keys are refreshed when the TTL expires, or earlier when a token names a
+    ``kid`` we have not seen (Cognito key rotation). Refreshes triggered by
+    unknown keys are rate limited so forged ``kid`` values cannot hammer the
+    JWKS endpoint. A failed fetch counts as an attempt too: while the endpoint
+    is down the stale keys keep being served and it is retried at most once
+    per ``min_refresh_interval``.
+    """
+
+    def __init__(self, url: str, ttl: float = JWKS_CACHE_TTL_SECONDS,
+                 min_refresh_interval: float = JWKS_MIN_REFRESH_SECONDS,
+                 fetch: Callable[[str], dict] = fetch_jwks):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch
+        self._keys = {}
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get_key(self, kid: str) -> dict:
+        """Return the JWK for ``kid``, refreshing the key set if needed."""
+        now = time.monotonic()
+        expired = self._fetched_at is None or now - self._fetched_at >= self.ttl
+        if (expired or kid not in self._keys) and self._may_refresh(now):
+            self._refresh(now)
+        if self._fetched_at is None:
+            raise HTTPException(status_code=503, detail="Signing keys unavailable")
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise HTTPException(status_code=401, detail="Unauthorized: unknown signing key")
+        return key
+
+    def _may_refresh(self, now: float) -> bool:
+        return self._attempted_at is None or now - self._attempted_at >= self.min_refresh_interval
+
+    def _refresh(self, now: float):
+        with self._lock:
+            # Another thread may have tried while we waited for the lock
+            if self._attempted_at is not None and self._attempted_at >= now:
+                return
+            try:
+                jwks = self._fetch(self.url)
+            except Exception as e:
+                logger.error("Could not fetch JWKS from %s: %s", self.url, e)
+                return
+            finally:
+                self._attempted_at = time.monotonic()
+            self._keys = {key["kid"]: key for key in jwks.get("keys", [])}
+            self._fetched_at = self._attempted_at
+
+
+class CognitoTokenVerifier:
+    """Verifies Cognito access and ID tokens in-process.
+
+    Decoded claims are memoized per token until the token expires, so a
+    client reusing its token pays for the signature check only once.
+    """
+
+    def __init__(self, issuer: str, client_id: str, jwks: JWKSCache,
+                 max_cached_tokens: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.issuer = issuer
+        self.client_id = client_id
+        self.jwks = jwks
+        self.max_cached_tokens = max_cached_tokens
+        self._claims = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> dict:
+        """Return the claims of a valid token or raise a 401."""
+        cached = self._claims.get(token)
+        if cached is not None:
+            expires_at, claims = cached
+            if expires_at > time.time():
+                return claims
+            with self._lock:
+                self._claims.pop(token, None)
+
+        claims = self._decode(token)
+        with self._lock:
+            self._claims[token] = (claims["exp"], claims)
+            while len(self._claims) > self.max_cached_tokens:
+                self._claims.popitem(last=False)
+        return claims
+
+    def _decode(self, token: str) -> dict:
+        try:
+            header = jwt.get_unverified_header(token)
+            key = self.jwks.get_key(header.get("kid"))
+            claims = jwt.decode(token, key, algorithms=["RS256"], issuer=self.issuer,
+                                options={"verify_aud": False, "verify_at_hash": False})
+        except ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Unauthorized: token expired")
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Unauthorized: invalid token")
+
+        # ID tokens carry the app client in "aud", access tokens in "client_id"
+        token_use = claims.get("token_use")
+        if token_use == "id":
+            client_id = claims.get("aud")
+        elif token_use == "access":
+            client_id = claims.get("client_id")
+        else:
+            raise HTTPException(status_code=401, detail="Unauthorized: invalid token use")
+        if client_id != self.client_id:
+            raise HTTPException(status_code=401, detail="Unauthorized: token issued for another client")
+        return claims
+
+
+@lru_cache(maxsize=None)
+def get_token_verifier() -> CognitoTokenVerifier:
+    """Process-wide verifier, shared across requests and warm invocations."""
+    issuer = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
+    return CognitoTokenVerifier(issuer, COGNITO_CLIENT_ID, JWKSCache(f"{issuer}/.well-known/jwks.json"))
@@ -1,32 +1,45 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from mangum import Mangum
-from sqlalchemy.exc import OperationalError
+from app.middleware import RequestTimingMiddleware
 from app.routes import tickets, users
-from common.db import Base, engine
-from common.logger import logger 
+from common.aws import aws_clients
+from common.config import METRICS_ENDPOINT
+from common.logger import flush_logs, logger
+from common.metrics import registry
 from app.dependencies.auth import CognitoClient
 from app.schemas.user import LoginRequest
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await aws_clients.aclose()
+
+
 app = FastAPI(title="Ticket System API",
-              docs_url="/docs")
+              docs_url="/docs",
+              lifespan=lifespan)
+
+# Schema is managed by migrations: python -m common.migrate
 
-# Try to create tables safely
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Tables created successfully")
-except OperationalError as e:
-    logger.warning(f"Could not connect to DB: {e}")
+app.add_middleware(RequestTimingMiddleware)
 
 # Include routers for different functionalities
 app.include_router(tickets.router)
 app.include_router(users.router)
 
 
-auth_client = CognitoClient() 
+@lru_cache(maxsize=None)
+def get_auth_client() -> CognitoClient:
+    """Build the Cognito client on first use instead of on every cold start."""
+    return CognitoClient()
+
 
 @app.post("/login")
-async def login(data: LoginRequest):
-    logger.info(f"Login attempt for user: {data.username}")
+async def login(data: LoginRequest, auth_client: CognitoClient = Depends(get_auth_client)):
+    logger.info("Login attempt for user: %s", data.username)
     tokens = auth_client.authenticate(data.username, data.password)
     return tokens
 
@@ -36,5 +49,34 @@ async def login(data: LoginRequest):
 def root():
     return {"message": "API is running"}
 
-# Create a Mangum handler for AWS Lambda compatibility
-handler = Mangum(app)
+
+# Public liveness checks; pool and cache counters are only exported through /metrics
+@app.get("/health/db")
+def db_health():
+    return {"status": "ok"}
+
+
+@app.get("/health/cache")
+def cache_health():
+    return {"status": "ok"}
+
+
+# Prometheus scrape endpoint for container deployments; Lambda logs EMF from handler instead
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not METRICS_ENDPOINT:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Create a Mangum handler for AWS Lambda compatibility. Lifespan is off because
+# Mangum would run it on every invocation and close the shared AWS clients.
+mangum_handler = Mangum(app, lifespan="off")
+
+
+def handler(event, context):
+    """Lambda entry point: serve the event, then write the invocation's metrics and logs before it freezes."""
+    try:
+        return mangum_handler(event, context)
+    finally:
+        registry.flush_emf("api")
+        flush_logs()
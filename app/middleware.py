@@ -0,0 +1,83 @@
+import re
+import uuid
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from common import request_timing
+from common.config import SERVER_TIMING_HEADER
+from common.logger import HOT_PATH, correlation_id, logger
+from common.metrics import registry
+
+REQUESTS = registry.counter("http_requests_total", "HTTP requests by route and status",
+                            ("method", "route", "status"))
+LATENCY = registry.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+SQL_LATENCY = registry.histogram("http_request_sql_seconds", "Time in SQL per HTTP request by route",
+                                 ("method", "route"))
+# An incoming X-Request-ID is reused only when it looks like one, so clients cannot inject log content
+REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+def request_id(scope: Scope) -> str:
+    """The caller's X-Request-ID, else the Lambda request id, else a new one."""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            value = value.decode("latin-1")
+            if REQUEST_ID.fullmatch(value):
+                return value
+    lambda_context = scope.get("aws.context")
+    return getattr(lambda_context, "aws_request_id", None) or uuid.uuid4().hex
+
+
+class RequestTimingMiddleware:
+    """Time every HTTP request and report the SQL / serialization breakdown.
+
+    The breakdown goes into a ``Server-Timing`` header (when
+    ``SERVER_TIMING_HEADER`` is on), a ``request_timing`` log line with the
+    route template, so latency can be grouped per endpoint, and the request
+    metrics. Requests no route matched share the ``unmatched`` route label, so
+    clients probing random paths cannot grow the metric series without bound.
+
+    The request's id (see ``request_id``) becomes the correlation id of every
+    log line written while it is handled and is returned in ``X-Request-ID``.
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, so the response
+    body is passed through untouched and streamed requests keep streaming.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        token = correlation_id.set(request_id(scope))
+
+        with request_timing.track() as timing:
+            async def send_with_timing(message: Message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Request-ID"] = correlation_id.get()
+                    if SERVER_TIMING_HEADER:
+                        headers.append("Server-Timing", timing.server_timing())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = scope.get("route")
+                method = scope["method"]
+                logger.info("request_timing", extra={
+                    **HOT_PATH,
+                    "method": method,
+                    "route": getattr(route, "path", scope["path"]),
+                    "status": status_code,
+                    **timing.as_dict(),
+                })
+                template = getattr(route, "path", "unmatched")
+                REQUESTS.inc(method=method, route=template, status=status_code)
+                LATENCY.observe(timing.elapsed(), method=method, route=template)
+                SQL_LATENCY.observe(timing.sql_seconds, method=method, route=template)
+                correlation_id.reset(token)
@@ -1,83 +1,174 @@
-from typing import Optional
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, Query
-from common.db import get_db
+from typing import Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from common.db import DBSession, get_db
 from app.dependencies.get_user import get_current_user
 from app.services.ticket_service import TicketService
-from app.schemas.ticket import TicketCreate, TicketRead, TicketUpdateStatus, TicketAssignUser, TicketBulkResponse
+from app.schemas.ticket import TicketCreate, TicketRead, TicketUpdateStatus, TicketAssignUser, TicketBulkResponse, \
+    TicketImportJobRead, TicketImportUploadResponse, TicketStats
 from app.services.comment_service import CommentService
 from app.schemas.comment import CommentCreate, CommentRead
-from common.logger import logger
+from app.schemas.pagination import Page
+from common.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from common.logger import HOT_PATH, logger
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
+# Authenticated routes take their body embedded under the parameter name ({"status": {...}}), as they always have
 
 
 @router.post("/", response_model=TicketRead)
-def create_ticket(ticket_create: TicketCreate, db: Session = Depends(get_db)):
-    """Create a new ticket."""
-    logger.info(f"Creating ticket: {ticket_create}")
+async def create_ticket(ticket_create: TicketCreate,
+                        idempotency_key: Optional[str] = Header(None, max_length=255),
+                        db: DBSession = Depends(get_db)):
+    """Create a new ticket. Retries sent with the same Idempotency-Key return the original ticket."""
+    logger.info("Creating ticket", extra=HOT_PATH)
     ticket_service = TicketService(db)
-    return ticket_service.create_ticket(ticket_create)
+    return await ticket_service.create_ticket_async(ticket_create, idempotency_key)
 
 
-@router.get("/{ticket_id}", response_model=TicketRead)
-def get_ticket(ticket_id: str, db: Session = Depends(get_db)):
-    """Retrieve a ticket by its ID."""
+# Declared before /{ticket_id} so "search" is not taken for a ticket id
+@router.get("/search", response_model=Page[TicketRead])
+async def search_tickets(q: str = Query(..., min_length=1, max_length=200,
+                                        description="Words to find in descriptions, reporter names and emails"),
+                         cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+                         limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+                         db: DBSession = Depends(get_db),
+                         current_user: dict = Depends(get_current_user)):
+    """Search tickets, best match first, one page at a time."""
+    ticket_service = TicketService(db)
+    # Already serialized from validated TicketRead models, so response_model validation is skipped
+    payload = await ticket_service.search_tickets_json_async(current_user, q, cursor, limit)
+    return Response(content=payload, media_type="application/json")
+
+
+# Declared before /{ticket_id} so "stats" is not taken for a ticket id
+@router.get("/stats", response_model=TicketStats)
+async def get_ticket_stats(db: DBSession = Depends(get_db),
+                           current_user: dict = Depends(get_current_user)):
+    """Ticket counts by status and assignee, and backlog age."""
     ticket_service = TicketService(db)
-    return ticket_service.get_ticket(ticket_id)
+    return await ticket_service.get_stats_async(current_user)
 
 
-@router.get("/", response_model=list[TicketRead])
-def list_tickets(assigned_to_id: Optional[str] = Query(None, description="Filter by assigned user ID"),
-                 status: Optional[str] = Query(None, description="Filter by ticket status"),
-                 db: Session = Depends(get_db),
-                 current_user: dict = Depends(get_current_user)):
-    """List all tickets."""
-    logger.info(f"Listing tickets for user: {current_user}, assigned_to_id: {assigned_to_id}, status: {status}")
+@router.get("/{ticket_id}", response_model=TicketRead)
+async def get_ticket(ticket_id: str,
+                     if_none_match: Optional[str] = Header(None),
+                     db: DBSession = Depends(get_db)):
+    """Retrieve a ticket by its ID. Answers 304 when If-None-Match carries the current ETag."""
     ticket_service = TicketService(db)
-    return ticket_service.list_tickets(current_user, assigned_to_id, status)
+    etag, payload = await ticket_service.get_ticket_json_async(ticket_id, if_none_match)
+    if payload is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    # The payload is already serialized TicketRead JSON (usually from the cache), so skip response_model validation
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/", response_model=Page[TicketRead])
+async def list_tickets(assigned_to_id: Optional[str] = Query(None, description="Filter by assigned user ID"),
+                       status: Optional[str] = Query(None, description="Filter by ticket status"),
+                       cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+                       include: Optional[Literal["comments"]] = Query(None, description="Embed related comments"),
+                       db: DBSession = Depends(get_db),
+                       current_user: dict = Depends(get_current_user)):
+    """List tickets, newest first, one page at a time."""
+    logger.info("Listing tickets for user %s, assigned_to_id: %s, status: %s", current_user.get("sub"), assigned_to_id, status,
+                extra=HOT_PATH)
+    ticket_service = TicketService(db)
+    # Already serialized from validated TicketRead models, so response_model validation is skipped
+    payload = await ticket_service.list_tickets_json_async(current_user, assigned_to_id, status, cursor, limit,
+                                                           include_comments=include == "comments")
+    return Response(content=payload, media_type="application/json")
 
 
 @router.patch("/{ticket_id}/status", response_model=TicketRead)
-def update_ticket_status(ticket_id: str, status: TicketUpdateStatus,
-                         db: Session = Depends(get_db),
-                         current_user: dict = Depends(get_current_user)):
+async def update_ticket_status(ticket_id: str, status: TicketUpdateStatus = Body(..., embed=True),
+                               db: DBSession = Depends(get_db),
+                               current_user: dict = Depends(get_current_user)):
     """Update the status of a ticket."""
     ticket_service = TicketService(db)
-    return ticket_service.update_ticket(current_user, ticket_id, status)
+    return await ticket_service.update_ticket_async(current_user, ticket_id, status)
 
 
 @router.patch("/{ticket_id}/assign", response_model=TicketRead)
-def assing_ticket(ticket_id: str, assigned_to_id: TicketAssignUser,
-                  db: Session = Depends(get_db),
-                  current_user: dict = Depends(get_current_user)):
+async def assing_ticket(ticket_id: str, assigned_to_id: TicketAssignUser = Body(..., embed=True),
+                        db: DBSession = Depends(get_db),
+                        current_user: dict = Depends(get_current_user)):
     """Assign a ticket to a user."""
     ticket_service = TicketService(db)
-    return ticket_service.assign_ticket(current_user, ticket_id, assigned_to_id)
+    return await ticket_service.assign_ticket_async(current_user, ticket_id, assigned_to_id)
 
 
 @router.post("/bulk", response_model=TicketBulkResponse)
-async def bulk_create_tickets(tickets_create: list[TicketCreate],
-                         db: Session = Depends(get_db),
-                         current_user: dict = Depends(get_current_user)):
-    """Bulk create tickets."""
+async def bulk_create_tickets(tickets_create: list[TicketCreate] = Body(..., embed=True),
+                               idempotency_key: Optional[str] = Header(None, max_length=255),
+                               db: DBSession = Depends(get_db),
+                               current_user: dict = Depends(get_current_user)):
+    """Bulk create tickets. Retries sent with the same Idempotency-Key return the original job."""
+    ticket_service = TicketService(db)
+    return await ticket_service.create_bulk_ticket_job(current_user, tickets_create, idempotency_key)
+
+
+@router.post("/bulk/stream", response_model=TicketBulkResponse)
+async def stream_bulk_import(request: Request,
+                             content_encoding: Optional[str] = Header(None),
+                             db: DBSession = Depends(get_db),
+                             current_user: dict = Depends(get_current_user)):
+    """Bulk import tickets from an NDJSON body (optionally gzip'd), streamed straight to S3."""
+    if content_encoding not in (None, "identity", "gzip"):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Content-Encoding must be gzip or identity")
+    ticket_service = TicketService(db)
+    return await ticket_service.create_streamed_import_job(current_user, request.stream(),
+                                                           compressed=content_encoding == "gzip")
+
+
+@router.post("/bulk/uploads", response_model=TicketImportUploadResponse)
+async def create_bulk_import_upload(compression: Optional[Literal["gzip"]] = Query(None, description="Compression of the uploaded file"),
+                                    db: DBSession = Depends(get_db),
+                                    current_user: dict = Depends(get_current_user)):
+    """Create an import job and a presigned URL to PUT its NDJSON file to S3."""
+    ticket_service = TicketService(db)
+    return await ticket_service.create_import_upload(current_user, compressed=compression == "gzip")
+
+
+@router.post("/bulk/{job_id}/submit", response_model=TicketBulkResponse)
+async def submit_bulk_import_upload(job_id: int,
+                                    db: DBSession = Depends(get_db),
+                                    current_user: dict = Depends(get_current_user)):
+    """Queue an import job once its file has been uploaded to the presigned URL."""
+    ticket_service = TicketService(db)
+    return await ticket_service.submit_import_upload(current_user, job_id)
+
+
+@router.get("/bulk/{job_id}", response_model=TicketImportJobRead)
+async def get_bulk_import_job(job_id: int,
+                              db: DBSession = Depends(get_db),
+                              current_user: dict = Depends(get_current_user)):
+    """Poll the status and progress of a bulk import job."""
     ticket_service = TicketService(db)
-    return await ticket_service.create_bulk_ticket_job(current_user, tickets_create)
+    return await ticket_service.get_import_job_async(current_user, job_id)
 
 
 @router.post("/{ticket_id}/comments", response_model=CommentRead)
-def create_comment(comment_create: CommentCreate,
-                   db: Session = Depends(get_db),
-                   current_user: dict = Depends(get_current_user)):
+async def create_comment(comment_create: CommentCreate = Body(..., embed=True),
+                         db: DBSession = Depends(get_db),
+                         current_user: dict = Depends(get_current_user)):
     """Create a new comment."""
     comment_service = CommentService(db)
-    return comment_service.create_comment(comment_create)
+    return await comment_service.create_comment_async(comment_create)
 
 
 @router.get("/{ticket_id}/comments", response_model=list[CommentRead])
-def list_comments_for_ticket(ticket_id: str,
-                             db: Session = Depends(get_db),
-                             current_user: dict = Depends(get_current_user)):
-    """List all comments for a specific ticket."""
+async def list_comments_for_ticket(ticket_id: UUID,
+                                   response: Response,
+                                   if_none_match: Optional[str] = Header(None),
+                                   db: DBSession = Depends(get_db),
+                                   current_user: dict = Depends(get_current_user)):
+    """List all comments for a specific ticket. Answers 304 when If-None-Match carries the current ETag."""
     comment_service = CommentService(db)
-    return comment_service.list_comments_for_ticket(ticket_id)
+    etag, comments = await comment_service.get_comments_by_ticket_json_async(ticket_id, if_none_match)
+    if comments is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return comments
@@ -1,45 +1,51 @@
-from fastapi import APIRouter, Depends, Path
-from sqlalchemy.orm import Session
-from common.db import get_db
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, Path, Query, Response
+from common.db import DBSession, get_db
 from app.dependencies.get_user import get_current_user
 from app.services.user_service import UserService
 from app.schemas.user import UserCreate, UserRead
+from app.schemas.pagination import Page
+from common.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 
 @router.post("/", response_model=UserRead)
-def create_user(user_create: UserCreate,
-                db: Session = Depends(get_db),
-                current_user: dict = Depends(get_current_user)):
+async def create_user(user_create: UserCreate = Body(..., embed=True),
+                      db: DBSession = Depends(get_db),
+                      current_user: dict = Depends(get_current_user)):
     """Create a new user."""
     user_service = UserService(db)
-    return user_service.create_user(user_create, current_user)
+    return await user_service.create_user_async(user_create, current_user)
 
 
 @router.get("/{email}", response_model=UserRead)
-def get_user_by_email(email: str,
-                      db: Session = Depends(get_db),
-                      current_user: dict = Depends(get_current_user)):
+async def get_user_by_email(email: str,
+                            db: DBSession = Depends(get_db),
+                            current_user: dict = Depends(get_current_user)):
     """Retrieve a user by their email."""
     user_service = UserService(db)
-    return user_service.get_user_by_email(email, current_user)
+    return await user_service.get_user_by_email_async(email, current_user)
 
 
 @router.patch("/{user_id}", response_model=UserRead)
-def deactivate_user(user: str,
-                    db: Session = Depends(get_db),
-                    user_id: str = Path(..., description="ID del usuario a desactivar"),
-                    current_user: dict = Depends(get_current_user)):
+async def deactivate_user(user: str,
+                          db: DBSession = Depends(get_db),
+                          user_id: str = Path(..., description="ID del usuario a desactivar"),
+                          current_user: dict = Depends(get_current_user)):
     """Deactivate a user by their ID."""
     user_service = UserService(db)
-    return user_service.deactivate_user(user_id, current_user)
+    return await user_service.deactivate_user_async(user_id, current_user)
 
 
-@router.get("/", response_model=list[UserRead])
-def list_users(db: Session = Depends(get_db),
-               current_user: dict = Depends(get_current_user)):
-    """List all users."""
+@router.get("/", response_model=Page[UserRead])
+async def list_users(cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+                     limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+                     db: DBSession = Depends(get_db),
+                     current_user: dict = Depends(get_current_user)):
+    """List users, newest first, one page at a time."""
     user_service = UserService(db)
-    return user_service.list_users(current_user)
+    # Already serialized from validated UserRead models, so response_model validation is skipped
+    return Response(content=await user_service.list_users_json_async(current_user, cursor, limit),
+                    media_type="application/json")
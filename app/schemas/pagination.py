@@ -0,0 +1,10 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """A page of results with an opaque cursor to fetch the next one."""
+    items: List[T]
+    next_cursor: Optional[str] = None
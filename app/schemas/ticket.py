@@ -1,9 +1,9 @@
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, computed_field
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from app.schemas.comment import CommentRead
-from common.enums import TicketStatusEnum
+from common.enums import JobStatusEnum, TicketStatusEnum
 
 
 class TicketCreate(BaseModel):
@@ -36,5 +36,65 @@ class TicketAssignUser(BaseModel):
 
 class TicketBulkResponse(BaseModel):
     msg: str
-    job_id: UUID
+    job_id: int
     s3_url: str
+
+
+class TicketImportUploadResponse(BaseModel):
+    job_id: int
+    s3_url: str
+    upload_url: str
+    content_type: str
+    expires_in: int
+
+
+class TicketImportJobRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: JobStatusEnum
+    created_at: datetime
+    updated_at: datetime
+    processed_at: Optional[datetime] = None
+    attempts: int
+    rows_processed: int
+    bytes_processed: int
+    bytes_total: Optional[int] = None
+    rows_imported: Optional[int] = None
+    rows_per_second: Optional[float] = None
+    # Invalid rows skipped by the import, with the first errors by row index
+    rows_rejected: int = 0
+    row_errors: Optional[List[Dict[str, Any]]] = None
+    # Sharded imports: a parent counts its shards, a shard points at its parent
+    shards: int = 0
+    parent_id: Optional[int] = None
+
+    @computed_field
+    @property
+    def progress(self) -> Optional[float]:
+        """Fraction of the import file processed, when its size is known."""
+        if self.status == JobStatusEnum.COMPLETED:
+            return 1.0
+        if not self.bytes_total:
+            return None
+        return round(min(self.bytes_processed / self.bytes_total, 1.0), 4)
+
+
+class AssigneeTicketCount(BaseModel):
+    assigned_to_id: Optional[UUID] = None
+    tickets: int
+    open: int
+
+
+class BacklogAge(BaseModel):
+    open: int
+    oldest_created_at: Optional[datetime] = None
+    oldest_age_seconds: Optional[float] = None
+    mean_age_seconds: Optional[float] = None
+
+
+class TicketStats(BaseModel):
+    total: int
+    by_status: Dict[TicketStatusEnum, int]
+    by_assignee: List[AssigneeTicketCount]
+    backlog: BacklogAge
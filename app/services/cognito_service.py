@@ -1,16 +1,17 @@
-import boto3
 from fastapi import HTTPException
+from common.aws import aws_clients
 from common.config import COGNITO_REGION, COGNITO_USER_POOL_ID, COGNITO_CLIENT_ID
 
 
 class CognitoService:
     def __init__(self):
-        self.cognito_client = boto3.client(
-            'cognito-idp',
-            region_name=COGNITO_REGION
-        )
         self.user_pool_id = COGNITO_USER_POOL_ID
         self.client_id = COGNITO_CLIENT_ID
+
+    @property
+    def cognito_client(self):
+        """Shared Cognito client, only built once a call actually needs it."""
+        return aws_clients.client('cognito-idp', region_name=COGNITO_REGION)
     
     def create_user(self, name: str, email: str, password: str, role: str):
         """Create a new user in Cognito."""
@@ -31,7 +32,7 @@ class CognitoService:
                 Permanent=True
             )
             # add user to group
-            self.cognito_clien.admin_add_user_to_group(
+            self.cognito_client.admin_add_user_to_group(
                 UserPoolId=self.user_pool_id,
                 Username=email,
                 GroupName=role
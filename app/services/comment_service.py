@@ -1,12 +1,15 @@
 from uuid import UUID
-from typing import List
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import func, select
+from common.cache import ticket_cache, ticket_cache_key
+from common.db import DBSession, run_in_session
 from common.models.comment import Comment
 from app.schemas.comment import CommentCreate, CommentRead
+from app.services.etag import comments_version, etag_matches, weak_etag
 
 
 class CommentService:
-    def __init__(self, db: Session):
+    def __init__(self, db: DBSession):
         self.db = db
     
     def create_comment(self, comment_create: CommentCreate) -> CommentRead:
@@ -14,6 +17,8 @@ class CommentService:
         comment = Comment(**comment_create.model_dump())
         self.db.add(comment)
         self.db.commit()
+        # Cached ticket payloads embed their comments
+        ticket_cache().delete(ticket_cache_key(comment.ticket_id))
         self.db.refresh(comment)
         return CommentRead.model_validate(comment)
     
@@ -26,5 +31,41 @@ class CommentService:
 
     def get_comments_by_ticket(self, ticket_id: UUID) -> List[CommentRead]:
         """Retrieve all comments for a specific ticket."""
-        comments = self.db.query(Comment).filter(Comment.ticket_id == ticket_id).all()
+        comments = (self.db.query(Comment)
+                    .filter(Comment.ticket_id == ticket_id)
+                    .order_by(Comment.created_at)
+                    .all())
         return [CommentRead.model_validate(comment) for comment in comments]
+
+    def get_comments_by_ticket_json(self, ticket_id: UUID,
+                                    if_none_match: Optional[str] = None) -> Tuple[str, Optional[List[CommentRead]]]:
+        """ETag and comments of a ticket; the comments are None when ``if_none_match`` matches.
+
+        The ETag covers the comment count and latest ``created_at`` (comments
+        are never edited), read with one aggregate query before the list is loaded.
+        """
+        if if_none_match:
+            version = self.db.execute(
+                select(func.count(Comment.id), func.max(Comment.created_at)).where(Comment.ticket_id == ticket_id)
+            ).one()
+            etag = weak_etag(*version)
+            if etag_matches(if_none_match, etag):
+                return etag, None
+        comments = self.get_comments_by_ticket(ticket_id)
+        return weak_etag(*comments_version(comments)), comments
+
+    # Async variants: same logic, run through run_in_session so the event loop never blocks on the DB
+
+    async def create_comment_async(self, comment_create: CommentCreate) -> CommentRead:
+        return await run_in_session(self.db, lambda db: CommentService(db).create_comment(comment_create))
+
+    async def get_comment_async(self, ticket_id: UUID) -> CommentRead:
+        return await run_in_session(self.db, lambda db: CommentService(db).get_comment(ticket_id))
+
+    async def get_comments_by_ticket_async(self, ticket_id: UUID) -> List[CommentRead]:
+        return await run_in_session(self.db, lambda db: CommentService(db).get_comments_by_ticket(ticket_id))
+
+    async def get_comments_by_ticket_json_async(self, ticket_id: UUID, if_none_match: Optional[str] = None
+                                                ) -> Tuple[str, Optional[List[CommentRead]]]:
+        return await run_in_session(self.db, lambda db: CommentService(db).get_comments_by_ticket_json(
+            ticket_id, if_none_match))
@@ -0,0 +1,34 @@
+"""Weak ETags for polled reads.
+
+An ETag is a digest of a resource's version, e.g. a ticket's ``updated_at``
+plus the count and latest ``created_at`` of its comments. The same version
+can be read with a cheap aggregate query or taken from an already loaded
+payload, and both give the same tag, so ``If-None-Match`` can be answered
+with a 304 without loading or serializing the resource.
+"""
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+def weak_etag(*version) -> str:
+    raw = "|".join(value.isoformat() if isinstance(value, datetime) else str(value) for value in version)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()}"'
+
+
+def comments_version(comments: Iterable) -> tuple:
+    """(count, latest created_at) of loaded comments, matching the aggregate version queries."""
+    count, latest = 0, None
+    for comment in comments:
+        count += 1
+        latest = comment.created_at if latest is None else max(latest, comment.created_at)
+    return count, latest
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(candidate == "*" or candidate.removeprefix("W/") == opaque
+               for candidate in (part.strip() for part in if_none_match.split(",")))
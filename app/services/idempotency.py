@@ -0,0 +1,61 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from common.config import IDEMPOTENCY_KEY_TTL_SECONDS
+from common.models.idempotency import IdempotencyKey
+
+
+def key_digest(scope: str, key: str) -> bytes:
+    """Digest of a client key within an endpoint scope (and user, where the endpoint has one)."""
+    return hashlib.sha256(f"{scope}\0{key}".encode()).digest()
+
+
+def request_hash(body) -> bytes:
+    """Digest of a request body; bytes are hashed as sent, anything else as canonical JSON."""
+    if not isinstance(body, bytes):
+        body = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha256(body).digest()
+
+
+def find_response(db: Session, digest: bytes, body_hash: bytes) -> Optional[dict]:
+    """Return the stored response for a key that has not expired, or None if the key is new."""
+    stored = db.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.response)
+        .where(IdempotencyKey.key == digest, IdempotencyKey.expires_at > datetime.now(timezone.utc))
+    ).first()
+    if stored is None:
+        return None
+    if stored.request_hash != body_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    return json.loads(stored.response)
+
+
+def save_response(db: Session, digest: bytes, body_hash: bytes, response: dict) -> dict:
+    """Store ``response`` for the key and commit it together with the rest of the transaction.
+
+    If a concurrent request with the same key committed first, the transaction
+    is rolled back and that request's response is returned instead. Expired
+    keys are purged on the way; the ``expires_at`` index keeps that to the rows
+    that expired since the previous save.
+    """
+    now = datetime.now(timezone.utc)
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    db.add(IdempotencyKey(key=digest, request_hash=body_hash, response=json.dumps(response, default=str),
+                          created_at=now, expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        stored = find_response(db, digest, body_hash)
+        if stored is None:
+            raise
+        return stored
+    return response
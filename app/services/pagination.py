@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def _encode(position: list) -> str:
+    raw = json.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode the (created_at, id) keyset position into an opaque cursor."""
+    return _encode([created_at.isoformat(), str(row_id)])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode an opaque cursor back into its (created_at, id) keyset position."""
+    try:
+        created_at, row_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def is_keyset_cursor(cursor: str) -> bool:
+    """Whether ``cursor`` is a (created_at, id) cursor from ``paginate`` rather than one from ``paginate_ranked``."""
+    try:
+        return len(_decode(cursor)) == 2
+    except (binascii.Error, ValueError, TypeError):
+        return False
+
+
+def decode_ranked_cursor(cursor: str) -> Tuple[float, datetime, UUID]:
+    """Decode a cursor from ``paginate_ranked`` back into its (rank, created_at, id) position."""
+    try:
+        rank, created_at, row_id = _decode(cursor)
+        return float(rank), datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(query: Query, model, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """Apply keyset pagination on (created_at, id), newest first.
+
+    Fetches one extra row to know whether another page exists, so the cost of
+    a page does not depend on how deep into the table the cursor points.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def paginate_ranked(query: Query, model, rank, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """Keyset pagination on (rank, created_at, id), best match first.
+
+    ``rank`` is a SQL expression; it must be a double precision value so the
+    rank carried in the cursor compares exactly with the one recomputed for
+    the next page.
+    """
+    if cursor:
+        rank_value, created_at, row_id = decode_ranked_cursor(cursor)
+        query = query.filter(tuple_(rank, model.created_at, model.id) < tuple_(rank_value, created_at, row_id))
+    rows = (query.add_columns(rank)
+            .order_by(rank.desc(), model.created_at.desc(), model.id.desc())
+            .limit(limit + 1).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_rank = rows[-1]
+        next_cursor = _encode([last_rank, last.created_at.isoformat(), str(last.id)])
+    return [row for row, _ in rows], next_cursor
@@ -0,0 +1,45 @@
+from typing import AsyncIterator, List
+from common.config import S3_MULTIPART_PART_BYTES
+
+
+async def upload_stream(s3_client, bucket: str, key: str, chunks: AsyncIterator[bytes], content_type: str,
+                        part_size: int = S3_MULTIPART_PART_BYTES) -> int:
+    """Stream ``chunks`` to S3 and return the number of bytes stored.
+
+    At most one part is buffered at a time. Bodies smaller than one part are
+    sent with a single PUT; larger ones go through a multipart upload, which
+    is aborted if the stream fails.
+    """
+    buffer = bytearray()
+    parts: List[dict] = []
+    upload_id = None
+    total = 0
+
+    async def send_part(data: bytes):
+        response = await s3_client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id,
+                                               PartNumber=len(parts) + 1, Body=data)
+        parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+
+    try:
+        async for chunk in chunks:
+            buffer += chunk
+            total += len(chunk)
+            if len(buffer) >= part_size:
+                if upload_id is None:
+                    upload_id = (await s3_client.create_multipart_upload(
+                        Bucket=bucket, Key=key, ContentType=content_type))["UploadId"]
+                await send_part(bytes(buffer))
+                buffer = bytearray()
+
+        if upload_id is None:
+            await s3_client.put_object(Bucket=bucket, Key=key, Body=bytes(buffer), ContentType=content_type)
+            return total
+        if buffer:
+            await send_part(bytes(buffer))
+        await s3_client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                                  MultipartUpload={"Parts": parts})
+        return total
+    except BaseException:
+        if upload_id is not None:
+            await s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
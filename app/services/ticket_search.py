@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+from sqlalchemy import Float, cast, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Query, Session, aliased
+from common.config import TICKET_SEARCH_WINDOW
+from common.models.ticket import Ticket
+
+# Added by migration 0009 on PostgreSQL and not mapped on Ticket
+SEARCH_VECTOR = literal_column("tickets.search_vector")
+# Below this length a trigram index cannot narrow a substring match
+MIN_EMAIL_QUERY = 3
+
+
+def _may_be_in_email(q: str) -> bool:
+    """Whether matching ``q`` against reporter emails is worth it: long enough and without spaces."""
+    return len(q) >= MIN_EMAIL_QUERY and not any(char.isspace() for char in q)
+
+
+def _contains(q: str) -> str:
+    """A LIKE pattern matching ``q`` anywhere, with its wildcards escaped."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _criterion(db: Session, q: str):
+    """The match condition for ``q`` and, on PostgreSQL, its tsquery (else None)."""
+    pattern = _contains(q)
+    email = Ticket.reporter_email.ilike(pattern, escape="\\")
+    if db.get_bind().dialect.name != "postgresql":
+        return or_(Ticket.description.ilike(pattern, escape="\\"),
+                   Ticket.reporter_name.ilike(pattern, escape="\\"), email), None
+    tsquery = func.websearch_to_tsquery("english", q)
+    criterion = SEARCH_VECTOR.op("@@")(tsquery)
+    if _may_be_in_email(q):
+        criterion = or_(criterion, email)
+    return criterion, tsquery
+
+
+def search_query(db: Session, q: str) -> Tuple[Query, object, object]:
+    """The query, ticket entity and rank expression for a search on ``q``.
+
+    On PostgreSQL, ``q`` is parsed as a web search (quoted phrases, ``or``,
+    ``-word``) against ``search_vector`` (GIN) and, unless it has spaces, also
+    matched as a substring of ``reporter_email`` (trigram GIN); matches are
+    ranked with ``ts_rank``. Elsewhere (SQLite in tests and local runs) it is an unranked
+    substring match. Either way only the newest ``TICKET_SEARCH_WINDOW``
+    matches are ranked, which bounds the work for words found in most tickets;
+    ``older_matches`` pages through the rest.
+    """
+    criterion, tsquery = _criterion(db, q)
+    columns = [Ticket] if tsquery is None else [Ticket, SEARCH_VECTOR.label("search_vector")]
+    window = (select(*columns).where(criterion)
+              .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+              .limit(TICKET_SEARCH_WINDOW).subquery("matches"))
+    matches = aliased(Ticket, window)
+    rank = literal(0.0) if tsquery is None else func.ts_rank(window.c.search_vector, tsquery)
+    return db.query(matches), matches, cast(rank, Float)
+
+
+def window_end(db: Session, q: str) -> Optional[Tuple[datetime, UUID]]:
+    """The (created_at, id) of the oldest ranked match, or None if every match fits in the window."""
+    criterion, _ = _criterion(db, q)
+    return db.execute(select(Ticket.created_at, Ticket.id).where(criterion)
+                      .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+                      .offset(TICKET_SEARCH_WINDOW - 1).limit(1)).first()
+
+
+def older_matches(db: Session, q: str) -> Query:
+    """All matches of ``q``, unranked; paged newest first from ``window_end``, they are the ones not ranked."""
+    criterion, _ = _criterion(db, q)
+    return db.query(Ticket).filter(criterion)
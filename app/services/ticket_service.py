@@ -1,44 +1,140 @@
 from uuid import UUID
 import uuid
-from typing import List, Optional
-import json, aioboto3
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, List, Optional, Tuple
+import json
+from botocore.exceptions import ClientError
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, noload, selectinload
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from common.db import DBSession, run_in_session
+from common.enums import JobStatusEnum
+from common.models.comment import Comment
 from common.models.ticket import Ticket, TicketImportJob
-from app.schemas.ticket import TicketCreate, TicketUpdateStatus, TicketAssignUser, TicketRead
-from common.config  import S3_BUCKET_NAME, SQS_QUEUE_URL
+from app.schemas.ticket import TicketCreate, TicketUpdateStatus, TicketAssignUser, TicketRead, TicketImportJobRead, \
+    TicketStats
+from app.schemas.pagination import Page
+from app.services import ticket_search
+from app.services.pagination import encode_cursor, is_keyset_cursor, paginate, paginate_ranked
+from app.services.etag import comments_version, etag_matches, weak_etag
+from app.services.idempotency import find_response, key_digest, request_hash, save_response
+from app.services.s3_upload import upload_stream
+from common.config  import S3_BUCKET_NAME, SQS_QUEUE_URL, DEFAULT_PAGE_SIZE, IMPORT_UPLOAD_URL_EXPIRES
+from common import request_timing, ticket_stats
+from common.aws import aws_clients
+from common.cache import ticket_cache, ticket_cache_key
 from app.dependencies.auth import check_user_roles
 from common.logger import logger
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+# Files PUT to a presigned URL; only jobs whose file is under it can be submitted
+UPLOAD_KEY_PREFIX = "tickets/uploads/"
+# Compiled once; list routes return its bytes directly instead of re-validating against response_model
+TICKET_PAGE = TypeAdapter(Page[TicketRead])
+
 
 class TicketService:
-    def __init__(self, db: Session):
+    def __init__(self, db: DBSession):
         self.db = db
-        self.s3_session = aioboto3.Session()
     
-    def create_ticket(self, ticket_create: TicketCreate) -> TicketRead:
-        """Create a new ticket."""
+    def create_ticket(self, ticket_create: TicketCreate, idempotency_key: Optional[str] = None) -> TicketRead:
+        """Create a new ticket.
+
+        With an ``idempotency_key``, retries of the same request return the
+        ticket created by the first one instead of creating another. The
+        endpoint is public, so keys are scoped by reporter email: two reporters
+        picking the same key do not see each other's tickets.
+        """
+        if idempotency_key:
+            return self._create_ticket_once(ticket_create, idempotency_key)
         ticket = Ticket(**ticket_create.model_dump())
         self.db.add(ticket)
+        self.db.flush()
+        ticket_stats.ticket_created(self.db, [ticket])
         self.db.commit()
         self.db.refresh(ticket)
         return TicketRead.model_validate(ticket)
     
+    def _create_ticket_once(self, ticket_create: TicketCreate, idempotency_key: str) -> TicketRead:
+        digest = key_digest(f"POST /tickets/\0{ticket_create.reporter_email.lower()}", idempotency_key)
+        body_hash = request_hash(ticket_create.model_dump(mode="json"))
+        stored = find_response(self.db, digest, body_hash)
+        if stored is None:
+            ticket = Ticket(**ticket_create.model_dump())
+            self.db.add(ticket)
+            # Flush for the generated id and defaults; the key is committed in the same transaction
+            self.db.flush()
+            ticket_stats.ticket_created(self.db, [ticket])
+            stored = save_response(self.db, digest, body_hash,
+                                   TicketRead.model_validate(ticket).model_dump(mode="json"))
+        return TicketRead.model_validate(stored)
+
     def get_ticket(self, ticket_id: UUID) -> TicketRead:
         """Retrieve a ticket by its ID."""
-        ticket = self.db.query(Ticket).filter(Ticket.id == ticket_id).first()
+        return TicketRead.model_validate(self._get_ticket_model(ticket_id))
+
+    def get_ticket_json(self, ticket_id: UUID, if_none_match: Optional[str] = None) -> Tuple[str, Optional[bytes]]:
+        """ETag and serialized ``TicketRead`` for a ticket, read through the ticket cache.
+
+        The payload is None when ``if_none_match`` matches the ETag. On a cache
+        miss that check runs a version query first, so an unchanged ticket is
+        never loaded or serialized. The cache holds the ETag and payload
+        together, so they always describe the same version; a write racing
+        with a miss can cache an old pair, which its TTL bounds.
+        """
+        try:
+            ticket_id = UUID(str(ticket_id))
+        except ValueError:
+            return self._serialize_ticket(ticket_id)
+        key = ticket_cache_key(ticket_id)
+        cache = ticket_cache()
+        entry = cache.get(key)
+        if entry is not None:
+            etag, _, payload = entry.partition(b"\n")
+            etag = etag.decode()
+        else:
+            if if_none_match:
+                etag = self._ticket_etag(ticket_id)
+                if etag is not None and etag_matches(if_none_match, etag):
+                    return etag, None
+            etag, payload = self._serialize_ticket(ticket_id)
+            cache.set(key, etag.encode() + b"\n" + payload)
+        return etag, None if etag_matches(if_none_match, etag) else payload
+
+    def _serialize_ticket(self, ticket_id: UUID) -> Tuple[str, bytes]:
+        ticket = self.get_ticket(ticket_id)
+        with request_timing.serialization():
+            payload = ticket.model_dump_json().encode()
+        return weak_etag(ticket.updated_at, *comments_version(ticket.comments)), payload
+
+    def _ticket_etag(self, ticket_id: UUID) -> Optional[str]:
+        """ETag from the ticket's updated_at and its comments' count and latest created_at, or None if missing."""
+        version = self.db.execute(
+            select(Ticket.updated_at, func.count(Comment.id), func.max(Comment.created_at))
+            .outerjoin(Comment, Comment.ticket_id == Ticket.id)
+            .where(Ticket.id == ticket_id)
+            .group_by(Ticket.id, Ticket.updated_at)
+        ).first()
+        return weak_etag(*version) if version else None
+
+    def _get_ticket_model(self, ticket_id: UUID, for_update: bool = False) -> Ticket:
+        query = self.db.query(Ticket).options(selectinload(Ticket.comments)).filter(Ticket.id == ticket_id)
+        if for_update:
+            # Writers hold the row so concurrent changes cannot both move the same old counter
+            query = query.with_for_update(of=Ticket)
+        ticket = query.first()
         if not ticket:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Ticket not found"
             )
-        return TicketRead.model_validate(ticket)
+        return ticket
     
     def update_ticket(self, current_user: dict, ticket_id: UUID, status: TicketUpdateStatus) -> TicketRead:
         """Update the status of a ticket."""
         allowed_groups = ["support", "manager"]
         check_user_roles(current_user, allowed_groups)
-        ticket = self.get_ticket(ticket_id)
+        ticket = self._get_ticket_model(ticket_id, for_update=True)
 
         # Check if the ticket is assigned to a user
         if ticket.assigned_to_id is None:
@@ -49,13 +145,16 @@ class TicketService:
         
         # Ensure the user is assigned to the ticket before updating
         user_id = current_user["sub"]
-        if ticket.assigned_to_id != user_id:
+        if str(ticket.assigned_to_id) != str(user_id):
             raise HTTPException(status_code=403, detail="User not assigned to this ticket")
 
         # Update the ticket status
+        old_status = ticket.status
         ticket.status = status.status
+        ticket_stats.ticket_changed(self.db, ticket, old_status, ticket.assigned_to_id)
 
         self.db.commit()
+        ticket_cache().delete(ticket_cache_key(ticket.id))
         self.db.refresh(ticket)
         return TicketRead.model_validate(ticket)
     
@@ -65,68 +164,307 @@ class TicketService:
         allowed_groups = ["admin", "manager"]
         check_user_roles(current_user, allowed_groups)
         
-        ticket = self.get_ticket(ticket_id)
+        ticket = self._get_ticket_model(ticket_id, for_update=True)
+        old_assigned_to_id = ticket.assigned_to_id
         ticket.assigned_to_id = assigned_to_id.assigned_to_id
+        ticket_stats.ticket_changed(self.db, ticket, ticket.status, old_assigned_to_id)
         self.db.commit()
+        ticket_cache().delete(ticket_cache_key(ticket.id))
         self.db.refresh(ticket)
         return TicketRead.model_validate(ticket)
     
-    def list_tickets(self, current_user: dict, assigned_to_id: Optional[UUID] = None, status: Optional[str] = None) -> List[TicketRead]:
-        """List tickets with optional filters for assigned user and status."""
+    def list_tickets(self, current_user: dict, assigned_to_id: Optional[UUID] = None, status: Optional[str] = None,
+                     cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                     include_comments: bool = False) -> Page[TicketRead]:
+        """List a page of tickets with optional filters for assigned user and status.
+
+        Comments are left out unless ``include_comments`` is set, in which case
+        they are fetched for the whole page with a single extra SELECT.
+        """
         # Check if the user is authorized to view tickets
         allowed_groups = ["admin", "support", "manager"]
         check_user_roles(current_user, allowed_groups)
 
-        query = self.db.query(Ticket)
+        comments_loader = selectinload if include_comments else noload
+        query = self.db.query(Ticket).options(comments_loader(Ticket.comments))
         # Apply filters if provided
         if assigned_to_id:
             query = query.filter(Ticket.assigned_to_id == assigned_to_id)
         if status:
             query = query.filter(Ticket.status == status)
-        tickets = query.all()
-        return [TicketRead.model_validate(ticket) for ticket in tickets]
+        tickets, next_cursor = paginate(query, Ticket, cursor, limit)
+        return Page[TicketRead](items=[TicketRead.model_validate(ticket) for ticket in tickets],
+                                next_cursor=next_cursor)
+
+    def search_tickets(self, current_user: dict, q: str, cursor: Optional[str] = None,
+                       limit: int = DEFAULT_PAGE_SIZE) -> Page[TicketRead]:
+        """Search tickets by description, reporter name and reporter email, best match first.
+
+        The newest ``TICKET_SEARCH_WINDOW`` matches come first, by rank. Once
+        they are used up, the cursor carries on through the older matches,
+        newest first, so every match is reached.
+        """
+        allowed_groups = ["admin", "support", "manager"]
+        check_user_roles(current_user, allowed_groups)
+
+        older = ticket_search.older_matches(self.db, q).options(noload(Ticket.comments))
+        if cursor and is_keyset_cursor(cursor):
+            tickets, next_cursor = paginate(older, Ticket, cursor, limit)
+        else:
+            query, matches, rank = ticket_search.search_query(self.db, q)
+            query = query.options(noload(matches.comments))
+            tickets, next_cursor = paginate_ranked(query, matches, rank, cursor, limit)
+            if next_cursor is None and (end := ticket_search.window_end(self.db, q)) is not None:
+                # More tickets match than were ranked: fill the page from the older ones
+                next_cursor = encode_cursor(*end)
+                if len(tickets) < limit:
+                    rest, next_cursor = paginate(older, Ticket, next_cursor, limit - len(tickets))
+                    tickets += rest
+        return Page[TicketRead](items=[TicketRead.model_validate(ticket) for ticket in tickets],
+                                next_cursor=next_cursor)
+
+    def search_tickets_json(self, current_user: dict, q: str, cursor: Optional[str] = None,
+                            limit: int = DEFAULT_PAGE_SIZE) -> bytes:
+        """``search_tickets`` serialized to JSON in one pass."""
+        page = self.search_tickets(current_user, q, cursor, limit)
+        with request_timing.serialization():
+            return TICKET_PAGE.dump_json(page)
+
+    def get_stats(self, current_user: dict) -> TicketStats:
+        """Ticket counts by status and assignee plus backlog age, from the maintained counters."""
+        allowed_groups = ["admin", "manager"]
+        check_user_roles(current_user, allowed_groups)
+        return TicketStats.model_validate(ticket_stats.read(self.db))
+
+    def list_tickets_json(self, current_user: dict, assigned_to_id: Optional[UUID] = None, status: Optional[str] = None,
+                          cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                          include_comments: bool = False) -> bytes:
+        """``list_tickets`` serialized to JSON in one pass."""
+        page = self.list_tickets(current_user, assigned_to_id, status, cursor, limit, include_comments)
+        with request_timing.serialization():
+            return TICKET_PAGE.dump_json(page)
+
+    def get_import_job(self, current_user: dict, job_id: int) -> TicketImportJobRead:
+        """Retrieve the status and progress of a bulk import job."""
+        allowed_groups = ["manager"]
+        check_user_roles(current_user, allowed_groups)
+        job = self.db.get(TicketImportJob, job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Import job not found"
+            )
+        return TicketImportJobRead.model_validate(job)
+
+    # Async variants: same logic, run through run_in_session so the event loop never blocks on the DB
+
+    async def create_ticket_async(self, ticket_create: TicketCreate, idempotency_key: Optional[str] = None) -> TicketRead:
+        return await run_in_session(self.db, lambda db: TicketService(db).create_ticket(ticket_create, idempotency_key))
+
+    async def get_ticket_async(self, ticket_id: UUID) -> TicketRead:
+        return await run_in_session(self.db, lambda db: TicketService(db).get_ticket(ticket_id))
+
+    async def get_ticket_json_async(self, ticket_id: UUID,
+                                    if_none_match: Optional[str] = None) -> Tuple[str, Optional[bytes]]:
+        return await run_in_session(self.db, lambda db: TicketService(db).get_ticket_json(ticket_id, if_none_match))
+
+    async def update_ticket_async(self, current_user: dict, ticket_id: UUID, status: TicketUpdateStatus) -> TicketRead:
+        return await run_in_session(self.db, lambda db: TicketService(db).update_ticket(current_user, ticket_id, status))
+
+    async def assign_ticket_async(self, current_user: dict, ticket_id: UUID,
+                                  assigned_to_id: TicketAssignUser) -> TicketRead:
+        return await run_in_session(
+            self.db, lambda db: TicketService(db).assign_ticket(current_user, ticket_id, assigned_to_id))
+
+    async def list_tickets_async(self, current_user: dict, *args, **kwargs) -> Page[TicketRead]:
+        return await run_in_session(self.db, lambda db: TicketService(db).list_tickets(current_user, *args, **kwargs))
+
+    async def list_tickets_json_async(self, current_user: dict, *args, **kwargs) -> bytes:
+        return await run_in_session(self.db, lambda db: TicketService(db).list_tickets_json(current_user, *args, **kwargs))
+
+    async def search_tickets_json_async(self, current_user: dict, *args, **kwargs) -> bytes:
+        return await run_in_session(
+            self.db, lambda db: TicketService(db).search_tickets_json(current_user, *args, **kwargs))
 
-    async def create_bulk_ticket_job(self, current_user: dict, tickets_json: List[TicketCreate]) -> dict:
-        """Create multiple tickets in bulk."""
+    async def get_stats_async(self, current_user: dict) -> TicketStats:
+        return await run_in_session(self.db, lambda db: TicketService(db).get_stats(current_user))
+
+    async def get_import_job_async(self, current_user: dict, job_id: int) -> TicketImportJobRead:
+        return await run_in_session(self.db, lambda db: TicketService(db).get_import_job(current_user, job_id))
+
+    async def create_bulk_ticket_job(self, current_user: dict, tickets_json: List[TicketCreate],
+                                     idempotency_key: Optional[str] = None) -> dict:
+        """Create multiple tickets in bulk.
+
+        With an ``idempotency_key``, retries of the same request return the job
+        queued by the first one.
+        """
         # Validate if the user is authorized to create bulk tickets
         allowed_groups = ["manager"]
         check_user_roles(current_user, allowed_groups)
+        body = json.dumps([ticket.model_dump() for ticket in tickets_json])
+        if idempotency_key:
+            digest = key_digest(f"POST /tickets/bulk\0{current_user['sub']}", idempotency_key)
+            body_hash = request_hash(body.encode())
+            stored = await run_in_session(self.db, find_response, digest, body_hash)
+            if stored is not None:
+                return stored
         try:
-            job = TicketImportJob(
-            created_by=current_user["sub"],
-            s3_url="",
-            status="PENDING"
-            )
-            self.db.add(job)
-            await self.db.commit()
-            await self.db.refresh(job)
+            job_id = await run_in_session(self.db, _create_import_job, current_user["sub"])
 
             # Upload tickets to S3
             s3_key = f"tickets/{uuid.uuid4()}.json"
             s3_url = f"s3://{S3_BUCKET_NAME}/{s3_key}"
-            async with self.s3_session.client('s3') as s3_client:
-                await s3_client.put_object(
-                    Bucket=S3_BUCKET_NAME,
-                    Key=s3_key,
-                    Body=json.dumps([ticket.dict() for ticket in tickets_json]),
-                    ContentType="application/json"
-                )
+            s3_client = await aws_clients.async_client('s3')
+            await s3_client.put_object(
+                Bucket=S3_BUCKET_NAME,
+                Key=s3_key,
+                Body=body,
+                ContentType="application/json"
+            )
             # Update the job with the S3 URL
-            job.s3_url = s3_url
-            await self.db.commit()
+            await run_in_session(self.db, _set_import_job_s3_url, job_id, s3_url)
 
             # Send a message to SQS to process the job
-            async with self.s3_session.client('sqs') as sqs:
-                await sqs.send_message(
-                    QueueUrl=SQS_QUEUE_URL,
-                    MessageBody=json.dumps({
-                    "job_id": job.id,
-                    "s3_url": s3_url
-                    }))
-            return {"job_id": job.id, "status": "queued", "s3_url": s3_url}
+            await _queue_import_job(job_id, s3_url)
+            logger.info("Queued bulk import job %s with %s tickets", job_id, len(tickets_json))
+            response = {"msg": "Bulk import job queued", "job_id": job_id, "s3_url": s3_url}
         except Exception as e:
-            await self.db.rollback()
+            await run_in_session(self.db, Session.rollback)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error creating bulk ticket job: {str(e)}"
             )
+        if idempotency_key:
+            # Saved once the job is queued, so a failed attempt can be retried with the same key.
+            # A concurrent duplicate may queue a second job; its rows are skipped by content hash.
+            response = await run_in_session(self.db, save_response, digest, body_hash, response)
+        return response
+
+    async def create_streamed_import_job(self, current_user: dict, chunks: AsyncIterator[bytes],
+                                         compressed: bool = False) -> dict:
+        """Stream an NDJSON (optionally gzip'd) request body to S3 and queue its import.
+
+        Rows are not parsed here; the worker validates them while loading.
+        """
+        allowed_groups = ["manager"]
+        check_user_roles(current_user, allowed_groups)
+        chunks = aiter(chunks)
+        first = b""
+        async for first in chunks:
+            if first:
+                break
+        if not first:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty import file")
+
+        s3_key = _import_key(compressed)
+        s3_url = f"s3://{S3_BUCKET_NAME}/{s3_key}"
+        try:
+            s3_client = await aws_clients.async_client('s3')
+            size = await upload_stream(s3_client, S3_BUCKET_NAME, s3_key, _prepend(first, chunks),
+                                       content_type=NDJSON_CONTENT_TYPE)
+            job_id = await run_in_session(self.db, _create_import_job, current_user["sub"], s3_url)
+            await _queue_import_job(job_id, s3_url)
+            logger.info("Queued streamed import job %s (%s bytes)", job_id, size)
+            return {"msg": "Bulk import job queued", "job_id": job_id, "s3_url": s3_url}
+        except Exception as e:
+            await run_in_session(self.db, Session.rollback)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error creating bulk ticket job: {str(e)}"
+            )
+
+    async def create_import_upload(self, current_user: dict, compressed: bool = False) -> dict:
+        """Create a pending import job and a presigned URL to PUT its file to S3 directly."""
+        allowed_groups = ["manager"]
+        check_user_roles(current_user, allowed_groups)
+        s3_key = _import_key(compressed, UPLOAD_KEY_PREFIX)
+        s3_url = f"s3://{S3_BUCKET_NAME}/{s3_key}"
+        s3_client = await aws_clients.async_client('s3')
+        upload_url = await s3_client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": S3_BUCKET_NAME, "Key": s3_key, "ContentType": NDJSON_CONTENT_TYPE},
+            ExpiresIn=IMPORT_UPLOAD_URL_EXPIRES)
+        job_id = await run_in_session(self.db, _create_import_job, current_user["sub"], s3_url)
+        return {"job_id": job_id, "s3_url": s3_url, "upload_url": upload_url,
+                "content_type": NDJSON_CONTENT_TYPE, "expires_in": IMPORT_UPLOAD_URL_EXPIRES}
+
+    async def submit_import_upload(self, current_user: dict, job_id: int) -> dict:
+        """Queue a presigned-upload job once its file is in S3.
+
+        The job is claimed (PENDING -> QUEUED) before anything else, so of two
+        concurrent submits only one queues it. It is put back to PENDING if
+        the file is missing or the message cannot be sent, so it can be
+        submitted again.
+        """
+        allowed_groups = ["manager"]
+        check_user_roles(current_user, allowed_groups)
+        s3_url = await run_in_session(self.db, _claim_upload_job, job_id, current_user["sub"])
+        if s3_url is None:
+            job = await run_in_session(self.db, lambda db: db.get(TicketImportJob, job_id))
+            if job is None or str(job.created_by) != str(current_user["sub"]):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="Import job already submitted or not a presigned upload")
+        bucket, key = s3_url.removeprefix("s3://").split("/", 1)
+        try:
+            s3_client = await aws_clients.async_client('s3')
+            try:
+                await s3_client.head_object(Bucket=bucket, Key=key)
+            except ClientError:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Import file has not been uploaded")
+            await _queue_import_job(job_id, s3_url)
+        except Exception:
+            await run_in_session(self.db, _release_upload_job, job_id)
+            raise
+        logger.info("Queued uploaded import job %s", job_id)
+        return {"msg": "Bulk import job queued", "job_id": job_id, "s3_url": s3_url}
+
+
+def _import_key(compressed: bool, prefix: str = "tickets/") -> str:
+    return f"{prefix}{uuid.uuid4()}.ndjson" + (".gz" if compressed else "")
+
+
+async def _prepend(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _queue_import_job(job_id: int, s3_url: str):
+    sqs = await aws_clients.async_client('sqs')
+    await sqs.send_message(QueueUrl=SQS_QUEUE_URL, MessageBody=json.dumps({"job_id": job_id, "s3_url": s3_url}))
+
+
+def _create_import_job(db: Session, created_by: str, s3_url: str = "") -> int:
+    job = TicketImportJob(created_by=created_by, s3_url=s3_url, status=JobStatusEnum.PENDING)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def _set_import_job_s3_url(db: Session, job_id: int, s3_url: str):
+    db.query(TicketImportJob).filter(TicketImportJob.id == job_id).update({TicketImportJob.s3_url: s3_url})
+    db.commit()
+
+
+def _claim_upload_job(db: Session, job_id: int, created_by: str) -> Optional[str]:
+    """Mark the caller's pending presigned-upload job QUEUED and return its S3 URL, or None if it cannot be."""
+    s3_url = db.execute(
+        update(TicketImportJob)
+        .where(TicketImportJob.id == job_id,
+               TicketImportJob.created_by == created_by,
+               TicketImportJob.status == JobStatusEnum.PENDING,
+               TicketImportJob.s3_url.startswith(f"s3://{S3_BUCKET_NAME}/{UPLOAD_KEY_PREFIX}", autoescape=True))
+        .values(status=JobStatusEnum.QUEUED)
+        .returning(TicketImportJob.s3_url)
+    ).scalar_one_or_none()
+    db.commit()
+    return s3_url
+
+
+def _release_upload_job(db: Session, job_id: int):
+    db.execute(update(TicketImportJob)
+               .where(TicketImportJob.id == job_id, TicketImportJob.status == JobStatusEnum.QUEUED)
+               .values(status=JobStatusEnum.PENDING))
+    db.commit()
@@ -1,21 +1,42 @@
 from uuid import UUID
 from datetime import datetime, timezone
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Optional
+import anyio
 from fastapi import HTTPException
+from pydantic import TypeAdapter
+from common import request_timing
+from common.db import DBSession, run_in_session
 from common.models.user import User
 from app.schemas.user import UserCreate, UserRead
+from app.schemas.pagination import Page
+from app.services.pagination import paginate
 from app.services.cognito_service import CognitoService
 from app.dependencies.auth import check_user_roles
+from common.config import DEFAULT_PAGE_SIZE
+
+# Compiled once; the list route returns its bytes directly instead of re-validating against response_model
+USER_PAGE = TypeAdapter(Page[UserRead])
 
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: DBSession):
         self.db = db
         self.cognito = CognitoService()
 
 
     def create_user(self, user_create: UserCreate, current_user: dict) -> UserRead:
         """Create a new user in the system."""
+        self._validate_new_user(user_create, current_user)
+
+        cognito_sub = self.cognito.create_user(
+            name=user_create.name,
+            email=user_create.email,
+            password=user_create.password,
+            role=user_create.role
+        )
+        return self._insert_user(user_create, cognito_sub)
+
+
+    def _validate_new_user(self, user_create: UserCreate, current_user: dict):
         # Check if the user is authorized to create users
         allowed_groups = ["admin", "manager"]
         check_user_roles(current_user, allowed_groups)
@@ -28,13 +49,8 @@ class UserService:
         if not user_create.name:
             raise HTTPException(status_code=400, detail="Name is required")
 
-        cognito_sub = self.cognito.create_user(
-            name=user_create.name,
-            email=user_create.email,
-            password=user_create.password,
-            role=user_create.role
-        )
 
+    def _insert_user(self, user_create: UserCreate, cognito_sub) -> UserRead:
         user = User(
             cognito_sub=cognito_sub,
             name=user_create.name,
@@ -59,14 +75,23 @@ class UserService:
         return UserRead.model_validate(user)
 
 
-    def list_users(self, current_user: dict) -> List[UserRead]:
-        """List all users in the system."""
+    def list_users(self, current_user: dict, cursor: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE) -> Page[UserRead]:
+        """List a page of users in the system."""
         # Check if the user is authorized to view users
         allowed_groups = ["admin", "manager"]
         check_user_roles(current_user, allowed_groups)
 
-        users = self.db.query(User).all()
-        return [UserRead.model_validate(user) for user in users]
+        users, next_cursor = paginate(self.db.query(User), User, cursor, limit)
+        return Page[UserRead](items=[UserRead.model_validate(user) for user in users],
+                              next_cursor=next_cursor)
+
+    def list_users_json(self, current_user: dict, cursor: Optional[str] = None,
+                        limit: int = DEFAULT_PAGE_SIZE) -> bytes:
+        """``list_users`` serialized to JSON in one pass."""
+        page = self.list_users(current_user, cursor, limit)
+        with request_timing.serialization():
+            return USER_PAGE.dump_json(page)
 
 
     def deactivate_user(self, user_id: UUID, current_user: dict) -> UserRead:
@@ -76,13 +101,56 @@ class UserService:
         check_user_roles(current_user, allowed_groups)
 
         # Get the user from the database
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        user = self._get_user_model(user_id)
         # deactivate in cognito
         self.cognito.deactivate_user(user.cognito_sub)
         # deactivate in db
+        return self._mark_deactivated(user)
+
+
+    def _get_user_model(self, user_id: UUID) -> User:
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+
+
+    def _mark_deactivated(self, user: User) -> UserRead:
         user.deactivated_at = datetime.now(timezone.utc)
         self.db.commit()
         self.db.refresh(user)
         return UserRead.model_validate(user)
+
+
+    # Async variants: DB work goes through run_in_session and the blocking
+    # Cognito calls run in the threadpool, so the event loop never blocks.
+
+    async def create_user_async(self, user_create: UserCreate, current_user: dict) -> UserRead:
+        self._validate_new_user(user_create, current_user)
+        cognito_sub = await anyio.to_thread.run_sync(
+            lambda: self.cognito.create_user(name=user_create.name, email=user_create.email,
+                                             password=user_create.password, role=user_create.role))
+        return await run_in_session(self.db, lambda db: UserService(db)._insert_user(user_create, cognito_sub))
+
+
+    async def get_user_by_email_async(self, email: str, current_user: dict) -> UserRead:
+        return await run_in_session(self.db, lambda db: UserService(db).get_user_by_email(email, current_user))
+
+
+    async def list_users_async(self, current_user: dict, cursor: Optional[str] = None,
+                               limit: int = DEFAULT_PAGE_SIZE) -> Page[UserRead]:
+        return await run_in_session(self.db, lambda db: UserService(db).list_users(current_user, cursor, limit))
+
+
+    async def list_users_json_async(self, current_user: dict, cursor: Optional[str] = None,
+                                    limit: int = DEFAULT_PAGE_SIZE) -> bytes:
+        return await run_in_session(self.db, lambda db: UserService(db).list_users_json(current_user, cursor, limit))
+
+
+    async def deactivate_user_async(self, user_id: UUID, current_user: dict) -> UserRead:
+        allowed_groups = ["admin", "manager"]
+        check_user_roles(current_user, allowed_groups)
+
+        user = await run_in_session(self.db, lambda db: UserService(db)._get_user_model(user_id))
+        await anyio.to_thread.run_sync(self.cognito.deactivate_user, user.cognito_sub)
+        return await run_in_session(self.db, lambda db: UserService(db)._mark_deactivated(user))
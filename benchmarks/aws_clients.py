@@ -0,0 +1,63 @@
+"""Per-request overhead of building AWS clients versus the shared registry.
+
+"before" reproduces what TicketService/UserService did on every request: a new
+aioboto3 session and S3/SQS clients plus a new boto3 Cognito client. "after"
+fetches the same clients from ``common.aws.aws_clients``. No AWS calls are
+made, so only client construction is measured.
+
+Usage::
+
+    python -m benchmarks.aws_clients --requests 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import aioboto3
+import boto3
+from common.aws import AWSClients
+
+
+async def per_request_clients():
+    session = aioboto3.Session()
+    async with session.client("s3", region_name="us-east-1"), session.client("sqs", region_name="us-east-1"):
+        boto3.client("cognito-idp", region_name="us-east-1")
+
+
+async def shared_clients(registry: AWSClients):
+    await registry.async_client("s3")
+    await registry.async_client("sqs")
+    registry.client("cognito-idp")
+
+
+async def measure(fn, requests: int) -> list:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: list) -> dict:
+    return {
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p99_ms": round(statistics.quantiles(timings, n=100)[98], 3),
+    }
+
+
+async def run(requests: int) -> dict:
+    registry = AWSClients()
+    before = await measure(per_request_clients, requests)
+    after = await measure(lambda: shared_clients(registry), requests)
+    await registry.aclose()
+    return {"requests": requests, "before": summarize(before), "after": summarize(after)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests)), indent=2))
@@ -0,0 +1,88 @@
+"""Serialization cost of a ticket list response: FastAPI's response_model path versus TypeAdapter.dump_json.
+
+"before" is what FastAPI did with the ``Page[TicketRead]`` returned by
+``list_tickets``: validate it again against the ``response_model`` field,
+serialize it to Python objects, run ``jsonable_encoder`` and ``json.dumps``
+(``serialize_response`` + ``JSONResponse``). "after" is what the routes do
+now: one ``dump_json`` through a precompiled adapter, built here the same way
+as ``TICKET_PAGE`` in ``app.services.ticket_service``. The tickets are built
+in memory (with three comments each), so no database is needed, and both
+outputs are checked to be the same JSON.
+
+Usage::
+
+    python -m benchmarks.list_serialization --items 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from app.schemas.comment import CommentRead
+from app.schemas.pagination import Page
+from app.schemas.ticket import TicketRead
+
+TICKET_PAGE = TypeAdapter(Page[TicketRead])
+
+
+def make_page(count: int) -> Page[TicketRead]:
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        ticket_id, created = uuid.uuid4(), base + timedelta(seconds=i)
+        comments = [CommentRead(id=uuid.uuid4(), content=f"Comment {j}", created_at=created, ticket_id=ticket_id,
+                                user_id=uuid.uuid4()) for j in range(3)]
+        items.append(TicketRead(id=ticket_id, reporter_name=f"Reporter {i}", reporter_email="r@example.com",
+                                description=f"Ticket {i} " + "x" * 100, status="new", created_at=created,
+                                updated_at=created, comments=comments))
+    return Page[TicketRead](items=items, next_cursor="opaque")
+
+
+async def response_model_path(field, page) -> bytes:
+    content = await serialize_response(field=field, response_content=page, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+def type_adapter_path(page) -> bytes:
+    return TICKET_PAGE.dump_json(page)
+
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: list, count: int) -> dict:
+    median = statistics.median(samples)
+    return {"ms_median": round(median * 1000, 2), "items_per_second": round(count / median)}
+
+
+def run(counts: list, repeat: int) -> list:
+    field = create_model_field(name="Response_list_tickets", type_=Page[TicketRead], mode="serialization")
+    results = []
+    for count in counts:
+        page = make_page(count)
+        assert json.loads(asyncio.run(response_model_path(field, page))) == json.loads(type_adapter_path(page))
+        before = timed(lambda: asyncio.run(response_model_path(field, page)), repeat)
+        after = timed(lambda: type_adapter_path(page), repeat)
+        results.append({"items": count, "before": summarize(before, count), "after": summarize(after, count),
+                        "speedup": round(statistics.median(before) / statistics.median(after), 1)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args.items, args.repeat), indent=2))
@@ -0,0 +1,113 @@
+"""API latency under load: the FastAPI app driven in-process at fixed concurrency.
+
+Requests go through ``httpx.ASGITransport``, so the whole stack runs
+(middleware, routing, auth dependency, services, the database at
+DATABASE_URL) without a server or network in between. The auth dependency is
+replaced with an admin's claims. Each scenario sends ``--requests`` requests
+from ``--concurrency`` concurrent clients and reports p50/p95/p99 latency and
+throughput. Seed the database first with ``python -m benchmarks.seed``.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.load_test --concurrency 16 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Callable, Dict
+import httpx
+from app.dependencies.get_user import get_current_user
+from app.main import app
+from benchmarks.report import latency_summary
+from benchmarks.seed import WORDS, sample_ticket_ids
+from common.db import SessionLocal
+
+USER = {"sub": "benchmark", "username": "benchmark", "cognito:groups": ["admin"]}
+# Pages walked before the run, whose cursors the "list_tickets_deep" scenario requests
+DEEP_PAGES = 20
+
+
+async def collect_cursors(client: httpx.AsyncClient, pages: int) -> list:
+    cursors, cursor = [], None
+    for _ in range(pages):
+        response = await client.get("/tickets/", params={"limit": 50, **({"cursor": cursor} if cursor else {})})
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+        cursors.append(cursor)
+    return cursors
+
+
+def scenarios(ticket_ids: list, cursors: list) -> Dict[str, Callable[[random.Random], tuple]]:
+    """Scenario name -> function returning the (path, params) of its next request."""
+    return {
+        "list_tickets": lambda rng: ("/tickets/", {"limit": 50}),
+        "list_tickets_deep": lambda rng: ("/tickets/", {"limit": 50, "cursor": rng.choice(cursors)}),
+        "list_tickets_with_comments": lambda rng: ("/tickets/", {"limit": 50, "include": "comments"}),
+        "get_ticket": lambda rng: (f"/tickets/{rng.choice(ticket_ids)}", {}),
+        "ticket_comments": lambda rng: (f"/tickets/{rng.choice(ticket_ids)}/comments", {}),
+        "search": lambda rng: ("/tickets/search", {"q": rng.choice(WORDS), "limit": 20}),
+        "stats": lambda rng: ("/tickets/stats", {}),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, next_request: Callable, requests: int, concurrency: int) -> dict:
+    samples, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in remaining:
+            path, params = next_request(rng)
+            start = time.perf_counter()
+            response = await client.get(path, params=params)
+            samples.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    return {**latency_summary(samples, time.perf_counter() - start), "errors": errors}
+
+
+async def run_async(requests: int, concurrency: int, only: list = None) -> dict:
+    db = SessionLocal()
+    try:
+        ticket_ids = sample_ticket_ids(db, 1000)
+    finally:
+        db.close()
+    if not ticket_ids:
+        raise SystemExit("No seeded tickets; run python -m benchmarks.seed first")
+
+    app.dependency_overrides[get_current_user] = lambda: USER
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            cursors = await collect_cursors(client, DEEP_PAGES) or [None]
+            results = {}
+            for name, next_request in scenarios(ticket_ids, cursors).items():
+                if only and name not in only:
+                    continue
+                # A short warm-up fills the connection pool and caches like a running service's
+                await run_scenario(client, next_request, min(concurrency * 2, requests), concurrency)
+                results[name] = await run_scenario(client, next_request, requests, concurrency)
+            return results
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def run(requests: int, concurrency: int, only: list = None) -> dict:
+    return asyncio.run(run_async(requests, concurrency, only))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    args = parser.parse_args()
+    print(json.dumps({"concurrency": args.concurrency, "scenarios": run(args.requests, args.concurrency,
+                                                                        args.scenario)}, indent=2))
@@ -0,0 +1,53 @@
+"""Latency summaries and release-to-release comparison for the benchmark suite."""
+import statistics
+from typing import Dict, List
+
+
+def latency_summary(samples_ms: List[float], seconds: float) -> dict:
+    """Percentiles of per-request latencies (ms) and throughput over ``seconds`` of wall time."""
+    if not samples_ms:
+        return {"requests": 0}
+    if len(samples_ms) > 1:
+        cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = samples_ms[0]
+    return {
+        "requests": len(samples_ms),
+        "throughput_per_s": round(len(samples_ms) / seconds, 1) if seconds else None,
+        "mean_ms": round(statistics.mean(samples_ms), 2),
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "max_ms": round(max(samples_ms), 2),
+    }
+
+
+def _measures(report: dict) -> Dict[str, float]:
+    """The numbers tracked between releases, by "section.scenario.metric"."""
+    measures = {}
+    for scenario, summary in (report.get("api") or {}).items():
+        for metric in ("p95_ms", "p99_ms", "throughput_per_s"):
+            if summary.get(metric):
+                measures[f"api.{scenario}.{metric}"] = summary[metric]
+    if (report.get("worker") or {}).get("rows_per_second"):
+        measures["worker.import.rows_per_second"] = report["worker"]["rows_per_second"]
+    return measures
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """Measures that got worse than ``baseline`` by more than ``tolerance`` (0.2 = 20%).
+
+    Latencies regress when they grow, throughputs when they shrink.
+    """
+    regressions = []
+    previous = _measures(baseline)
+    for name, current in _measures(report).items():
+        before = previous.get(name)
+        if before is None:
+            continue
+        change = current / before - 1
+        worse = -change if name.endswith(("throughput_per_s", "rows_per_second")) else change
+        if worse > tolerance:
+            regressions.append({"measure": name, "baseline": before, "current": current, "change": round(change, 3)})
+    return regressions
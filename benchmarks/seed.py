@@ -0,0 +1,138 @@
+"""Seed the database at DATABASE_URL with benchmark tickets, comments and agents.
+
+Tickets go through the worker's bulk loader, so the ticket counters stay
+right, and about half of them are assigned to one of ``AGENTS`` support users.
+Each ticket gets ``--comments`` comments. Seeding tops up an earlier seed
+instead of starting over, so growing from 100k to 1M tickets only loads the
+difference. Every seeded row is recognisable by the ``DOMAIN`` email domain;
+``--drop`` deletes them and rebuilds the counters.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.seed --tickets 1000000 --comments 2
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import timedelta
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from common import ticket_stats
+from common.db import SessionLocal
+from common.enums import RoleEnum
+from common.models.comment import Comment
+from common.models.ticket import Ticket
+from common.models.user import User
+from worker.bulk_loader import load_tickets
+
+DOMAIN = "load.bench.example.com"
+AGENTS = 20
+TICKET_CHUNK = 100_000
+COMMENT_CHUNK = 20_000
+WORDS = ["printer", "login", "password", "invoice", "refund", "laptop", "screen", "network", "vpn", "email",
+         "broken", "slow", "error", "cannot", "access", "update", "install", "crash", "missing", "request"]
+
+
+def agents(db: Session) -> list:
+    """Ids of the benchmark support agents, created on first use."""
+    existing = db.scalars(select(User.id).where(User.email.like(f"%@{DOMAIN}")).order_by(User.email)).all()
+    if len(existing) >= AGENTS:
+        return list(existing)
+    for i in range(len(existing), AGENTS):
+        db.add(User(cognito_sub=f"bench-agent-{i}", name=f"Agent {i}", email=f"agent{i:02}@{DOMAIN}",
+                    role=RoleEnum.support))
+    db.commit()
+    return agents(db)
+
+
+def make_rows(start: int, count: int, agent_ids: list):
+    rng = random.Random(start)
+    for i in range(start, start + count):
+        yield {
+            "reporter_name": f"Reporter {i}",
+            "reporter_email": f"reporter{i % 5000}@{DOMAIN}",
+            "description": f"Ticket {i}: " + " ".join(rng.choices(WORDS, k=rng.randint(5, 20))),
+            "assigned_to_id": rng.choice(agent_ids) if i % 2 else None,
+        }
+
+
+def seed_tickets(db: Session, tickets: int, agent_ids: list) -> int:
+    present = db.scalar(select(func.count()).where(Ticket.reporter_email.like(f"%@{DOMAIN}")))
+    while present < tickets:
+        count = min(TICKET_CHUNK, tickets - present)
+        present += load_tickets(db, make_rows(present, count, agent_ids))
+        db.commit()
+    return present
+
+
+def seed_comments(db: Session, per_ticket: int, author_id) -> int:
+    """Give every seeded ticket without comments ``per_ticket`` of them; returns how many were added."""
+    added = 0
+    last_id = None
+    while per_ticket:
+        query = (select(Ticket.id, Ticket.created_at).where(Ticket.reporter_email.like(f"%@{DOMAIN}"))
+                 .order_by(Ticket.id).limit(COMMENT_CHUNK))
+        if last_id is not None:
+            query = query.where(Ticket.id > last_id)
+        tickets = db.execute(query).all()
+        if not tickets:
+            break
+        last_id = tickets[-1].id
+        commented = set(db.scalars(select(Comment.ticket_id).distinct()
+                                   .where(Comment.ticket_id.in_([ticket.id for ticket in tickets]))))
+        rows = [{"id": uuid.uuid4(), "ticket_id": ticket.id, "user_id": author_id,
+                 "content": f"Benchmark comment {n}", "created_at": ticket.created_at + timedelta(minutes=n)}
+                for ticket in tickets if ticket.id not in commented for n in range(1, per_ticket + 1)]
+        if rows:
+            db.execute(insert(Comment), rows)
+            db.commit()
+            added += len(rows)
+    return added
+
+
+def seed(tickets: int, comments: int) -> dict:
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        agent_ids = agents(db)
+        seeded = seed_tickets(db, tickets, agent_ids)
+        added = seed_comments(db, comments, agent_ids[0])
+        return {"tickets": seeded, "comments_added": added, "seconds": round(time.perf_counter() - start, 1)}
+    finally:
+        db.close()
+
+
+def sample_ticket_ids(db: Session, count: int) -> list:
+    """Ids of up to ``count`` seeded tickets for reads by id; ids are random UUIDs, so any range is a sample."""
+    return list(db.scalars(select(Ticket.id).where(Ticket.reporter_email.like(f"%@{DOMAIN}"))
+                           .order_by(Ticket.id).limit(count)))
+
+
+def drop(db: Session):
+    seeded = select(Ticket.id).where(Ticket.reporter_email.like(f"%@{DOMAIN}"))
+    db.execute(delete(Comment).where(Comment.ticket_id.in_(seeded)))
+    db.execute(delete(Ticket).where(Ticket.reporter_email.like(f"%@{DOMAIN}")))
+    db.execute(delete(Comment).where(Comment.user_id.in_(select(User.id).where(User.email.like(f"%@{DOMAIN}")))))
+    db.execute(delete(User).where(User.email.like(f"%@{DOMAIN}")))
+    # Deleting rows directly bypasses the counters
+    ticket_stats.rebuild(db)
+    db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--comments", type=int, default=2, help="comments per ticket")
+    parser.add_argument("--drop", action="store_true", help="delete the seeded rows instead")
+    args = parser.parse_args()
+    if args.drop:
+        session = SessionLocal()
+        try:
+            drop(session)
+        finally:
+            session.close()
+        print(json.dumps({"dropped": True}))
+    else:
+        print(json.dumps(seed(args.tickets, args.comments), indent=2))
@@ -0,0 +1,88 @@
+"""Release benchmark: seed, API load test and import worker, in one JSON report.
+
+Seeds ``--tickets`` tickets with ``--comments`` comments each (topping up an
+earlier seed), runs ``benchmarks.load_test`` and ``benchmarks.worker_import``
+against the database at DATABASE_URL and writes one report with p50/p95/p99
+latency and throughput per scenario, plus the commit and settings it ran
+with. With ``--baseline`` (a report from an earlier release) it lists the
+scenarios whose p95/p99 latency grew, or whose throughput fell, by more than
+``--tolerance``, and exits with status 1 if there are any.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.suite --tickets 1000000 --output report.json
+    DATABASE_URL=postgresql://... python -m benchmarks.suite --tickets 1000000 --baseline previous.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from sqlalchemy.engine import make_url
+from benchmarks import load_test, seed, worker_import
+from benchmarks.report import compare
+from common import config
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def settings() -> dict:
+    """The settings that change the numbers, so reports are only compared like for like."""
+    return {
+        "database": make_url(config.DATABASE_URL).get_backend_name(),
+        "db_async": config.DB_ASYNC,
+        "db_pool_mode": config.DB_POOL_MODE,
+        "db_pool_size": config.DB_POOL_SIZE,
+        "ticket_cache_backend": config.TICKET_CACHE_BACKEND,
+        "import_batch_size": config.IMPORT_BATCH_SIZE,
+        "worker_concurrency": config.WORKER_CONCURRENCY,
+    }
+
+
+def run(args) -> dict:
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": settings(),
+        "seed": seed.seed(args.tickets, args.comments),
+        "load": {"requests": args.requests, "concurrency": args.concurrency},
+        "api": load_test.run(args.requests, args.concurrency),
+        "worker": worker_import.run(args.import_rows, False, args.shard_mb, 10, keep=False),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000, help="tickets to seed (10k to 5M)")
+    parser.add_argument("--comments", type=int, default=2, help="comments per seeded ticket")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per API scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--import-rows", type=int, default=200_000)
+    parser.add_argument("--shard-mb", type=float, default=None)
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--baseline", help="report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed change for the worse (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline"] = {"commit": baseline.get("commit"), "tolerance": args.tolerance,
+                              "regressions": compare(report, baseline, args.tolerance)}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.baseline and report["baseline"]["regressions"]:
+        sys.exit(1)
@@ -0,0 +1,69 @@
+"""Ticket import throughput: per-row ORM objects versus the bulk loader.
+
+"orm" reproduces what WorkerService did before: one ``Ticket`` per row added
+to the session and a single commit. "bulk" runs ``worker.bulk_loader`` (COPY
+into a staging table and one merge on PostgreSQL). Both load the same rows
+into the database at DATABASE_URL, which must already be migrated; the rows
+are deleted afterwards.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.ticket_import --rows 100000
+"""
+import argparse
+import json
+import time
+import uuid
+from sqlalchemy import delete
+from common import ticket_stats
+from common.db import SessionLocal
+from common.models import comment, user  # noqa: F401 - register mappers on Base
+from common.models.ticket import Ticket
+from worker.bulk_loader import load_tickets
+
+
+def make_rows(count: int, marker: str) -> list:
+    return [{"reporter_name": f"Reporter {i}", "reporter_email": f"{marker}@bench.example.com",
+             "description": f"Benchmark ticket {i}"} for i in range(count)]
+
+
+def orm_insert(db, rows: list) -> int:
+    for row in rows:
+        db.add(Ticket(reporter_name=row["reporter_name"], reporter_email=row["reporter_email"],
+                      description=row["description"], assigned_to_id=row.get("assigned_to_id")))
+    db.commit()
+    return len(rows)
+
+
+def bulk_insert(db, rows: list) -> int:
+    loaded = load_tickets(db, rows)
+    db.commit()
+    return loaded
+
+
+def measure(fn, rows: list, marker: str) -> dict:
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        loaded = fn(db, rows)
+        elapsed = time.perf_counter() - start
+        db.execute(delete(Ticket).where(Ticket.reporter_email == f"{marker}@bench.example.com"))
+        # Deleting rows directly bypasses the counters
+        ticket_stats.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    return {"rows": loaded, "seconds": round(elapsed, 3), "rows_per_second": round(loaded / elapsed, 1)}
+
+
+def run(rows: int) -> dict:
+    marker = uuid.uuid4().hex
+    data = make_rows(rows, marker)
+    return {"rows": rows, "orm": measure(orm_insert, data, marker), "bulk": measure(bulk_insert, data, marker)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows), indent=2))
@@ -0,0 +1,134 @@
+"""Ticket search latency: the indexed ``GET /tickets/search`` query versus an ILIKE scan.
+
+Seeds ``--rows`` synthetic tickets into the PostgreSQL database at
+DATABASE_URL (migrated, including ``0009``) through the bulk loader, topping
+up an earlier seed instead of starting over. Descriptions draw words from a
+Zipf-like vocabulary, so the queries cover rare and common words. "search"
+times ``TicketService.search_tickets`` (first page, then the page after it);
+"scan" times the unindexed substring match over description, reporter name
+and email that searching used to require. Pass ``--drop`` to delete the seeded
+tickets afterwards.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.ticket_search --rows 1000000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import noload
+from app.services.ticket_service import TicketService
+from common import ticket_stats
+from common.db import SessionLocal
+from common.models import comment, user  # noqa: F401 - register mappers on Base
+from common.models.ticket import Ticket
+from worker.bulk_loader import load_tickets
+
+DOMAIN = "search.bench.example.com"
+SEED_CHUNK = 100_000
+FIRST_NAMES = ["Alice", "Bruno", "Chen", "Dana", "Emeka", "Farah", "Goran", "Hana", "Ivan", "Jun"]
+LAST_NAMES = ["Okafor", "Silva", "Tanaka", "Novak", "Haddad", "Larsen", "Moreau", "Singh", "Kowalski", "Reyes"]
+USER = {"sub": "benchmark", "cognito:groups": ["manager"]}
+
+
+def vocabulary(size: int = 5000) -> list:
+    rng = random.Random(1)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return sorted({"".join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(size)})
+
+
+def queries(words: list) -> dict:
+    """Query name -> q. The vocabulary is weighted by rank, so its first words are the most common."""
+    return {
+        "common_word": words[0],
+        "rare_word": words[-7],
+        "two_words": f"{words[0]} {words[3]}",
+        "phrase": '"printer jammed"',
+        "reporter_name": "Farah Larsen",
+        "email_fragment": "moreau",
+    }
+
+
+def make_rows(start: int, count: int, words: list):
+    rng = random.Random(start)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    for i in range(start, start + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        description = " ".join(rng.choices(words, weights, k=rng.randint(8, 15)))
+        if i % 1000 == 0:
+            description += " printer jammed"
+        yield {"reporter_name": f"{first} {last}", "reporter_email": f"{first}.{last}{i % 997}@{DOMAIN}".lower(),
+               "description": description[:500]}
+
+
+def seed(rows: int, words: list) -> int:
+    db = SessionLocal()
+    try:
+        present = db.scalar(select(func.count()).where(Ticket.reporter_email.like(f"%@{DOMAIN}")))
+        while present < rows:
+            count = min(SEED_CHUNK, rows - present)
+            present += load_tickets(db, make_rows(present, count, words))
+            db.commit()
+        return present
+    finally:
+        db.close()
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+    return {"p50_ms": round(statistics.median(samples), 2), "p95_ms": round(p95, 2)}
+
+
+def scan(db, q: str, limit: int) -> list:
+    pattern = "%" + q.strip('"') + "%"
+    return (db.query(Ticket).options(noload(Ticket.comments))
+            .filter(or_(Ticket.description.ilike(pattern), Ticket.reporter_name.ilike(pattern),
+                        Ticket.reporter_email.ilike(pattern)))
+            .order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(limit).all())
+
+
+def run(rows: int, repeat: int, limit: int, drop: bool) -> dict:
+    words = vocabulary()
+    seeded = seed(rows, words)
+    db = SessionLocal()
+    service = TicketService(db)
+    results = {}
+    try:
+        db.execute(select(func.count()).select_from(Ticket))  # warm the connection
+        for name, q in queries(words).items():
+            first = service.search_tickets(USER, q, limit=limit)
+            results[name] = {
+                "q": q,
+                "matches_on_page": len(first.items),
+                "search": timed(lambda: service.search_tickets(USER, q, limit=limit), repeat),
+                "search_next_page": timed(lambda: service.search_tickets(USER, q, first.next_cursor, limit), repeat)
+                if first.next_cursor else None,
+                "scan": timed(lambda: scan(db, q, limit), max(repeat // 5, 1)),
+            }
+            db.rollback()
+        if drop:
+            db.execute(delete(Ticket).where(Ticket.reporter_email.like(f"%@{DOMAIN}")))
+            # Deleting rows directly bypasses the counters
+            ticket_stats.rebuild(db)
+            db.commit()
+    finally:
+        db.close()
+    return {"rows": seeded, "limit": limit, "repeat": repeat, "queries": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--drop", action="store_true", help="delete the seeded tickets afterwards")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat, args.limit, args.drop), indent=2))
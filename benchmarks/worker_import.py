@@ -0,0 +1,163 @@
+"""Import worker throughput: ``worker.lambda_handler`` end to end against S3/SQS stand-ins.
+
+Builds an NDJSON (optionally gzip'd) file of ``--rows`` tickets, serves it from
+an in-memory S3 that honours ``Range`` like the real one, and feeds the job's
+SQS message to ``lambda_handler``. Messages the worker sends (one per shard
+of a large file) are delivered back in batches of ``--sqs-batch``, the way the
+SQS event source would. Tickets land in the database at DATABASE_URL, which
+must be migrated; they are deleted afterwards unless ``--keep`` is passed.
+
+moto is not used: its responses do not work with aiobotocore (see
+``tests/conftest.py``), so the stand-ins implement only the calls the worker
+makes. S3 and SQS latency is therefore not part of the numbers.
+
+Usage::
+
+    DATABASE_URL=postgresql://... python -m benchmarks.worker_import --rows 1000000 --shard-mb 16
+"""
+import argparse
+import gzip
+import io
+import json
+import time
+import uuid
+from unittest.mock import patch
+from sqlalchemy import delete, or_
+from benchmarks.report import latency_summary
+from common import ticket_stats
+from common.db import SessionLocal
+from common.enums import JobStatusEnum
+from common.models import comment, user  # noqa: F401 - register mappers on Base
+from common.models.ticket import Ticket, TicketImportJob
+from worker import lambda_handler as handler_module
+from worker import worker_service
+
+DOMAIN = "import.bench.example.com"
+BUCKET = "benchmark-imports"
+
+
+class MemoryBody:
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    async def read(self, amt: int = -1) -> bytes:
+        return self._stream.read(amt)
+
+
+class MemoryS3:
+    """``head_object`` and ``get_object`` (with an inclusive ``Range``, clipped like S3's) over a dict."""
+
+    def __init__(self):
+        self.objects = {}
+
+    async def head_object(self, Bucket: str, Key: str) -> dict:
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    async def get_object(self, Bucket: str, Key: str, Range: str = None) -> dict:
+        data = self.objects[(Bucket, Key)]
+        if Range:
+            first, last = Range.removeprefix("bytes=").split("-")
+            data = data[int(first):int(last) + 1]
+        return {"Body": MemoryBody(data), "ContentLength": len(data)}
+
+
+class MemorySQS:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message_batch(self, QueueUrl: str, Entries: list) -> dict:
+        self.messages.extend(entry["MessageBody"] for entry in Entries)
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+
+class StandInClients:
+    """Takes the place of ``common.aws.aws_clients`` in the worker modules."""
+
+    def __init__(self):
+        self.services = {"s3": MemoryS3(), "sqs": MemorySQS()}
+
+    async def async_client(self, service: str, region_name: str = None):
+        return self.services[service]
+
+    async def aclose(self):
+        pass
+
+
+def make_file(rows: int, run_id: str, compress: bool) -> bytes:
+    lines = (json.dumps({"reporter_name": f"Reporter {i}", "reporter_email": f"reporter{i % 5000}@{DOMAIN}",
+                         "description": f"Imported ticket {i} of run {run_id}"}) for i in range(rows))
+    data = ("\n".join(lines) + "\n").encode()
+    return gzip.compress(data, compresslevel=1) if compress else data
+
+
+def run(rows: int, compress: bool, shard_mb: float, sqs_batch: int, keep: bool) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    clients = StandInClients()
+    key = f"tickets/{run_id}.ndjson" + (".gz" if compress else "")
+    data = make_file(rows, run_id, compress)
+    clients.services["s3"].objects[(BUCKET, key)] = data
+
+    db = SessionLocal()
+    job = TicketImportJob(created_by=uuid.uuid4(), s3_url=f"s3://{BUCKET}/{key}")
+    db.add(job)
+    db.commit()
+    queue = clients.services["sqs"].messages
+    queue.append(json.dumps({"job_id": job.id}))
+
+    invocations, failures = [], 0
+    shard_bytes = int(shard_mb * 1024 * 1024) if shard_mb else worker_service.IMPORT_SHARD_BYTES
+    start = time.perf_counter()
+    with patch.object(worker_service, "aws_clients", clients), patch.object(handler_module, "aws_clients", clients), \
+            patch.object(worker_service, "IMPORT_SHARD_BYTES", shard_bytes):
+        # Redelivered failures are bounded so a broken import cannot loop forever
+        while queue and failures < 10:
+            batch, queue[:] = queue[:sqs_batch], queue[sqs_batch:]
+            event = {"Records": [{"messageId": str(i), "body": body} for i, body in enumerate(batch)]}
+            invocation_start = time.perf_counter()
+            result = handler_module.lambda_handler(event, None)
+            invocations.append((time.perf_counter() - invocation_start) * 1000)
+            for failure in result["batchItemFailures"]:
+                failures += 1
+                queue.append(batch[int(failure["itemIdentifier"])])
+    seconds = time.perf_counter() - start
+
+    try:
+        db.expire_all()
+        parent = db.get(TicketImportJob, job.id)
+        shards = db.query(TicketImportJob).filter(TicketImportJob.parent_id == job.id).all()
+        report = {
+            "rows": rows,
+            "file_mb": round(len(data) / 1024 / 1024, 1),
+            "gzip": compress,
+            "status": parent.status.value if isinstance(parent.status, JobStatusEnum) else parent.status,
+            "rows_imported": parent.rows_processed,
+            "shards": len(shards),
+            "seconds": round(seconds, 2),
+            "rows_per_second": round(parent.rows_processed / seconds, 1),
+            "failed_deliveries": failures,
+            "invocations": latency_summary(invocations, seconds),
+        }
+        if shards:
+            report["shard_rows_per_second"] = sorted(shard.rows_per_second or 0 for shard in shards)
+        if not keep:
+            db.execute(delete(Ticket).where(Ticket.reporter_email.like(f"%@{DOMAIN}")))
+            db.execute(delete(TicketImportJob).where(or_(TicketImportJob.parent_id == job.id,
+                                                         TicketImportJob.id == job.id)))
+            # Deleting rows directly bypasses the counters
+            ticket_stats.rebuild(db)
+            db.commit()
+        return report
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--gzip", action="store_true", help="upload the file gzip'd (never sharded)")
+    parser.add_argument("--shard-mb", type=float, default=None,
+                        help="split plain files into shards of this size (default: IMPORT_SHARD_BYTES)")
+    parser.add_argument("--sqs-batch", type=int, default=10, help="messages per worker invocation")
+    parser.add_argument("--keep", action="store_true", help="keep the imported tickets")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.gzip, args.shard_mb, args.sqs_batch, args.keep), indent=2))
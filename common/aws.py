@@ -0,0 +1,74 @@
+"""Process-wide AWS clients.
+
+Building a boto3/aioboto3 client loads the botocore service model from disk
+and costs milliseconds, while a built client is safe to share. Clients are
+therefore created lazily on first use and reused across requests and warm
+Lambda invocations.
+
+Async clients hold an aiohttp session bound to the event loop that opened
+them, so they are cached per loop and closed with ``aclose()`` (FastAPI
+lifespan shutdown, or the end of a worker invocation).
+"""
+import asyncio
+import threading
+from common.config import AWS_REGION
+
+
+class AWSClients:
+    """Lazily created, shared boto3 and aioboto3 clients."""
+
+    def __init__(self):
+        self._clients = {}
+        self._async_clients = {}
+        self._session = None
+        self._lock = threading.Lock()
+
+    def client(self, service: str, region_name: str = AWS_REGION):
+        """Return the shared synchronous boto3 client for ``service``."""
+        key = (service, region_name)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    import boto3
+                    client = boto3.client(service, region_name=region_name)
+                    self._clients[key] = client
+        return client
+
+    async def async_client(self, service: str, region_name: str = AWS_REGION):
+        """Return the shared aioboto3 client for ``service`` on the running loop."""
+        loop = asyncio.get_running_loop()
+        key = (service, region_name)
+        entry = self._async_clients.get(key)
+        if entry is None or entry[0] is not loop:
+            # Store the opening task right away so concurrent callers share it
+            entry = (loop, loop.create_task(self._open(service, region_name)))
+            self._async_clients[key] = entry
+        try:
+            client, _ = await entry[1]
+        except Exception:
+            self._async_clients.pop(key, None)
+            raise
+        return client
+
+    async def _open(self, service: str, region_name: str):
+        if self._session is None:
+            import aioboto3
+            self._session = aioboto3.Session()
+        context = self._session.client(service, region_name=region_name)
+        return await context.__aenter__(), context
+
+    async def aclose(self):
+        """Close the async clients opened on the running loop."""
+        loop = asyncio.get_running_loop()
+        for key, (owner, task) in list(self._async_clients.items()):
+            if owner is not loop:
+                continue
+            del self._async_clients[key]
+            if task.done() and not task.cancelled() and task.exception() is None:
+                _, context = task.result()
+                await context.__aexit__(None, None, None)
+
+
+aws_clients = AWSClients()
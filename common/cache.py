@@ -0,0 +1,218 @@
+"""Read-through cache for serialized API payloads.
+
+``TICKET_CACHE_BACKEND`` selects the backend: ``memory`` keeps a TTL + LRU
+cache in the process, ``redis`` shares entries between API instances through
+``REDIS_URL`` (the ``redis`` package is only needed for that backend), and
+``none`` disables caching. Entries are raw bytes, so a hit skips both the
+database and model validation. Writers call ``delete`` after they commit.
+
+Every backend counts hits, misses and evictions for ``GET /health/cache``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+from common.logger import logger
+from common.metrics import registry
+from common.config import TICKET_CACHE_BACKEND, TICKET_CACHE_TTL_SECONDS, TICKET_CACHE_MAX_ENTRIES, REDIS_URL
+
+
+class CacheStats:
+    """Process-wide counters for one cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.sets = 0
+            self.deletes = 0
+            self.evictions = 0
+            self.errors = 0
+
+    def record(self, **counts: int):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "sets": self.sets,
+                "deletes": self.deletes,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+
+
+class MemoryCache:
+    """Thread-safe TTL cache that evicts the least recently used entry when full."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = TICKET_CACHE_MAX_ENTRIES, ttl: float = TICKET_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats.record(hits=1)
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        self.stats.record(misses=1)
+        return None
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self.stats.record(sets=1, evictions=evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        self.stats.record(deletes=1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def describe(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {"backend": self.backend, "size": size, "max_entries": self.max_entries, "ttl_seconds": self.ttl}
+
+
+class RedisCache:
+    """Cache shared between processes through a Redis client (or anything with get/set/delete).
+
+    Redis errors are logged and counted, and the lookup is treated as a miss:
+    an unavailable cache slows reads down but never fails them.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, ttl: float = TICKET_CACHE_TTL_SECONDS, prefix: str = "support-api:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def _failed(self, operation: str, key: str, exc: Exception):
+        self.stats.record(errors=1)
+        logger.warning("Cache %s failed for %s: %s", operation, key, exc)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception as exc:
+            self._failed("get", key, exc)
+            value = None
+        self.stats.record(**({"hits": 1} if value is not None else {"misses": 1}))
+        return value
+
+    def set(self, key: str, value: bytes):
+        try:
+            # Redis expires and evicts entries itself (px = TTL in milliseconds)
+            self.client.set(self.prefix + key, value, px=max(int(self.ttl * 1000), 1))
+        except Exception as exc:
+            self._failed("set", key, exc)
+            return
+        self.stats.record(sets=1)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as exc:
+            # The entry lives on until its TTL runs out
+            self._failed("delete", key, exc)
+            return
+        self.stats.record(deletes=1)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def describe(self) -> dict:
+        return {"backend": self.backend, "ttl_seconds": self.ttl}
+
+
+class NullCache:
+    """Caching disabled: every lookup misses."""
+
+    backend = "none"
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[bytes]:
+        self.stats.record(misses=1)
+        return None
+
+    def set(self, key: str, value: bytes):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def describe(self) -> dict:
+        return {"backend": self.backend}
+
+
+@lru_cache(maxsize=None)
+def ticket_cache():
+    """The cache for ticket payloads, built on first use from TICKET_CACHE_BACKEND."""
+    if TICKET_CACHE_BACKEND == "memory":
+        return MemoryCache()
+    if TICKET_CACHE_BACKEND == "redis":
+        import redis  # optional dependency, only needed for the shared backend
+        return RedisCache(redis.Redis.from_url(REDIS_URL, socket_timeout=0.25))
+    if TICKET_CACHE_BACKEND == "none":
+        return NullCache()
+    raise ValueError(f"Unknown TICKET_CACHE_BACKEND: {TICKET_CACHE_BACKEND}")
+
+
+def ticket_cache_key(ticket_id) -> str:
+    return f"ticket:{ticket_id}"
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and occupancy of the ticket cache."""
+    cache = ticket_cache()
+    return {**cache.describe(), **cache.stats.snapshot()}
+
+
+def _cache_metrics():
+    if not ticket_cache.cache_info().currsize:
+        return []  # not built yet; building it here could connect to Redis from a metrics read
+    stats = cache_stats()
+    metrics = [(f"ticket_cache_{name}_total", "counter", f"Ticket cache {name}", [({}, stats[name])])
+               for name in ("hits", "misses", "sets", "deletes", "evictions", "errors")]
+    metrics.append(("ticket_cache_hit_ratio", "gauge", "Ticket cache hits per lookup since start",
+                    [({}, stats["hit_ratio"])]))
+    return metrics
+
+
+registry.register_collector(_cache_metrics)
@@ -9,11 +9,48 @@ COGNITO_REGION = os.getenv("COGNITO_REGION", "us-east-1")
 COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
 COGNITO_CLIENT_ID = os.getenv("COGNITO_CLIENT_ID")
 
+# Authentication mode
+# "apigateway": trust the claims added by the API Gateway Cognito authorizer
+# "local": verify the bearer token in-process against the user pool JWKS
+AUTH_MODE = os.getenv("AUTH_MODE", "apigateway")
+JWKS_CACHE_TTL_SECONDS = int(os.getenv("JWKS_CACHE_TTL_SECONDS", "3600"))
+JWKS_MIN_REFRESH_SECONDS = int(os.getenv("JWKS_MIN_REFRESH_SECONDS", "30"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
+# When enabled the API serves requests with AsyncSession on an async driver
+# (asyncpg by default); otherwise DB work runs on psycopg2 in the threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Import jobs the worker runs at once from one SQS batch; each holds a DB connection
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+# Deliveries of one import job before it is marked failed for good
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "5"))
+# A job left PROCESSING longer than this (e.g. by a timed-out Lambda) may be picked up again
+WORKER_JOB_LEASE_SECONDS = int(os.getenv("WORKER_JOB_LEASE_SECONDS", "900"))
+
+# Connection pool
+# "bounded": small QueuePool per process (containers, Lambda without a proxy)
+# "null": no pooling, every session opens its own connection (RDS Proxy / pgbouncer)
+# A Lambda container serves one request at a time, so it keeps a single connection;
+# overflow only opens while the worker runs concurrent jobs.
+ON_LAMBDA = "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "bounded")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "1" if ON_LAMBDA else "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(WORKER_CONCURRENCY - 1) if ON_LAMBDA else "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle before RDS/NAT idle timeouts and after long Lambda freezes
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
 
 # S3 configuration
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+# Part size for streamed uploads (S3 requires at least 5 MiB per part except the last)
+S3_MULTIPART_PART_BYTES = max(int(os.getenv("S3_MULTIPART_PART_BYTES", str(8 * 1024 * 1024))), 5 * 1024 * 1024)
+# Lifetime of presigned import upload URLs
+IMPORT_UPLOAD_URL_EXPIRES = int(os.getenv("IMPORT_UPLOAD_URL_EXPIRES", "900"))
 
 # SQS configuration
 SQS_QUEUE_URL = os.getenv("SQS_QUEUE_URL")
@@ -21,3 +58,50 @@ SQS_QUEUE_URL = os.getenv("SQS_QUEUE_URL")
 AWS_REGION = 'us-east-1'
 
 LOCALSTACK_HOST = os.getenv("LOCALSTACK_HOST", "localhost")
+
+# Idempotency-Key responses are replayed for this long (24h, like most payment APIs)
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Ticket read cache: "memory" (per process), "redis" (shared, needs the redis package) or "none"
+TICKET_CACHE_BACKEND = os.getenv("TICKET_CACHE_BACKEND", "memory").lower()
+# Short by default: other API instances' memory caches only see a change once their entry expires
+TICKET_CACHE_TTL_SECONDS = float(os.getenv("TICKET_CACHE_TTL_SECONDS", "30"))
+TICKET_CACHE_MAX_ENTRIES = int(os.getenv("TICKET_CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Rows each ticket counter is spread over, so concurrent ticket writes rarely contend on one row
+TICKET_STATS_SLOTS = max(int(os.getenv("TICKET_STATS_SLOTS", "8")), 1)
+
+# Logging: JSON lines written by a background thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Share of per-request info lines (request_timing, route traces) that are written; warnings and errors always are
+LOG_SAMPLE_RATE = min(max(float(os.getenv("LOG_SAMPLE_RATE", "1")), 0.0), 1.0)
+
+# Per-request timing: a Server-Timing header on every response (turn off to keep it from clients)
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+
+# Metrics: GET /metrics serves them to Prometheus in containers; on Lambda each invocation
+# logs them as CloudWatch Embedded Metric Format lines instead. The route is off unless
+# enabled, so only deployments whose port is reachable from the internal network alone expose it.
+METRICS_ENDPOINT = os.getenv("METRICS_ENDPOINT", "false").lower() == "true"
+METRICS_EMF = os.getenv("METRICS_EMF", "true" if ON_LAMBDA else "false").lower() == "true"
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "TicketSystem")
+
+# Pagination configuration
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+# Ticket search ranks only this many of the newest matches, so a common word costs no more than a rare one
+TICKET_SEARCH_WINDOW = max(int(os.getenv("TICKET_SEARCH_WINDOW", "1000")), 1)
+
+# Bulk import configuration
+# Rows per COPY / executemany batch when loading an import file
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+# Rows committed per checkpoint; a retried job resumes after the last one
+IMPORT_CHECKPOINT_ROWS = int(os.getenv("IMPORT_CHECKPOINT_ROWS", "50000"))
+# NDJSON files larger than this are split into byte-range shards imported in parallel
+IMPORT_SHARD_BYTES = int(os.getenv("IMPORT_SHARD_BYTES", str(64 * 1024 * 1024)))
+IMPORT_MAX_SHARDS = int(os.getenv("IMPORT_MAX_SHARDS", "16"))
+# Bytes read from the S3 body at a time while streaming an import file
+IMPORT_READ_CHUNK_BYTES = int(os.getenv("IMPORT_READ_CHUNK_BYTES", str(256 * 1024)))
+# Errors kept on a job for the invalid rows it skipped; the rest are only counted
+IMPORT_MAX_ROW_ERRORS = int(os.getenv("IMPORT_MAX_ROW_ERRORS", "20"))
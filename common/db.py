@@ -1,17 +1,118 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from typing import Union
+import anyio
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from common.config import DATABASE_URL
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from common.config import DATABASE_URL, DB_ASYNC, ASYNC_DATABASE_URL, DB_POOL_MODE
+from common.metrics import registry
+from common.pool import describe_pool, engine_options, pool_stats
+from common.request_timing import instrument_engine
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Either flavour of session, depending on DB_ASYNC
+DBSession = Union[Session, AsyncSession]
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
 
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get a database session."""
-    db = SessionLocal()
+
+def async_database_url() -> str:
+    """ASYNC_DATABASE_URL, or DATABASE_URL switched to the matching async driver."""
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    url = make_url(DATABASE_URL)
+    return url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}") \
+        .render_as_string(hide_password=False)
+
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Build the async engine on first use, so the driver is only needed when DB_ASYNC is on."""
+    url = async_database_url()
+    async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+    instrument_engine(async_engine.sync_engine)
+    # Objects stay usable after commit without an implicit (awaitable) refresh
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def db_pool_stats() -> dict:
+    """Checkout-wait counters and current occupancy of the pool serving requests."""
+    active = get_async_sessionmaker().kw["bind"].sync_engine if DB_ASYNC else engine
+    return {"mode": DB_POOL_MODE, **describe_pool(active.pool), **pool_stats.snapshot()}
+
+
+# Pool occupancy (where the pool class reports it) is a gauge; checkout counters only grow
+_POOL_GAUGES = ("size", "checked_out", "overflow", "idle")
+_POOL_COUNTERS = ("checkouts", "waited", "timeouts")
+
+
+def _pool_metrics():
+    if DB_ASYNC and not get_async_sessionmaker.cache_info().currsize:
+        return []  # the async engine is only built on first use
+    stats = db_pool_stats()
+    metrics = [(f"db_pool_{name}", "gauge", f"Connections: {name.replace('_', ' ')}", [({}, stats[name])])
+               for name in _POOL_GAUGES if name in stats]
+    metrics += [(f"db_pool_{name}_total", "counter", f"Pool checkouts: {name}", [({}, stats[name])])
+                for name in _POOL_COUNTERS]
+    metrics.append(("db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection",
+                    [({}, stats["wait_ms_total"] / 1000)]))
+    return metrics
+
+
+registry.register_collector(_pool_metrics)
+
+
+async def dispose_async_engine():
+    """Close pooled async connections; they belong to the event loop that opened them.
+
+    The worker runs a fresh event loop per invocation, so it calls this before
+    its loop ends.
+    """
+    if DB_ASYNC and get_async_sessionmaker.cache_info().currsize:
+        await get_async_sessionmaker().kw["bind"].dispose()
+
+
+@asynccontextmanager
+async def session_scope(**options):
+    """Open an AsyncSession when DB_ASYNC is on, a Session otherwise.
+
+    ``options`` override the sessionmaker's, e.g. ``expire_on_commit=False``
+    for code that reads its objects on the event loop after committing.
+    """
+    if DB_ASYNC:
+        async with get_async_sessionmaker()(**options) as db:
+            yield db
+        return
+
+    db = SessionLocal(**options)
     try:
         yield db
     finally:
-        db.close()
+        await anyio.to_thread.run_sync(db.close)
+
+
+async def get_db():
+    """Dependency to get a database session."""
+    async with session_scope() as db:
+        yield db
+
+
+async def run_in_session(db: DBSession, fn, *args, **kwargs):
+    """Run sync ORM code ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    On an AsyncSession the code runs through SQLAlchemy's greenlet bridge, so
+    its queries are awaited on the async driver. On a plain Session it runs in
+    the threadpool, as sync FastAPI endpoints do.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await anyio.to_thread.run_sync(partial(fn, db, *args, **kwargs))
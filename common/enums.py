@@ -17,6 +17,7 @@ class TicketStatusEnum(Enum):
 
 class JobStatusEnum(Enum):
     PENDING = "pending"
+    QUEUED = "queued"
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
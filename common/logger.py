@@ -1,11 +1,122 @@
-import logging, sys
+"""The application logger: JSON lines written off the calling thread.
 
-logger = logging.getLogger("ticket_worker")
-logger.setLevel(logging.INFO)
+``logger`` only puts records on a queue; a ``QueueListener`` thread formats
+them and writes them to stdout, so request threads and the event loop never
+wait on log I/O. Messages are formatted lazily on that thread too: log with
+``logger.info("Job %s completed", job_id)`` rather than an f-string, and pass
+values that will not change afterwards (ids, numbers, strings). Only
+tracebacks are rendered when logged, while their frames are current.
+
+Every line carries the ``correlation_id`` of the request or SQS message being
+handled (set by the API middleware and the worker). Per-request info lines
+pass ``extra=HOT_PATH`` and are kept at ``LOG_SAMPLE_RATE``. Other ``extra``
+fields become JSON fields.
+
+On Lambda, records logged just before a handler returns would wait in the
+queue while the environment is frozen, so handlers call ``flush_logs()``
+before returning.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from common.config import LOG_LEVEL, LOG_SAMPLE_RATE
+
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+# extra= for info lines logged on every request, which are sampled at LOG_SAMPLE_RATE
+HOT_PATH = {"sampled": True}
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_FIELDS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "correlation_id", "sampled"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        if getattr(record, "sampled", False):
+            entry["sample_rate"] = LOG_SAMPLE_RATE
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the correlation id and drop the sampled-out hot-path records, on the calling thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno <= logging.INFO and random.random() >= LOG_SAMPLE_RATE:
+            return False
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """A ``QueueHandler`` that leaves ``msg % args`` to the listener thread."""
 
-handler = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-handler.setFormatter(formatter)
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # A copy, since other handlers of the record may still want exc_info
+            record = copy.copy(record)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(JsonFormatter())
+_listener: Optional[QueueListener] = None
+
+logger = logging.getLogger("ticket_worker")
+logger.setLevel(LOG_LEVEL)
+# The Lambda runtime puts its own synchronous handler on the root logger; propagating would write every line twice
+logger.propagate = False
+handler = LazyQueueHandler(queue.Queue())
+handler.addFilter(ContextFilter())
 logger.addHandler(handler)
+
+
+def _start_listener():
+    global _listener
+    # A fresh queue: one inherited across fork() may have its lock held by the parent's listener
+    handler.queue = queue.Queue()
+    _listener = QueueListener(handler.queue, _stream_handler)
+    _listener.start()
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # writes what is still queued
+        _listener = None
+
+
+def flush_logs():
+    """Block until every record queued so far has been written."""
+    if _listener is not None:
+        handler.queue.join()
+
+
+_start_listener()
+atexit.register(_stop_listener)
+# A forked child (e.g. a pre-forking server) does not inherit the listener thread
+os.register_at_fork(after_in_child=_start_listener)
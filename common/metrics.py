@@ -0,0 +1,284 @@
+"""Process-wide metrics for the API and the worker.
+
+Metrics are declared once with ``registry.counter`` / ``gauge`` /
+``histogram`` and recorded with keyword labels. They are read two ways:
+
+* ``registry.render()`` returns the Prometheus text format, served by
+  ``GET /metrics`` when the API runs as a container.
+* On Lambda there is nothing to scrape, so each handler calls
+  ``registry.flush_emf(service)`` when an invocation ends. It logs what was
+  recorded during the invocation as CloudWatch Embedded Metric Format lines,
+  which CloudWatch turns into metrics, and starts the next invocation from
+  zero. Counters report their increase, histograms their observations and
+  gauges their last value. Recording for EMF only happens when ``METRICS_EMF``
+  is on (the default on Lambda), so a container does not buffer observations
+  nobody flushes.
+
+Stats kept elsewhere (connection pool, ticket cache) are added at read time
+by collectors registered with ``registry.register_collector``.
+"""
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from common.config import METRICS_EMF, METRICS_NAMESPACE
+from common.logger import logger
+
+LabelValues = Tuple[str, ...]
+# (name, type, help, [(labels, value)]) reported by a collector at read time
+CollectedMetric = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# CloudWatch accepts at most 100 values per metric in one EMF document
+EMF_MAX_VALUES = 100
+
+# EMF documents must be bare JSON lines, without the application log prefix
+emf_logger = logging.getLogger("metrics.emf")
+emf_logger.setLevel(logging.INFO)
+emf_logger.propagate = False
+_emf_handler = logging.StreamHandler(sys.stdout)
+_emf_handler.setFormatter(logging.Formatter("%(message)s"))
+emf_logger.addHandler(_emf_handler)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], unit: str):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.unit = unit
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def take_pending(self) -> dict:
+        """What was recorded since the last call, for EMF, and reset it."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+            if METRICS_EMF:
+                self._pending[key] = self._pending.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+            if METRICS_EMF:
+                self._pending[key] = value
+
+    def value(self, **labels) -> Optional[float]:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: observations per bucket (not cumulative), sum and count
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+            if METRICS_EMF:
+                self._pending.setdefault(key, []).append(value)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[CollectedMetric]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = (), unit: str = "Count") -> Counter:
+        return self._register(Counter(name, help, labelnames, unit))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), unit: str = "None") -> Gauge:
+        return self._register(Gauge(name, help, labelnames, unit))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), unit: str = "Seconds",
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, unit, buckets=buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[CollectedMetric]]):
+        """Add metrics computed at read time, such as stats another module already keeps."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def _collect(self) -> List[CollectedMetric]:
+        collected = []
+        for collector in list(self._collectors):
+            try:
+                collected.extend(collector())
+            except Exception as e:  # a broken collector must not take the others down
+                logger.warning("Metrics collector %s failed: %s", collector.__name__, e)
+        return collected
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        for name, kind, help, samples in self._collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def emf_documents(self, service: str) -> List[dict]:
+        """EMF documents for what was recorded since the last call, one per label set.
+
+        Collected gauges are included with their current value; collected
+        counters are process totals rather than per-invocation increases, so
+        they are left to ``render``.
+        """
+        # (label names, label values) -> {metric name: (unit, values)}
+        groups: Dict[Tuple[Tuple[str, ...], LabelValues], Dict[str, Tuple[str, list]]] = defaultdict(dict)
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            for key, pending in metric.take_pending().items():
+                values = pending if isinstance(pending, list) else [pending]
+                groups[(metric.labelnames, key)][metric.name] = (metric.unit, values)
+        for name, kind, _, samples in self._collect():
+            if kind == "gauge":
+                for labels, value in samples:
+                    groups[(tuple(labels), tuple(labels.values()))][name] = ("None", [value])
+
+        documents = []
+        timestamp = int(time.time() * 1000)
+        for (labelnames, key), values_by_name in groups.items():
+            # Histograms with more than EMF_MAX_VALUES observations are split over several documents
+            for offset in range(0, max(len(values) for _, values in values_by_name.values()), EMF_MAX_VALUES):
+                document = {"service": service, **dict(zip(labelnames, key))}
+                definitions = []
+                for name, (unit, values) in values_by_name.items():
+                    chunk = values[offset:offset + EMF_MAX_VALUES]
+                    if chunk:
+                        document[name] = chunk if len(chunk) > 1 else chunk[0]
+                        definitions.append({"Name": name, "Unit": unit})
+                document["_aws"] = {"Timestamp": timestamp, "CloudWatchMetrics": [{
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["service", *labelnames]],
+                    "Metrics": definitions,
+                }]}
+                documents.append(document)
+        return documents
+
+    def flush_emf(self, service: str):
+        """Log this invocation's metrics as EMF lines; a no-op unless METRICS_EMF is on."""
+        if not METRICS_EMF:
+            return
+        for document in self.emf_documents(service):
+            emf_logger.info(json.dumps(document))
+
+
+registry = Registry()
@@ -0,0 +1,109 @@
+"""Forward-only schema migrations.
+
+Every module in ``common/migrations`` named ``NNNN_description.py`` defines an
+``upgrade(conn)`` function. Applied versions are recorded in the
+``schema_migrations`` table, so running the command again is a no-op.
+Migrations that cannot run inside a transaction (``CREATE INDEX
+CONCURRENTLY``) set ``TRANSACTIONAL = False`` and run in autocommit mode.
+
+Usage::
+
+    python -m common.migrate            # apply pending migrations
+    python -m common.migrate status     # list applied / pending versions
+"""
+import argparse
+import importlib
+import pkgutil
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+from common import migrations
+from common.logger import logger
+
+# Arbitrary constant shared by every deploy so concurrent runs serialize
+ADVISORY_LOCK_ID = 7_204_115
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", String(32), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def discover() -> list:
+    """Return the migration modules in version order."""
+    names = sorted(m.name for m in pkgutil.iter_modules(migrations.__path__) if m.name[:4].isdigit())
+    return [importlib.import_module(f"{migrations.__name__}.{name}") for name in names]
+
+
+def _version(module) -> str:
+    return module.__name__.rsplit(".", 1)[-1].split("_", 1)[0]
+
+
+def applied_versions(conn: Connection) -> set:
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _lock(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+
+def _unlock(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+
+def upgrade(engine: Engine) -> list:
+    """Apply every pending migration and return the versions applied."""
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        _lock(lock_conn)
+        try:
+            done = applied_versions(lock_conn)
+            for module in discover():
+                version = _version(module)
+                if version in done:
+                    continue
+                logger.info("Applying migration %s", module.__name__)
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as conn:
+                        module.upgrade(conn)
+                        _record(conn, version)
+                else:
+                    module.upgrade(lock_conn)
+                    _record(lock_conn, version)
+                applied.append(version)
+        finally:
+            _unlock(lock_conn)
+    return applied
+
+
+def _record(conn: Connection, version: str):
+    conn.execute(schema_migrations.insert().values(version=version, applied_at=datetime.now(timezone.utc)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status"])
+    args = parser.parse_args(argv)
+
+    from common.db import engine
+
+    if args.command == "status":
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+            conn.commit()
+        for module in discover():
+            state = "applied" if _version(module) in done else "pending"
+            print(f"{module.__name__.rsplit('.', 1)[-1]}: {state}")
+        return
+
+    applied = upgrade(engine)
+    logger.info("Applied migrations: %s", applied or "none, schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
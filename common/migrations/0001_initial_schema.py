@@ -0,0 +1,57 @@
+"""Initial schema, frozen as it was created by ``Base.metadata.create_all``.
+
+Tables are created with ``checkfirst`` so databases bootstrapped by the old
+``create_all`` call on startup are adopted as-is.
+"""
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.dialects.postgresql import UUID
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("cognito_sub", String, nullable=False, unique=True),
+    Column("name", String, nullable=False),
+    Column("email", String, nullable=False, unique=True),
+    Column("role", Enum("support", "manager", "admin", name="roleenum"), nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("deactivated_at", DateTime(timezone=True), nullable=True),
+)
+
+Table(
+    "tickets", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True, index=True),
+    Column("reporter_name", String(100), nullable=False),
+    Column("reporter_email", String(320), nullable=False),
+    Column("description", String(500), nullable=False),
+    Column("status", Enum("new", "triaging", "in_progress", "in_review", "done", "closed",
+                          name="ticketstatusenum"), nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    Column("assigned_to_id", UUID(as_uuid=True), ForeignKey("users.id"), nullable=True),
+)
+
+Table(
+    "comments", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("content", String, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("ticket_id", UUID(as_uuid=True), ForeignKey("tickets.id"), nullable=False),
+    Column("user_id", UUID(as_uuid=True), ForeignKey("users.id"), nullable=False),
+)
+
+Table(
+    "ticket_import_jobs", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("created_by", UUID(as_uuid=True), nullable=False),
+    Column("s3_url", String, nullable=False),
+    Column("status", Enum("PENDING", "PROCESSING", "COMPLETED", "FAILED", name="jobstatusenum"), nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    Column("processed_at", DateTime(timezone=True), nullable=True),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
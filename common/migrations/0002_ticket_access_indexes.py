@@ -0,0 +1,27 @@
+"""Composite indexes for the ticket listing and comment listing access paths.
+
+``list_tickets`` orders by ``(created_at, id)`` and optionally filters by
+``assigned_to_id`` and/or ``status``; comments are listed per ticket in
+creation order. ``ix_tickets_id`` duplicated the primary key and is dropped.
+Indexes are built ``CONCURRENTLY`` so writes keep flowing on large tables.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_created_at_id "
+    "ON tickets (created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_assigned_status_created_at "
+    "ON tickets (assigned_to_id, status, created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_status_created_at "
+    "ON tickets (status, created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_comments_ticket_id_created_at "
+    "ON comments (ticket_id, created_at)",
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_tickets_id",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,12 @@
+"""Record how many rows an import job loaded and its throughput in rows/sec."""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS rows_imported INTEGER",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS rows_per_second DOUBLE PRECISION",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,6 @@
+"""Count worker deliveries per import job, so retries are bounded and completed jobs are skipped."""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0"))
@@ -0,0 +1,13 @@
+"""Checkpoint and progress counters for chunked, resumable import jobs."""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS rows_processed INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS bytes_processed BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS bytes_total BIGINT",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
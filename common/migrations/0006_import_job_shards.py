@@ -0,0 +1,17 @@
+"""Parent/child import jobs for byte-range sharding of large import files."""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS parent_id INTEGER "
+    "REFERENCES ticket_import_jobs (id)",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS shards INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS range_start BIGINT",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS range_end BIGINT",
+    # The table is small and only written by the API and worker, so a plain build is fine
+    "CREATE INDEX IF NOT EXISTS ix_ticket_import_jobs_parent_id ON ticket_import_jobs (parent_id)",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,27 @@
+"""Idempotency-Key store for ticket creation and content hashes for import de-duplication.
+
+Imported tickets carry a SHA-256 of their content; the unique index lets the
+import merge skip rows that are already present. Tickets created through the
+API leave it NULL. The index is built ``CONCURRENTLY`` because ``tickets`` is
+large.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+    "key BYTEA PRIMARY KEY, "
+    "request_hash BYTEA NOT NULL, "
+    "response TEXT NOT NULL, "
+    "created_at TIMESTAMP WITH TIME ZONE NOT NULL, "
+    "expires_at TIMESTAMP WITH TIME ZONE NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)",
+    "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_tickets_content_hash ON tickets (content_hash)",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,28 @@
+"""Ticket counters per (status, assignee) for ``GET /tickets/stats``, backfilled from ``tickets``.
+
+The backfill locks ``tickets`` against writes until the migration commits,
+so no ticket is counted twice or missed. From then on the API and the worker
+keep the counters up to date.
+"""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS ticket_counters ("
+    "status ticketstatusenum NOT NULL, "
+    "assigned_to_id UUID NOT NULL, "
+    "slot INTEGER NOT NULL, "
+    "tickets BIGINT NOT NULL DEFAULT 0, "
+    "created_at_sum BIGINT NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (status, assigned_to_id, slot))",
+    "LOCK TABLE tickets IN SHARE MODE",
+    "INSERT INTO ticket_counters (status, assigned_to_id, slot, tickets, created_at_sum) "
+    "SELECT status, COALESCE(assigned_to_id, 'ffffffff-ffff-ffff-ffff-ffffffffffff'), 0, "
+    "count(*), COALESCE(sum(floor(extract(epoch FROM created_at))), 0) "
+    "FROM tickets GROUP BY 1, 2 "
+    "ON CONFLICT DO NOTHING",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
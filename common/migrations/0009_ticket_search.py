@@ -0,0 +1,30 @@
+"""Full-text search over tickets for ``GET /tickets/search``.
+
+``search_vector`` is a stored generated column over ``reporter_name`` (weight
+A) and ``description`` (weight B), parsed with the English configuration that
+searches use, with a GIN index. ``reporter_email`` gets a trigram index so
+substring matches on it do not scan the table. Adding the generated column
+rewrites ``tickets`` under an exclusive lock, so run this in a quiet window on
+large tables; the indexes are built ``CONCURRENTLY``.
+
+The column and indexes are PostgreSQL-only and are not mapped on ``Ticket``;
+``app.services.ticket_search`` refers to them by name.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english'::regconfig, coalesce(reporter_name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_search_vector ON tickets USING gin (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_reporter_email_trgm "
+    "ON tickets USING gin (reporter_email gin_trgm_ops)",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,12 @@
+"""Counts and first errors of the invalid rows an import job skipped."""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS rows_rejected INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE ticket_import_jobs ADD COLUMN IF NOT EXISTS row_errors JSON",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,17 @@
+"""``QUEUED`` import job status, for presigned uploads that have been submitted.
+
+``ALTER TYPE ... ADD VALUE`` cannot run inside a transaction block before
+PostgreSQL 12, so this migration runs outside one.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "ALTER TYPE jobstatusenum ADD VALUE IF NOT EXISTS 'QUEUED' AFTER 'PENDING'",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
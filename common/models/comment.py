@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from common.db import Base 
@@ -9,6 +9,9 @@ from common.db import Base
 class Comment(Base):
     """Model for comments on tickets."""
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_ticket_id_created_at", "ticket_id", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content = Column(String, nullable=False)
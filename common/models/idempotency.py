@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Index, LargeBinary, Text
+from common.db import Base
+
+
+class IdempotencyKey(Base):
+    """Response stored for an ``Idempotency-Key``, replayed to retries until it expires.
+
+    Keys are stored as a SHA-256 digest of the endpoint scope and the client's
+    key, so rows stay small whatever the client sends.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    key = Column(LargeBinary(32), primary_key=True)
+    # Digest of the request body; reusing a key for a different request is rejected
+    request_hash = Column(LargeBinary(32), nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, Enum,  ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, Enum,  ForeignKey, Integer, Index, Float, BigInteger, JSON, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from common.db import Base
@@ -10,8 +10,17 @@ from common import enums
 class Ticket(Base):
     """Model for support tickets."""
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), optionally narrowed by assignee and/or status
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_assigned_status_created_at", "assigned_to_id", "status", "created_at", "id"),
+        Index("ix_tickets_status_created_at", "status", "created_at", "id"),
+        Index("ux_tickets_content_hash", "content_hash", unique=True),
+        # PostgreSQL also has search_vector with its GIN index and a trigram index on reporter_email
+        # (migration 0009); they are left unmapped so the model still works on SQLite
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     reporter_name = Column(String(100), nullable=False)
     reporter_email = Column(String(320), nullable=False)
     description = Column(String(500), nullable=False)
@@ -20,6 +29,8 @@ class Ticket(Base):
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
                     onupdate=lambda: datetime.now(timezone.utc), nullable=False)
     assigned_to_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True)
+    # SHA-256 of an imported row, so re-imported rows are skipped; NULL for tickets created via the API
+    content_hash = Column(String(64), nullable=True)
 
     assigned_user = relationship('User', back_populates='tickets')
     comments = relationship('Comment', back_populates='tickets', cascade='all, delete-orphan')
@@ -28,6 +39,9 @@ class Ticket(Base):
 class TicketImportJob(Base):
     """Model for ticket import jobs."""
     __tablename__ = "ticket_import_jobs"
+    __table_args__ = (
+        Index("ix_ticket_import_jobs_parent_id", "parent_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     created_by = Column(UUID(as_uuid=True), nullable=False)
@@ -37,3 +51,37 @@ class TicketImportJob(Base):
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
                     onupdate=lambda: datetime.now(timezone.utc), nullable=False)
     processed_at = Column(DateTime(timezone=True), default=None, nullable=True)
+    # Deliveries claimed by the worker, counted across SQS retries
+    attempts = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    # Checkpoint: rows committed so far (also the record offset to resume from) and bytes read
+    rows_processed = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    bytes_processed = Column(BigInteger, default=0, server_default=text("0"), nullable=False)
+    bytes_total = Column(BigInteger, nullable=True)
+    # Sharded imports: the parent counts its children, each child imports bytes [range_start, range_end)
+    parent_id = Column(Integer, ForeignKey('ticket_import_jobs.id'), nullable=True)
+    shards = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    range_start = Column(BigInteger, nullable=True)
+    range_end = Column(BigInteger, nullable=True)
+    # Invalid rows skipped, and the first IMPORT_MAX_ROW_ERRORS of them as {"row": index, "error": message}
+    rows_rejected = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    row_errors = Column(JSON, nullable=True)
+    # Load throughput, recorded when the job completes
+    rows_imported = Column(Integer, nullable=True)
+    rows_per_second = Column(Float, nullable=True)
+
+
+class TicketCounter(Base):
+    """Ticket counts per (status, assignee), maintained incrementally for ``GET /tickets/stats``.
+
+    Each pair is spread over ``TICKET_STATS_SLOTS`` rows so concurrent writers
+    rarely wait on the same row; readers sum the slots. Unassigned tickets use
+    the max UUID, since a NULL could not be part of the primary key.
+    """
+    __tablename__ = "ticket_counters"
+
+    status = Column(Enum(enums.TicketStatusEnum), primary_key=True)
+    assigned_to_id = Column(UUID(as_uuid=True), primary_key=True)
+    slot = Column(Integer, primary_key=True)
+    tickets = Column(BigInteger, default=0, server_default=text("0"), nullable=False)
+    # Sum of the tickets' created_at as epoch seconds, for the mean backlog age
+    created_at_sum = Column(BigInteger, default=0, server_default=text("0"), nullable=False)
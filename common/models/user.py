@@ -4,7 +4,7 @@ from sqlalchemy import Column, String, DateTime, Enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from common.db import Base
-from app.schemas.user import RoleEnum
+from common.enums import RoleEnum
 
 
 class User(Base):
@@ -0,0 +1,113 @@
+"""Connection pool configuration and checkout-wait metrics.
+
+The pool mode comes from ``DB_POOL_MODE``: ``bounded`` keeps a small
+``QueuePool`` with pre-ping and recycling, ``null`` opens a connection per
+session for setups where RDS Proxy or pgbouncer does the pooling.
+
+Bounded pools time every checkout, so the time requests spend waiting for a
+free connection can be read from ``pool_stats`` (and ``GET /metrics``) when
+sizing the pool.
+"""
+import threading
+import time
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from common.config import (DB_POOL_MODE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+                           DB_POOL_RECYCLE, DB_POOL_PRE_PING)
+
+class PoolStats:
+    """Process-wide counters for connection checkouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.waited = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, waited: bool, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if waited:
+                self.waited += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "waited": self.waited,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_seconds_total * 1000, 3),
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / attempts, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class _TimedCheckout:
+    """QueuePool mixin that times each checkout.
+
+    A checkout counts as waited when the pool had no idle connection and no
+    overflow left, so it had to block until another session returned one.
+    """
+
+    def _do_get(self):
+        saturated = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, waited=True, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start, waited=saturated)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine for the configured pool mode."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite picks its own single-connection pools
+        return {}
+    if DB_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+    if DB_POOL_MODE != "bounded":
+        raise ValueError(f"Unknown DB_POOL_MODE: {DB_POOL_MODE}")
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def describe_pool(pool) -> dict:
+    """Current occupancy of a pool, where the pool class reports it."""
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow(),
+                      idle=pool.checkedin())
+    return status
@@ -0,0 +1,105 @@
+"""Per-request breakdown of where the time goes: SQL, serialization and the rest.
+
+``track()`` starts a ``RequestTiming`` for the current context (the API
+middleware opens one per request). Engines set up with ``instrument_engine``
+add every statement's duration and row count to it, and ``serialization()``
+times the JSON encoding of a response. Sync sessions run in the threadpool and
+async ones through the greenlet bridge, and both inherit the request's context,
+so the hooks find the right request. Outside a tracked request (the worker,
+migrations) the hooks only do one context lookup.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestTiming:
+    """Counters for one request; durations are in seconds."""
+
+    __slots__ = ("started", "sql_count", "sql_seconds", "rows", "serialize_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.serialize_seconds = 0.0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """A ``Server-Timing`` header value; ``app`` is whatever is neither SQL nor serialization."""
+        total = self.elapsed()
+        app = max(total - self.sql_seconds - self.serialize_seconds, 0.0)
+        return (f'db;dur={self.sql_seconds * 1000:.2f};desc="queries={self.sql_count} rows={self.rows}", '
+                f"serialize;dur={self.serialize_seconds * 1000:.2f}, "
+                f"app;dur={app * 1000:.2f}, total;dur={total * 1000:.2f}")
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.elapsed() * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "rows": self.rows,
+            "serialize_ms": round(self.serialize_seconds * 1000, 2),
+        }
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+@contextmanager
+def track() -> Iterator[RequestTiming]:
+    """Collect timings for the code run in this context until the block exits."""
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def serialization() -> Iterator[None]:
+    """Count the time spent in the block as response serialization."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serialize_seconds += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._timing_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_timing_start", None)
+    timing = _current.get()
+    if start is None or timing is None:
+        return
+    timing.sql_count += 1
+    timing.sql_seconds += time.perf_counter() - start
+    # Rows returned or affected as the driver reports them; psycopg2 and asyncpg buffer
+    # SELECT results and count them, SQLite reports -1 for a SELECT
+    timing.rows += max(cursor.rowcount, 0)
+
+
+def instrument_engine(engine: Engine):
+    """Report the engine's statements to the current request's timing (sync engines; pass ``.sync_engine`` for async)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
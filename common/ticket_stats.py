@@ -0,0 +1,163 @@
+"""Incrementally maintained ticket counters behind ``GET /tickets/stats``.
+
+Every write that creates a ticket or changes its status or assignee applies
+a delta to ``ticket_counters`` in the same transaction, so the counters are
+exact and reading them costs the same whatever the size of ``tickets``.
+Deltas are upserted in key order, which keeps concurrent writers from
+deadlocking on each other's rows.
+
+``python -m common.ticket_stats rebuild`` recomputes the table from
+``tickets`` under a lock, e.g. after a manual data fix.
+"""
+import argparse
+import random
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from common.config import TICKET_STATS_SLOTS
+from common.enums import TicketStatusEnum
+from common.models.ticket import Ticket, TicketCounter
+
+# Not the nil UUID: SQLite's numeric affinity would read its all-digit hex back as 0
+UNASSIGNED = uuid.UUID("ffffffff-ffff-ffff-ffff-ffffffffffff")
+OPEN_STATUSES = (TicketStatusEnum.new, TicketStatusEnum.triaging, TicketStatusEnum.in_progress,
+                 TicketStatusEnum.in_review)
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# (status, assigned_to_id) -> [tickets, created_at_sum]
+Deltas = Dict[Tuple[TicketStatusEnum, uuid.UUID], list]
+
+
+def epoch(value: datetime) -> int:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def new_deltas() -> Deltas:
+    return defaultdict(lambda: [0, 0])
+
+
+def add(deltas: Deltas, status: TicketStatusEnum, assigned_to_id: Optional[uuid.UUID], created_at: datetime,
+        tickets: int = 1, created_at_sum: Optional[int] = None):
+    """Count ``tickets`` tickets (negative to remove them) under a status and assignee."""
+    delta = deltas[(status, assigned_to_id or UNASSIGNED)]
+    delta[0] += tickets
+    delta[1] += epoch(created_at) * tickets if created_at_sum is None else created_at_sum
+
+
+def apply(db: Session, deltas: Deltas):
+    """Upsert the non-zero deltas into ``ticket_counters`` in the caller's transaction."""
+    rows = [{"status": status, "assigned_to_id": assigned_to_id, "slot": random.randrange(TICKET_STATS_SLOTS),
+             "tickets": tickets, "created_at_sum": created_at_sum}
+            for (status, assigned_to_id), (tickets, created_at_sum) in deltas.items()
+            if tickets or created_at_sum]
+    upsert = UPSERTS.get(db.get_bind().dialect.name)
+    if not rows or upsert is None:
+        # Counters are kept on PostgreSQL and SQLite, the databases the service runs on
+        return
+    rows.sort(key=lambda row: (row["status"].name, str(row["assigned_to_id"]), row["slot"]))
+    insert = upsert(TicketCounter)
+    db.execute(insert.values(rows).on_conflict_do_update(
+        index_elements=["status", "assigned_to_id", "slot"],
+        set_={"tickets": TicketCounter.tickets + insert.excluded.tickets,
+              "created_at_sum": TicketCounter.created_at_sum + insert.excluded.created_at_sum}))
+
+
+def ticket_created(db: Session, tickets: Iterable[Ticket]):
+    deltas = new_deltas()
+    for ticket in tickets:
+        add(deltas, ticket.status, ticket.assigned_to_id, ticket.created_at)
+    apply(db, deltas)
+
+
+def ticket_changed(db: Session, ticket: Ticket, old_status: TicketStatusEnum, old_assigned_to_id: Optional[uuid.UUID]):
+    """Move a ticket from its old status/assignee to its current ones."""
+    if (old_status, old_assigned_to_id) == (ticket.status, ticket.assigned_to_id):
+        return
+    deltas = new_deltas()
+    add(deltas, old_status, old_assigned_to_id, ticket.created_at, -1)
+    add(deltas, ticket.status, ticket.assigned_to_id, ticket.created_at)
+    apply(db, deltas)
+
+
+def read(db: Session) -> dict:
+    """Counts by status and assignee plus backlog age, from the counters and one index lookup per open status."""
+    now = datetime.now(timezone.utc)
+    rows = db.execute(
+        select(TicketCounter.status, TicketCounter.assigned_to_id,
+               func.sum(TicketCounter.tickets), func.sum(TicketCounter.created_at_sum))
+        .group_by(TicketCounter.status, TicketCounter.assigned_to_id)
+    ).all()
+    by_status = {status.value: 0 for status in TicketStatusEnum}
+    by_assignee = defaultdict(lambda: {"tickets": 0, "open": 0})
+    open_tickets, open_created_at_sum = 0, 0
+    for status, assigned_to_id, tickets, created_at_sum in rows:
+        tickets, created_at_sum = int(tickets or 0), int(created_at_sum or 0)
+        if not tickets:
+            continue
+        by_status[status.value] += tickets
+        assignee = by_assignee[None if assigned_to_id == UNASSIGNED else assigned_to_id]
+        assignee["tickets"] += tickets
+        if status in OPEN_STATUSES:
+            assignee["open"] += tickets
+            open_tickets += tickets
+            open_created_at_sum += created_at_sum
+
+    # ix_tickets_status_created_at answers each min() with a single index probe
+    oldest = [value for value in db.execute(select(*[
+        select(func.min(Ticket.created_at)).where(Ticket.status == status).scalar_subquery()
+        for status in OPEN_STATUSES])).one() if value is not None]
+    oldest_created_at = min(oldest, key=epoch) if oldest else None
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_assignee": [{"assigned_to_id": assigned_to_id, **counts}
+                        for assigned_to_id, counts in by_assignee.items()],
+        "backlog": {
+            "open": open_tickets,
+            "oldest_created_at": oldest_created_at,
+            "oldest_age_seconds": now.timestamp() - epoch(oldest_created_at) if oldest_created_at else None,
+            "mean_age_seconds": round(now.timestamp() - open_created_at_sum / open_tickets, 1)
+            if open_tickets else None,
+        },
+    }
+
+
+def rebuild(db: Session):
+    """Recompute the counters from ``tickets``; writers are blocked until the caller commits."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE tickets IN SHARE MODE"))
+    db.execute(delete(TicketCounter))
+    deltas = new_deltas()
+    for status, assigned_to_id, tickets, created_at_sum in db.execute(
+            select(Ticket.status, Ticket.assigned_to_id, func.count(), func.sum(_epoch_sql(db)))
+            .group_by(Ticket.status, Ticket.assigned_to_id)):
+        add(deltas, status, assigned_to_id, None, tickets, int(created_at_sum or 0))
+    apply(db, deltas)
+
+
+def _epoch_sql(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%s", Ticket.created_at)
+    return func.floor(func.extract("epoch", Ticket.created_at))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the ticket counters behind GET /tickets/stats")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+    from common.db import SessionLocal
+    from common.models import comment, user  # noqa: F401 - register mappers on Base
+    with SessionLocal() as db:
+        rebuild(db)
+        db.commit()
+
+
+if __name__ == "__main__":
+    main()
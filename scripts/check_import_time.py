@@ -0,0 +1,72 @@
+"""Check the cold-start import time of the Lambda entry points against a budget.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+and the cumulative time of the module itself is compared to its budget. The
+best of ``--runs`` attempts is kept to smooth out noisy CI machines.
+
+``DATABASE_URL`` points at a closed port during the check, so an import path
+that tries to reach the database fails loudly instead of passing slowly.
+
+Usage::
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py app.main=1200 --runs 5
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative import time budgets in milliseconds
+BUDGETS_MS = {
+    "app.main": 1500,
+    "worker.lambda_handler": 1000,
+}
+
+UNREACHABLE_DATABASE_URL = "postgresql://import-check@127.0.0.1:1/import_check"
+
+
+def measure(module: str) -> float:
+    """Import ``module`` in a fresh interpreter and return its cumulative import time in ms."""
+    env = dict(os.environ, DATABASE_URL=UNREACHABLE_DATABASE_URL, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    pattern = re.compile(rf"^import time:\s+\d+ \|\s+(\d+) \| {re.escape(module)}$")
+    for line in result.stderr.splitlines():
+        match = pattern.match(line)
+        if match:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("budgets", nargs="*", help="module=budget_ms overrides")
+    parser.add_argument("--runs", type=int, default=3, help="attempts per module, best one is kept")
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.budgets:
+        module, budget = item.split("=", 1)
+        budgets[module] = float(budget)
+
+    failed = False
+    for module, budget in budgets.items():
+        elapsed = min(measure(module) for _ in range(args.runs))
+        verdict = "ok" if elapsed <= budget else "OVER BUDGET"
+        failed |= elapsed > budget
+        print(f"{module}: {elapsed:.0f} ms (budget {budget:.0f} ms) {verdict}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import asyncio
+from common.aws import AWSClients
+
+
+def test_sync_clients_are_built_once():
+    clients = AWSClients()
+    assert clients.client("sqs") is clients.client("sqs")
+    assert clients.client("sqs") is not clients.client("sqs", region_name="eu-west-1")
+
+
+def test_async_clients_are_shared_on_a_loop_and_closed():
+    clients = AWSClients()
+
+    async def scenario():
+        first, second = await asyncio.gather(clients.async_client("s3"), clients.async_client("s3"))
+        assert first is second
+        assert await clients.async_client("s3") is first
+        await clients.aclose()
+        return first
+
+    closed = asyncio.run(scenario())
+    assert clients._async_clients == {}
+
+    # A new event loop gets its own client instead of the closed one
+    async def reopen():
+        client = await clients.async_client("s3")
+        await clients.aclose()
+        return client
+
+    assert asyncio.run(reopen()) is not closed
@@ -0,0 +1,70 @@
+import time
+from common.cache import MemoryCache, RedisCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (b"1", b"3")
+    stats = cache.stats.snapshot()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+    assert stats["hit_ratio"] == 0.75
+    assert cache.describe()["size"] == 2
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache(max_entries=10, ttl=0.01)
+    cache.set("a", b"1")
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.describe()["size"] == 0
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values, self.expiry, self.down = {}, {}, False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis unavailable")
+
+    def get(self, key):
+        self._check()
+        return self.values.get(key)
+
+    def set(self, key, value, px=None):
+        self._check()
+        self.values[key], self.expiry[key] = value, px
+
+    def delete(self, key):
+        self._check()
+        self.values.pop(key, None)
+
+
+def test_redis_cache_prefixes_keys_and_sets_ttl():
+    client = FakeRedis()
+    cache = RedisCache(client, ttl=30)
+    cache.set("ticket:1", b"{}")
+
+    assert client.expiry == {"support-api:ticket:1": 30000}
+    assert cache.get("ticket:1") == b"{}"
+    cache.delete("ticket:1")
+    assert cache.get("ticket:1") is None
+    assert cache.stats.snapshot()["hits"] == 1
+
+
+def test_redis_outage_is_a_miss():
+    client = FakeRedis()
+    client.down = True
+    cache = RedisCache(client, ttl=30)
+    cache.set("ticket:1", b"{}")
+
+    assert cache.get("ticket:1") is None
+    stats = cache.stats.snapshot()
+    assert (stats["misses"], stats["errors"]) == (1, 2)
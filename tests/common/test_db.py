@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from common.db import Base, run_in_session
+from common.models.user import User
+
+
+def count_users(db):
+    return db.query(User).count()
+
+
+def test_run_in_session_with_sync_session(db_session):
+    db_session.add(User(cognito_sub="sub-1", name="Agent", email="agent@example.com"))
+    db_session.commit()
+
+    assert asyncio.run(run_in_session(db_session, count_users)) == 1
+
+
+def test_run_in_session_with_async_session():
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine)() as db:
+            db.add(User(cognito_sub="sub-1", name="Agent", email="agent@example.com"))
+            await db.commit()
+            # Sync ORM code runs unchanged through the greenlet bridge
+            count = await run_in_session(db, count_users)
+            assert (await db.execute(text("select count(*) from users"))).scalar() == count
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,81 @@
+import io
+import json
+import logging
+import sys
+import threading
+from common import logger as logger_module
+from common.logger import HOT_PATH, ContextFilter, JsonFormatter, LazyQueueHandler, correlation_id, flush_logs, logger
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    return logger.makeRecord(logger.name, level, __file__, 1, msg, args, None, extra=extra)
+
+
+def test_lines_are_json_with_correlation_id_and_extra_fields():
+    token = correlation_id.set("req-1")
+    try:
+        record = make_record("Loaded %s tickets", 5, job_id=7)
+        assert ContextFilter().filter(record)
+    finally:
+        correlation_id.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Loaded 5 tickets"
+    assert entry["level"] == "INFO"
+    assert entry["correlation_id"] == "req-1"
+    assert entry["job_id"] == 7
+
+
+def test_messages_are_formatted_by_the_listener_not_the_caller():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logger.makeRecord(logger.name, logging.ERROR, __file__, 1, "Job %s failed", (3,), None)
+        record.exc_info = sys.exc_info()
+        prepared = LazyQueueHandler(None).prepare(record)
+
+    # msg % args is left for later; the traceback is rendered now, while its frames exist
+    assert (prepared.msg, prepared.args) == ("Job %s failed", (3,))
+    assert prepared.exc_info is None and "ValueError: boom" in prepared.exc_text
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(prepared))["exception"]
+
+
+def test_hot_path_info_lines_are_sampled(monkeypatch):
+    monkeypatch.setattr(logger_module, "LOG_SAMPLE_RATE", 0.0)
+    context = ContextFilter()
+
+    assert not context.filter(make_record("request_timing", **HOT_PATH))
+    assert context.filter(make_record("request failed", level=logging.WARNING, **HOT_PATH))
+    assert context.filter(make_record("Job 1 completed"))
+
+
+def test_lines_are_written_off_the_calling_thread():
+    written_by = []
+
+    class Recording(io.StringIO):
+        def write(self, text):
+            written_by.append(threading.current_thread())
+            return super().write(text)
+
+    stream = Recording()
+    previous = logger_module._stream_handler.setStream(stream)
+    try:
+        logger.info("Queued import job %s", 12)
+        flush_logs()
+    finally:
+        logger_module._stream_handler.setStream(previous)
+
+    assert json.loads(stream.getvalue())["message"] == "Queued import job 12"
+    assert threading.current_thread() not in written_by
+
+
+def test_requests_get_a_correlation_id(client, app_logs):
+    response = client.get("/", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123"
+    record = next(record for record in app_logs.records if record.getMessage() == "request_timing")
+    assert record.correlation_id == "abc-123"
+
+    # Ids that could smuggle content into the logs are replaced
+    response = client.get("/", headers={"X-Request-ID": 'a" b'})
+    assert response.headers["x-request-id"] != 'a" b'
+    assert len(response.headers["x-request-id"]) == 32
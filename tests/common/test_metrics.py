@@ -0,0 +1,97 @@
+import json
+from unittest.mock import patch
+import pytest
+from common import metrics
+from common.metrics import Registry
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.register_collector(lambda: [("pool_idle", "gauge", "Idle connections", [({}, 3)])])
+
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a\\"b"} 3' in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+    assert "pool_idle 3" in lines
+
+
+def test_metrics_are_declared_once():
+    registry = Registry()
+    assert registry.counter("jobs_total", "Jobs", ("outcome",)) is registry.counter("jobs_total", "Jobs", ("outcome",))
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total", "Jobs", ("outcome",))
+    with pytest.raises(ValueError):
+        registry.counter("jobs_total", "Jobs", ("outcome",)).inc(status="done")
+
+
+def test_emf_reports_each_invocation_once(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_EMF", True)
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", ("route",))
+    registry.register_collector(lambda: [("pool_idle", "gauge", "Idle connections", [({}, 1)]),
+                                         ("pool_checkouts_total", "counter", "Checkouts", [({}, 9)])])
+
+    requests.inc(route="/tickets/")
+    for _ in range(150):
+        latency.observe(0.01, route="/tickets/")
+
+    with patch.object(metrics.emf_logger, "info") as emit:
+        registry.flush_emf("api")
+    documents = [json.loads(call.args[0]) for call in emit.call_args_list]
+
+    by_route = [doc for doc in documents if doc.get("route") == "/tickets/"]
+    # CloudWatch takes at most 100 values per metric, so the histogram spans two documents
+    assert [len(doc["latency_seconds"]) for doc in by_route] == [100, 50]
+    assert by_route[0]["requests_total"] == 1 and "requests_total" not in by_route[1]
+    directive = by_route[0]["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Dimensions"] == [["service", "route"]]
+    assert {"Name": "latency_seconds", "Unit": "Seconds"} in directive["Metrics"]
+    # Collected gauges are reported, collected counters are process totals and are not
+    unlabelled = next(doc for doc in documents if "route" not in doc)
+    assert unlabelled["pool_idle"] == 1 and "pool_checkouts_total" not in unlabelled
+
+    # The next invocation starts from zero
+    assert all("route" not in doc for doc in registry.emf_documents("api"))
+
+
+def test_emf_is_not_buffered_when_off():
+    registry = Registry()
+    registry.counter("requests_total", "Requests").inc()
+    assert registry.emf_documents("api") == []
+
+
+def test_metrics_route_reports_requests_by_route_template(client, monkeypatch):
+    monkeypatch.setattr("app.main.METRICS_ENDPOINT", True)
+    client.get("/")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in body
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert "/no-such-path" not in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/"}' in body
+
+
+def test_metrics_route_is_off_by_default_and_health_is_bare(client):
+    assert client.get("/metrics").status_code == 404
+    for path in ("/health/db", "/health/cache"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
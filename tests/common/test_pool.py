@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+from common import pool
+from common.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, engine_options, pool_stats
+
+
+def test_engine_options_bounded(monkeypatch):
+    monkeypatch.setattr(pool, "DB_POOL_MODE", "bounded")
+    monkeypatch.setattr(pool, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(pool, "DB_MAX_OVERFLOW", 0)
+
+    options = engine_options("postgresql://u:p@db/tickets")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (1, 0)
+    assert options["pool_pre_ping"] is True
+    assert engine_options("postgresql+asyncpg://u:p@db/tickets", is_async=True)["poolclass"] \
+        is InstrumentedAsyncQueuePool
+
+
+def test_engine_options_null_and_sqlite(monkeypatch):
+    monkeypatch.setattr(pool, "DB_POOL_MODE", "null")
+    assert engine_options("postgresql://u:p@proxy/tickets") == {"poolclass": NullPool}
+    assert engine_options("sqlite://") == {}
+
+    monkeypatch.setattr(pool, "DB_POOL_MODE", "huge")
+    with pytest.raises(ValueError):
+        engine_options("postgresql://u:p@db/tickets")
+
+
+def test_checkout_wait_is_recorded(tmp_path):
+    pool_stats.reset()
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        # The only connection is checked out, so a second checkout waits and times out
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    engine.dispose()
+
+    stats = pool_stats.snapshot()
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["waited"] == 1
+    assert stats["wait_ms_max"] >= 50
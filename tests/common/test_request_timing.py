@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app import middleware
+from app.dependencies.get_user import get_current_user
+from app.main import app
+from common import request_timing
+from common.db import get_db
+
+
+def test_statements_are_counted_only_inside_a_request():
+    engine = create_engine("sqlite://")
+    request_timing.instrument_engine(engine)
+    request_timing.instrument_engine(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        with request_timing.track() as timing:
+            conn.execute(text("create table t (x integer)"))
+            conn.execute(text("insert into t values (1), (2)"))
+            with request_timing.serialization():
+                pass
+
+    # Listening twice does not double count, and the statement outside track() is ignored
+    assert timing.sql_count == 2
+    assert timing.rows == 2
+    assert timing.sql_seconds > 0
+    assert timing.serialize_seconds > 0
+    assert request_timing.current() is None
+
+
+def test_responses_carry_server_timing_and_a_log_line(db_session, mock_current_user_admin, app_logs):
+    # The test session has its own engine, set up like the application's
+    request_timing.instrument_engine(db_session.get_bind())
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: mock_current_user_admin
+    client = TestClient(app)
+
+    response = client.get("/tickets/")
+    app.dependency_overrides = {}
+
+    assert response.status_code == 200
+    metrics = {part.split(";")[0].strip(): part for part in response.headers["server-timing"].split(",")}
+    assert set(metrics) == {"db", "serialize", "app", "total"}
+    assert 'desc="queries=1 rows=' in metrics["db"]
+
+    record = next(record for record in app_logs.records if record.getMessage() == "request_timing")
+    assert record.route == "/tickets/"
+    assert record.status == 200
+    assert record.sql_count == 1
+
+
+def test_server_timing_header_can_be_turned_off(client, monkeypatch):
+    monkeypatch.setattr(middleware, "SERVER_TIMING_HEADER", False)
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
@@ -1,17 +1,41 @@
 # tests/conftest.py
+import io
 import pytest
 from datetime import datetime, timezone
 from uuid import uuid4
 from unittest.mock import MagicMock
 from fastapi.testclient import TestClient
 from fastapi import HTTPException, status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.main import app
+from common.cache import ticket_cache
 from common.enums import RoleEnum
-from common.db import get_db
+from common.logger import logger
+from common.db import Base, get_db
 from common.models.user import User
+from common.models import comment, ticket  # noqa: F401 - register mappers on Base
 from common.enums import TicketStatusEnum
 
 
+@pytest.fixture(autouse=True)
+def empty_ticket_cache():
+    """The ticket cache is process-wide; start every test with it empty."""
+    cache = ticket_cache()
+    cache.clear()
+    cache.stats.reset()
+    yield cache
+
+
+@pytest.fixture
+def app_logs(caplog):
+    """caplog for the application logger, which does not propagate to caplog's root handler."""
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
 @pytest.fixture
 def client(mock_db_session):
     app.dependency_overrides[get_db] = lambda: mock_db_session
@@ -37,8 +61,15 @@ def mock_db_session(monkeypatch):
     session.add.side_effect = add_ticket
     session.commit.return_value = None
     session.refresh.side_effect = lambda ticket: None
-    session.query.return_value.all.side_effect = lambda: tickets_store.copy()
-    session.query.return_value.filter.return_value.first.side_effect = lambda *args, **kwargs: tickets_store[0] if tickets_store else None
+    # filter/order_by/limit keep returning the same query so chains of any length resolve
+    query = session.query.return_value
+    query.filter.return_value = query
+    query.options.return_value = query
+    query.order_by.return_value = query
+    query.limit.return_value = query
+    query.with_for_update.return_value = query
+    query.all.side_effect = lambda: tickets_store.copy()
+    query.first.side_effect = lambda *args, **kwargs: tickets_store[0] if tickets_store else None
     session._tickets_store = tickets_store
 
     # Patch get_db para usar esta sesión mock
@@ -47,6 +78,33 @@ def mock_db_session(monkeypatch):
     yield session
 
 
+@pytest.fixture
+def db_session():
+    """A real session on an in-memory SQLite database, for tests that need actual SQL."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class FakeS3Body:
+    """Async S3 object body that serves its content in ``amt``-sized reads."""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    async def read(self, amt: int = -1) -> bytes:
+        return self._stream.read(amt)
+
+
+@pytest.fixture
+def s3_body():
+    """Factory for in-memory S3 bodies; moto's responses do not work with aiobotocore."""
+    return FakeS3Body
+
+
 # Fixtures for different user roles
 
 @pytest.fixture
@@ -0,0 +1,157 @@
+import time
+import pytest
+from unittest.mock import patch
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+from app.dependencies.token_verifier import CognitoTokenVerifier, JWKSCache
+
+ISSUER = "https://cognito-idp.us-east-1.amazonaws.com/us-east-1_test"
+CLIENT_ID = "test-client"
+
+
+def make_signing_key(kid: str):
+    """Returns (private PEM, public JWK) for a fresh RSA keypair."""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                            serialization.NoEncryption()).decode()
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update(kid=kid, use="sig", alg="RS256")
+    return private_pem, public_jwk
+
+
+@pytest.fixture(scope="module")
+def signing_keys():
+    return {kid: make_signing_key(kid) for kid in ("key-1", "key-2")}
+
+
+@pytest.fixture
+def jwks_server(signing_keys):
+    """A stand-in JWKS endpoint whose published keys can be changed by the test."""
+    class Server:
+        published = ["key-1"]
+        calls = 0
+
+        def fetch(self, url):
+            self.calls += 1
+            return {"keys": [signing_keys[kid][1] for kid in self.published]}
+    return Server()
+
+
+@pytest.fixture
+def verifier(jwks_server):
+    return CognitoTokenVerifier(ISSUER, CLIENT_ID, JWKSCache(f"{ISSUER}/.well-known/jwks.json",
+                                                             min_refresh_interval=0, fetch=jwks_server.fetch))
+
+
+@pytest.fixture
+def make_token(signing_keys):
+    def _make(kid="key-1", **overrides):
+        claims = {
+            "sub": "user-123",
+            "username": "support_user",
+            "cognito:groups": ["support"],
+            "iss": ISSUER,
+            "token_use": "access",
+            "client_id": CLIENT_ID,
+            "exp": int(time.time()) + 3600,
+        }
+        claims.update(overrides)
+        return jwt.encode(claims, signing_keys[kid][0], algorithm="RS256", headers={"kid": kid})
+    return _make
+
+
+def test_verify_access_token(verifier, make_token):
+    claims = verifier.verify(make_token())
+    assert claims["sub"] == "user-123"
+    assert claims["cognito:groups"] == ["support"]
+
+
+def test_verify_id_token_checks_audience(verifier, make_token):
+    token = make_token(token_use="id", aud=CLIENT_ID, client_id=None)
+    assert verifier.verify(token)["sub"] == "user-123"
+
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify(make_token(token_use="id", aud="another-client"))
+    assert exc.value.status_code == 401
+
+
+def test_claims_are_memoized_per_token(verifier, make_token):
+    token = make_token()
+    verifier.verify(token)
+
+    with patch("app.dependencies.token_verifier.jwt.decode") as decode:
+        assert verifier.verify(token)["sub"] == "user-123"
+    decode.assert_not_called()
+
+
+def test_jwks_is_fetched_once_and_refreshed_on_unknown_kid(verifier, jwks_server, make_token):
+    verifier.verify(make_token(sub="a"))
+    verifier.verify(make_token(sub="b"))
+    assert jwks_server.calls == 1
+
+    # Cognito rotates its keys: the new kid forces a single refresh
+    jwks_server.published = ["key-1", "key-2"]
+    assert verifier.verify(make_token(kid="key-2"))["sub"] == "user-123"
+    assert jwks_server.calls == 2
+
+
+def test_failed_jwks_refresh_serves_stale_keys_and_backs_off(jwks_server, make_token):
+    clock = [1000.0]
+    cache = JWKSCache(f"{ISSUER}/.well-known/jwks.json", ttl=60, min_refresh_interval=30, fetch=jwks_server.fetch)
+    verifier = CognitoTokenVerifier(ISSUER, CLIENT_ID, cache)
+    with patch("app.dependencies.token_verifier.time.monotonic", lambda: clock[0]):
+        verifier.verify(make_token())
+        assert jwks_server.calls == 1
+
+        # The TTL expires while the JWKS endpoint is down
+        def unavailable(url):
+            jwks_server.calls += 1
+            raise OSError("timed out")
+        cache._fetch = unavailable
+        clock[0] += 61
+        for sub in ("a", "b", "c"):
+            assert verifier.verify(make_token(sub=sub))["sub"] == sub
+        assert jwks_server.calls == 2
+
+        clock[0] += 29
+        verifier.verify(make_token(sub="d"))
+        assert jwks_server.calls == 2
+
+        clock[0] += 1
+        verifier.verify(make_token(sub="e"))
+        assert jwks_server.calls == 3
+
+
+@pytest.mark.parametrize("overrides, detail", [
+    ({"exp": int(time.time()) - 10}, "Unauthorized: token expired"),
+    ({"iss": "https://evil.example.com"}, "Unauthorized: invalid token"),
+    ({"client_id": "another-client"}, "Unauthorized: token issued for another client"),
+    ({"token_use": "refresh"}, "Unauthorized: invalid token use"),
+])
+def test_rejects_invalid_tokens(verifier, make_token, overrides, detail):
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify(make_token(**overrides))
+    assert exc.value.status_code == 401
+    assert exc.value.detail == detail
+
+
+def test_rejects_token_signed_by_unpublished_key(verifier, make_token):
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify(make_token(kid="key-2"))
+    assert exc.value.detail == "Unauthorized: unknown signing key"
+
+
+def test_local_auth_mode_on_routes(client, monkeypatch, verifier, make_token):
+    monkeypatch.setattr("app.dependencies.get_user.AUTH_MODE", "local")
+    monkeypatch.setattr("app.dependencies.get_user.get_token_verifier", lambda: verifier)
+
+    response = client.get("/tickets/", headers={"Authorization": f"Bearer {make_token()}"})
+    assert response.status_code == 200
+
+    response = client.get("/tickets/")
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Unauthorized: missing bearer token"}
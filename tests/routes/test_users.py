@@ -68,3 +68,13 @@ def test_get_user_by_email_unauthorized(client, user_payload):
     user_email = "test@example.com"
     response = client.get(f"/users/{user_email}")
     assert response.status_code == 403   
+
+
+def test_list_users_returns_page(client, mock_current_user_manager):
+    app.dependency_overrides[get_current_user] = lambda: mock_current_user_manager
+
+    response = client.get("/users/", params={"limit": 10})
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+    app.dependency_overrides = {}
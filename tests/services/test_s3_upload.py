@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from app.services.s3_upload import upload_stream
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.fixture
+def s3():
+    client = AsyncMock()
+    client.create_multipart_upload.return_value = {"UploadId": "up-1"}
+    client.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+    return client
+
+
+def test_small_body_is_a_single_put(s3):
+    size = asyncio.run(upload_stream(s3, "bucket", "key", _chunks(b"ab", b"cd"), "application/x-ndjson",
+                                     part_size=10))
+    assert size == 4
+    s3.put_object.assert_awaited_once_with(Bucket="bucket", Key="key", Body=b"abcd",
+                                           ContentType="application/x-ndjson")
+    s3.create_multipart_upload.assert_not_awaited()
+
+
+def test_large_body_is_uploaded_in_parts(s3):
+    size = asyncio.run(upload_stream(s3, "bucket", "key", _chunks(b"a" * 6, b"b" * 6, b"c" * 3), "text/plain",
+                                     part_size=5))
+    assert size == 15
+    parts = [call.kwargs["Body"] for call in s3.upload_part.await_args_list]
+    assert parts == [b"aaaaaa", b"bbbbbb", b"ccc"]
+    s3.complete_multipart_upload.assert_awaited_once_with(
+        Bucket="bucket", Key="key", UploadId="up-1",
+        MultipartUpload={"Parts": [{"PartNumber": n, "ETag": f"etag-{n}"} for n in (1, 2, 3)]})
+    s3.put_object.assert_not_awaited()
+
+
+def test_failed_stream_aborts_the_upload(s3):
+    async def broken():
+        yield b"a" * 6
+        raise ConnectionResetError("client went away")
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(upload_stream(s3, "bucket", "key", broken(), "text/plain", part_size=5))
+    s3.abort_multipart_upload.assert_awaited_once_with(Bucket="bucket", Key="key", UploadId="up-1")
+    s3.complete_multipart_upload.assert_not_awaited()
@@ -0,0 +1,296 @@
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import event
+from app.schemas.comment import CommentCreate
+from app.schemas.ticket import TicketAssignUser, TicketCreate, TicketRead, TicketUpdateStatus
+from app.services.comment_service import CommentService
+from app.services.ticket_service import TicketService
+from common import ticket_stats
+from common.enums import TicketStatusEnum
+from common.models.comment import Comment
+from common.models.idempotency import IdempotencyKey
+from common.models.ticket import Ticket
+from common.models.user import User
+from worker.bulk_loader import load_tickets
+
+
+@pytest.fixture
+def seeded_session(db_session):
+    """Seeds 5 tickets with 3 comments each, one second apart."""
+    author = User(cognito_sub="sub-1", name="Agent", email="agent@example.com")
+    db_session.add(author)
+    db_session.flush()
+
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(5):
+        ticket = Ticket(reporter_name=f"Reporter {i}", reporter_email=f"r{i}@example.com",
+                        description=f"Ticket {i}", created_at=base + timedelta(seconds=i))
+        ticket.comments = [Comment(content=f"Comment {j}", user_id=author.id) for j in range(3)]
+        db_session.add(ticket)
+    db_session.commit()
+    db_session.expunge_all()
+    return db_session
+
+
+@pytest.fixture
+def statements(seeded_session):
+    """Collects every SQL statement sent to the database."""
+    executed = []
+    engine = seeded_session.get_bind()
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_list_tickets_without_comments_is_a_single_query(seeded_session, statements, mock_current_user_admin):
+    page = TicketService(seeded_session).list_tickets(mock_current_user_admin)
+
+    assert len(page.items) == 5
+    assert all(ticket.comments == [] for ticket in page.items)
+    assert len(statements) == 1
+
+
+def test_list_tickets_with_comments_batches_the_load(seeded_session, statements, mock_current_user_admin):
+    page = TicketService(seeded_session).list_tickets(mock_current_user_admin, include_comments=True)
+
+    assert len(page.items) == 5
+    assert all(len(ticket.comments) == 3 for ticket in page.items)
+    # One query for the page plus one for the comments of every ticket on it
+    assert len(statements) == 2
+
+
+def test_list_tickets_walks_every_page_once(seeded_session, mock_current_user_admin):
+    service = TicketService(seeded_session)
+    seen, cursor = [], None
+    while True:
+        page = service.list_tickets(mock_current_user_admin, cursor=cursor, limit=2)
+        seen.extend(ticket.description for ticket in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [f"Ticket {i}" for i in reversed(range(5))]
+
+
+def test_create_ticket_with_idempotency_key_is_created_once(db_session):
+    service = TicketService(db_session)
+    payload = TicketCreate(reporter_name="Alice", reporter_email="alice@example.com", description="Printer down")
+
+    first = service.create_ticket(payload, idempotency_key="retry-1")
+    retry = service.create_ticket(payload, idempotency_key="retry-1")
+    other = service.create_ticket(payload, idempotency_key="retry-2")
+
+    assert retry == first
+    assert other.id != first.id
+    assert db_session.query(Ticket).count() == 2
+
+
+def test_idempotency_key_reused_for_another_request(db_session):
+    service = TicketService(db_session)
+    service.create_ticket(TicketCreate(reporter_name="Alice", reporter_email="alice@example.com",
+                                       description="Printer down"), idempotency_key="retry-1")
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.create_ticket(TicketCreate(reporter_name="Alice", reporter_email="alice@example.com",
+                                           description="Printer on fire"), idempotency_key="retry-1")
+    assert exc_info.value.status_code == 422
+
+
+def test_idempotency_keys_are_scoped_by_reporter(db_session):
+    service = TicketService(db_session)
+    alice = service.create_ticket(TicketCreate(reporter_name="Alice", reporter_email="alice@example.com",
+                                               description="Printer down"), idempotency_key="retry-1")
+    bob = service.create_ticket(TicketCreate(reporter_name="Bob", reporter_email="bob@example.com",
+                                             description="Printer on fire"), idempotency_key="retry-1")
+
+    assert bob.id != alice.id
+    assert bob.reporter_name == "Bob"
+
+
+def test_expired_idempotency_key_is_replaced(db_session, monkeypatch):
+    monkeypatch.setattr("app.services.idempotency.IDEMPOTENCY_KEY_TTL_SECONDS", -1)
+    service = TicketService(db_session)
+    payload = TicketCreate(reporter_name="Alice", reporter_email="alice@example.com", description="Printer down")
+
+    first = service.create_ticket(payload, idempotency_key="retry-1")
+    second = service.create_ticket(payload, idempotency_key="retry-1")
+
+    assert second.id != first.id
+    assert db_session.query(IdempotencyKey).count() == 1
+
+
+def test_get_ticket_json_is_read_through_the_cache(seeded_session, statements, empty_ticket_cache):
+    ticket_id = seeded_session.query(Ticket.id).first()[0]
+    statements.clear()
+    service = TicketService(seeded_session)
+
+    first = service.get_ticket_json(ticket_id)
+    queries = len(statements)
+    second = service.get_ticket_json(str(ticket_id).upper())
+
+    assert second == first
+    assert len(statements) == queries
+    assert TicketRead.model_validate_json(first[1]).id == ticket_id
+    assert empty_ticket_cache.stats.snapshot()["hits"] == 1
+
+
+def test_writes_invalidate_the_cached_ticket(seeded_session, mock_current_user_manager):
+    service = TicketService(seeded_session)
+    ticket = seeded_session.query(Ticket).first()
+    author_id = seeded_session.query(User.id).first()[0]
+    manager = {**mock_current_user_manager, "sub": str(author_id)}
+
+    def cached_ticket():
+        return TicketRead.model_validate_json(service.get_ticket_json(ticket.id)[1])
+
+    cached_ticket()
+    service.assign_ticket(manager, ticket.id, TicketAssignUser(assigned_to_id=author_id))
+    assert cached_ticket().assigned_to_id == author_id
+
+    service.update_ticket(manager, ticket.id, TicketUpdateStatus(status=TicketStatusEnum.in_progress))
+    assert cached_ticket().status == TicketStatusEnum.in_progress
+
+    CommentService(seeded_session).create_comment(CommentCreate(ticket_id=ticket.id, content="New", user_id=author_id))
+    assert len(cached_ticket().comments) == 4
+
+
+def test_unchanged_ticket_is_not_loaded_for_a_matching_etag(seeded_session, statements, empty_ticket_cache):
+    ticket_id = seeded_session.query(Ticket.id).first()[0]
+    service = TicketService(seeded_session)
+    etag, _ = service.get_ticket_json(ticket_id)
+    empty_ticket_cache.clear()
+    statements.clear()
+
+    assert service.get_ticket_json(ticket_id, if_none_match=etag) == (etag, None)
+    # Only the version query ran; the ticket and its comments were not loaded
+    assert len(statements) == 1
+    assert service.get_ticket_json(ticket_id, if_none_match=etag) == (etag, None)
+    assert service.get_ticket_json(ticket_id, if_none_match='W/"stale"')[1] is not None
+
+
+def test_comment_etag_changes_when_a_comment_is_added(seeded_session, statements):
+    ticket_id, author_id = seeded_session.query(Comment.ticket_id, Comment.user_id).first()
+    service = CommentService(seeded_session)
+    etag, comments = service.get_comments_by_ticket_json(ticket_id)
+    statements.clear()
+
+    assert len(comments) == 3
+    assert service.get_comments_by_ticket_json(ticket_id, if_none_match=etag) == (etag, None)
+    assert len(statements) == 1
+
+    service.create_comment(CommentCreate(ticket_id=ticket_id, content="New", user_id=author_id))
+    new_etag, comments = service.get_comments_by_ticket_json(ticket_id, if_none_match=etag)
+    assert new_etag != etag
+    assert len(comments) == 4
+
+
+def test_search_tickets_walks_every_match_once(seeded_session, statements, mock_current_user_admin):
+    service = TicketService(seeded_session)
+    seen, cursor = [], None
+    while True:
+        page = service.search_tickets(mock_current_user_admin, "ticket", cursor=cursor, limit=2)
+        seen.extend(ticket.description for ticket in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    # SQLite does not rank, so matches come newest first, one query per page
+    # and one on the last to check that no match was left out of the ranked window
+    assert seen == [f"Ticket {i}" for i in reversed(range(5))]
+    assert len(statements) == 4
+
+
+def test_search_tickets_pages_past_the_ranked_window(seeded_session, mock_current_user_admin, monkeypatch):
+    monkeypatch.setattr("app.services.ticket_search.TICKET_SEARCH_WINDOW", 3)
+    service = TicketService(seeded_session)
+    pages, cursor = [], None
+    while True:
+        page = service.search_tickets(mock_current_user_admin, "ticket", cursor=cursor, limit=2)
+        pages.append([ticket.description for ticket in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    # Three matches are ranked; the last of them shares a page with the first older one
+    assert pages == [["Ticket 4", "Ticket 3"], ["Ticket 2", "Ticket 1"], ["Ticket 0"]]
+    everything = service.search_tickets(mock_current_user_admin, "ticket", limit=10)
+    assert len(everything.items) == 5 and everything.next_cursor is None
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("r3@example", ["Ticket 3"]),
+    ("Reporter 1", ["Ticket 1"]),
+    ("%", []),
+    ("Ticket_", []),
+])
+def test_search_tickets_matches_reporters_and_escapes_wildcards(seeded_session, mock_current_user_admin, q, expected):
+    page = TicketService(seeded_session).search_tickets(mock_current_user_admin, q)
+
+    assert [ticket.description for ticket in page.items] == expected
+
+
+def test_list_tickets_json_matches_the_page(seeded_session, mock_current_user_admin):
+    service = TicketService(seeded_session)
+
+    payload = service.list_tickets_json(mock_current_user_admin, limit=2, include_comments=True)
+    page = service.list_tickets(mock_current_user_admin, limit=2, include_comments=True)
+
+    assert json.loads(payload) == page.model_dump(mode="json")
+
+
+def ground_truth(db):
+    by_status = {status.value: 0 for status in TicketStatusEnum}
+    for (status,) in db.query(Ticket.status):
+        by_status[status.value] += 1
+    return by_status
+
+
+def test_stats_follow_every_ticket_write(db_session, mock_current_user_manager):
+    agent = User(cognito_sub="sub-1", name="Agent", email="agent@example.com")
+    db_session.add(agent)
+    db_session.commit()
+    manager = {**mock_current_user_manager, "sub": str(agent.id)}
+    service = TicketService(db_session)
+    payload = TicketCreate(reporter_name="Alice", reporter_email="alice@example.com", description="Printer down")
+
+    first = service.create_ticket(payload)
+    service.create_ticket(payload, idempotency_key="once")
+    service.create_ticket(payload, idempotency_key="once")
+    service.assign_ticket(manager, first.id, TicketAssignUser(assigned_to_id=agent.id))
+    service.update_ticket(manager, first.id, TicketUpdateStatus(status=TicketStatusEnum.done))
+    load_tickets(db_session, [{"reporter_name": "R", "reporter_email": "r@example.com", "description": f"Import {i}",
+                               "assigned_to_id": str(agent.id) if i % 2 else None} for i in range(6)])
+    db_session.commit()
+
+    stats = service.get_stats(manager)
+    assert stats.total == 8
+    assert {status.value: count for status, count in stats.by_status.items()} == ground_truth(db_session)
+    assignees = {count.assigned_to_id: (count.tickets, count.open) for count in stats.by_assignee}
+    assert assignees == {agent.id: (4, 3), None: (4, 4)}
+    assert stats.backlog.open == 7
+    assert stats.backlog.oldest_created_at is not None
+    assert stats.backlog.mean_age_seconds >= 0
+
+    ticket_stats.rebuild(db_session)
+    db_session.commit()
+    assert service.get_stats(manager).model_dump(exclude={"backlog"}) == stats.model_dump(exclude={"backlog"})
+
+
+def test_stats_read_only_the_counters(db_session, mock_current_user_manager):
+    service = TicketService(db_session)
+    service.create_ticket(TicketCreate(reporter_name="A", reporter_email="a@example.com", description="One"))
+    executed = []
+    event.listen(db_session.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: executed.append(statement))
+
+    service.get_stats(mock_current_user_manager)
+
+    # One aggregate over ticket_counters and one index lookup for the oldest open ticket
+    assert len(executed) == 2
+    assert "ticket_counters" in executed[0]
@@ -0,0 +1,96 @@
+import asyncio
+import gzip
+import json
+import pytest
+from worker.import_stream import DecompressingBody, ImportFormatError, iter_batches, iter_rows
+
+ROWS = [{"reporter_name": f"Repórter {i}", "reporter_email": "r@example.com",
+         "description": "Ñandú, \"quoted\" [brackets] {braces}\n"} for i in range(25)]
+
+
+@pytest.fixture
+def collect(s3_body):
+    async def parse(data: bytes, chunk_size: int) -> list:
+        return [row async for row in iter_rows(s3_body(data), chunk_size)]
+    return parse
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_json_array_across_chunk_boundaries(chunk_size, collect):
+    data = json.dumps(ROWS, ensure_ascii=False, indent=2).encode()
+    assert asyncio.run(collect(data, chunk_size)) == ROWS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_ndjson(chunk_size, collect):
+    data = "\n".join(json.dumps(row, ensure_ascii=False) for row in ROWS).encode() + b"\n\n"
+    assert asyncio.run(collect(data, chunk_size)) == ROWS
+
+
+@pytest.mark.parametrize("data", [b"", b"  \n", b"[]", b" [ ] "])
+def test_empty_files(data, collect):
+    assert asyncio.run(collect(data, 4)) == []
+
+
+@pytest.mark.parametrize("data", [
+    b'[{"a": 1}, {"a": 2}',         # unterminated array
+    b'[{"a": 1} {"a": 2}]',         # missing comma
+    b'[{"a": 1}] extra',            # trailing data
+    b'[1, 2]',                      # rows must be objects
+    b'{"a": 1}\n{"a": \n',          # broken NDJSON line
+])
+def test_malformed_files(data, collect):
+    with pytest.raises(ImportFormatError):
+        asyncio.run(collect(data, 5))
+
+
+def test_iter_batches(s3_body):
+    async def scenario():
+        rows = iter_rows(s3_body(json.dumps(ROWS).encode()), 16)
+        return [len(batch) async for batch in iter_batches(rows, 10)]
+
+    assert asyncio.run(scenario()) == [10, 10, 5]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_gzip_ndjson(chunk_size, s3_body):
+    lines = [json.dumps(row, ensure_ascii=False) + "\n" for row in ROWS]
+    # Two concatenated gzip members, as produced by appending to a .gz file
+    data = gzip.compress("".join(lines[:10]).encode()) + gzip.compress("".join(lines[10:]).encode())
+
+    async def scenario():
+        return [row async for row in iter_rows(DecompressingBody(s3_body(data)), chunk_size)]
+
+    assert asyncio.run(scenario()) == ROWS
+
+
+def test_decompressing_body_bounds_each_read(s3_body):
+    data = gzip.compress(b"\n" * 100_000)
+
+    async def scenario():
+        body = DecompressingBody(s3_body(data))
+        sizes = []
+        while chunk := await body.read(4096):
+            sizes.append(len(chunk))
+        return sizes
+
+    sizes = asyncio.run(scenario())
+    assert sum(sizes) == 100_000
+    assert max(sizes) == 4096
+
+
+def test_decompressing_body_passes_plain_data_through(s3_body):
+    async def scenario():
+        return [row async for row in iter_rows(DecompressingBody(s3_body(b'{"a": 1}\n')), 1)]
+
+    assert asyncio.run(scenario()) == [{"a": 1}]
+
+
+def test_truncated_gzip(s3_body):
+    data = gzip.compress(b'{"a": 1}\n' * 100)[:-12]
+
+    async def scenario():
+        return [row async for row in iter_rows(DecompressingBody(s3_body(data)), 64)]
+
+    with pytest.raises(ImportFormatError):
+        asyncio.run(scenario())
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+import uuid
+from unittest.mock import patch
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from common.models.ticket import TicketImportJob
+from worker import lambda_handler as handler_module
+from worker.lambda_handler import lambda_handler
+
+
+def sqs_event(*job_ids):
+    return {"Records": [{"messageId": f"msg-{job_id}", "body": json.dumps({"job_id": job_id})}
+                        for job_id in job_ids]}
+
+
+class FakeJobs:
+    """Stands in for run_job, recording how many jobs overlap."""
+
+    def __init__(self, duration=0.1, failing=()):
+        self.duration = duration
+        self.failing = set(failing)
+        self.running = 0
+        self.max_running = 0
+        self.done = []
+
+    async def __call__(self, job_id):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.duration)
+            if job_id in self.failing:
+                raise RuntimeError(f"job {job_id} failed")
+            self.done.append(job_id)
+        finally:
+            self.running -= 1
+
+
+def test_batch_runs_concurrently_up_to_the_cap(monkeypatch):
+    jobs = FakeJobs(duration=0.1)
+    monkeypatch.setattr(handler_module, "WORKER_CONCURRENCY", 3)
+
+    with patch.object(handler_module, "run_job", jobs):
+        start = time.perf_counter()
+        lambda_handler(sqs_event(1, 2, 3, 4, 5, 6), None)
+        elapsed = time.perf_counter() - start
+
+    assert sorted(jobs.done) == [1, 2, 3, 4, 5, 6]
+    assert jobs.max_running == 3
+    # Two waves of three, not six jobs back to back
+    assert elapsed < 0.45
+
+
+def test_only_failed_messages_are_reported():
+    jobs = FakeJobs(duration=0, failing={2, 4})
+
+    with patch.object(handler_module, "run_job", jobs):
+        response = lambda_handler(sqs_event(1, 2, 3, 4), None)
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "msg-2"}, {"itemIdentifier": "msg-4"}]}
+    assert sorted(jobs.done) == [1, 3]
+
+
+def test_failed_job_does_not_stop_the_batch():
+    jobs = FakeJobs(duration=0, failing={2})
+
+    with patch.object(handler_module, "run_job", jobs):
+        results = asyncio.run(handler_module.process_records(sqs_event(1, 2, 3)["Records"]))
+
+    assert sorted(jobs.done) == [1, 3]
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_claimed_job_is_read_without_sql_on_the_event_loop(db_session, monkeypatch):
+    job = TicketImportJob(created_by=uuid.uuid4(), s3_url="s3://imports-bucket/tickets/1.json")
+    db_session.add(job)
+    db_session.commit()
+    engine = db_session.get_bind()
+    monkeypatch.setattr("common.db.SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    statements = []
+    seen = {}
+
+    async def process_job(self, claimed):
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        seen.update(id=claimed.id, s3_url=claimed.s3_url, parent_id=claimed.parent_id, shards=claimed.shards)
+
+    with patch.object(handler_module.WorkerService, "process_job", process_job):
+        asyncio.run(handler_module.run_job(job.id))
+
+    assert seen == {"id": job.id, "s3_url": job.s3_url, "parent_id": None, "shards": 0}
+    # The committed job is not expired, so reading it does not query the database
+    assert statements == []
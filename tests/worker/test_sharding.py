@@ -0,0 +1,44 @@
+import asyncio
+import json
+import pytest
+from worker.sharding import ShardBody, plan_shards, shard_range_header
+
+LINES = [json.dumps({"reporter_name": "R" * (i % 13), "description": f"Ticket {i}"}).encode() + b"\n"
+         for i in range(200)]
+DATA = b"".join(LINES)
+
+
+def ranged(data: bytes, header: str) -> bytes:
+    first, last = header.removeprefix("bytes=").split("-")
+    return data[int(first):int(last) + 1]
+
+
+def test_plan_shards():
+    assert plan_shards(100, 64, 16) == [(0, 50), (50, 100)]
+    assert plan_shards(1000, 10, 4) == [(0, 250), (250, 500), (500, 750), (750, 1000)]
+    assert plan_shards(64, 64, 16) == []
+
+
+@pytest.mark.parametrize("shards", [2, 3, 7, 50])
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_shards_cover_every_line_once(s3_body, shards, chunk_size):
+    async def read_shard(start, end):
+        body = ShardBody(s3_body(ranged(DATA, shard_range_header(start, end))), start, end)
+        out = b""
+        while chunk := await body.read(chunk_size):
+            out += chunk
+        return out
+
+    ranges = plan_shards(len(DATA), len(DATA) // shards + 1, shards)
+    parts = [asyncio.run(read_shard(start, end)) for start, end in ranges]
+    assert b"".join(parts) == DATA
+
+
+def test_shard_starting_on_a_line_boundary(s3_body):
+    start, end = len(LINES[0]), len(LINES[0]) + len(LINES[1])
+
+    async def read_all():
+        body = ShardBody(s3_body(ranged(DATA, shard_range_header(start, end))), start, end)
+        return await body.read(4096)
+
+    assert asyncio.run(read_all()) == LINES[1]
@@ -0,0 +1,299 @@
+import asyncio
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+import pytest
+from common.enums import JobStatusEnum
+from common.models.ticket import Ticket, TicketImportJob
+from common.models.user import User
+from worker.bulk_loader import BulkTicketLoader, batches, load_tickets
+from worker.import_stream import ImportFormatError
+from worker import worker_service
+from worker.worker_service import JobInProgressError, WorkerService
+
+
+def import_rows(count, **extra):
+    return [{"reporter_name": "Reporter", "reporter_email": "reporter@example.com",
+             "description": f"Ticket {i}", **extra} for i in range(count)]
+
+
+@pytest.fixture
+def s3_returning(s3_body):
+    def build(rows):
+        data = json.dumps(rows).encode()
+        s3 = AsyncMock()
+        s3.head_object.return_value = {"ContentLength": len(data)}
+        s3.get_object.return_value = {"Body": s3_body(data)}
+        return s3
+    return build
+
+
+def test_batches_split_rows():
+    sizes = [len(batch) for batch in batches(import_rows(7), 3)]
+    assert sizes == [3, 3, 1]
+
+
+def test_load_tickets_inserts_in_batches(db_session):
+    user = User(cognito_sub="sub-1", name="Agent", email="agent@example.com")
+    db_session.add(user)
+    db_session.commit()
+
+    loaded = load_tickets(db_session, import_rows(5) + import_rows(2, assigned_to_id=str(user.id)), batch_size=2)
+    db_session.commit()
+
+    assert loaded == 7
+    assert db_session.query(Ticket).count() == 7
+    assert db_session.query(Ticket).filter(Ticket.assigned_to_id == user.id).count() == 2
+
+
+def test_load_tickets_skips_rows_already_imported(db_session):
+    loader_rows = import_rows(5)
+    load_tickets(db_session, loader_rows[:3])
+    db_session.commit()
+
+    loader = BulkTicketLoader()
+    loader.load(db_session, loader_rows + loader_rows[:1])
+    loaded = loader.finish(db_session)
+    db_session.commit()
+
+    # Every row counts as consumed, but only the two new ones are inserted
+    assert loaded == 6
+    assert loader.duplicates == 4
+    assert db_session.query(Ticket).count() == 5
+
+
+def test_process_job_records_throughput(db_session, s3_returning):
+    job = TicketImportJob(created_by=uuid.uuid4(), s3_url="s3://imports-bucket/tickets/1.json")
+    db_session.add(job)
+    db_session.commit()
+    rows_before = worker_service.IMPORT_ROWS.value()
+    completed_before = worker_service.IMPORT_JOBS.value(outcome="completed")
+
+    with patch("worker.worker_service.aws_clients.async_client", new_callable=AsyncMock) as client:
+        client.return_value = s3_returning(import_rows(10))
+        asyncio.run(WorkerService(db=db_session).process_job(job))
+
+    db_session.refresh(job)
+    assert job.status == JobStatusEnum.COMPLETED
+    assert job.rows_imported == 10
+    assert job.rows_per_second > 0
+    assert db_session.query(Ticket).count() == 10
+    assert worker_service.IMPORT_ROWS.value() == rows_before + 10
+    assert worker_service.IMPORT_JOBS.value(outcome="completed") == completed_before + 1
+    assert worker_service.IMPORT_ROWS_PER_SECOND.value() > 0
+
+
+def test_process_job_skips_invalid_rows(db_session, s3_returning, monkeypatch):
+    monkeypatch.setattr("worker.worker_service.IMPORT_BATCH_SIZE", 2)
+    job = TicketImportJob(created_by=uuid.uuid4(), s3_url="s3://imports-bucket/tickets/1.json")
+    db_session.add(job)
+    db_session.commit()
+    valid = import_rows(3)
+    rows = [
+        valid[0],
+        {**valid[1], "reporter_name": ""},
+        {**valid[1], "reporter_email": "not-an-email"},
+        valid[1],
+        {**valid[2], "description": "x" * 900},
+        {"reporter_name": "Missing fields"},
+        {**valid[2], "assigned_to_id": "not-a-uuid"},
+        valid[2],
+    ]
+    rejected_before = worker_service.IMPORT_ROWS_REJECTED.value()
+
+    with patch("worker.worker_service.aws_clients.async_client", new_callable=AsyncMock) as client:
+        client.return_value = s3_returning(rows)
+        asyncio.run(WorkerService(db=db_session).process_job(job))
+
+    db_session.refresh(job)
+    assert job.status == JobStatusEnum.COMPLETED
+    assert (job.rows_processed, job.rows_rejected, job.rows_imported) == (8, 5, 3)
+    assert [error["row"] for error in job.row_errors] == [1, 2, 4, 5, 6]
+    assert job.row_errors[0]["error"].startswith("reporter_name:")
+    assert "x" * 900 not in json.dumps(job.row_errors)
+    assert worker_service.IMPORT_ROWS_REJECTED.value() == rejected_before + 5
+    descriptions = sorted(description for (description,) in db_session.query(Ticket.description))
+    assert descriptions == sorted(row["description"] for row in valid)
+
+
+
+def test_process_job_failure_loads_nothing(db_session, s3_returning):
+    job = TicketImportJob(created_by=uuid.uuid4(), s3_url="s3://imports-bucket/tickets/1.json")
+    db_session.add(job)
+    db_session.commit()
+    rows = import_rows(3) + ["not a ticket"]
+    failed_before = worker_service.IMPORT_JOBS.value(outcome="failed")
+
+    with patch("worker.worker_service.aws_clients.async_client", new_callable=AsyncMock) as client:
+        client.return_value = s3_returning(rows)
+        with pytest.raises(ImportFormatError):
+            asyncio.run(WorkerService(db=db_session).process_job(job))
+
+    db_session.refresh(job)
+    assert job.status == JobStatusEnum.FAILED
+    assert db_session.query(Ticket).count() == 0
+    assert worker_service.IMPORT_JOBS.value(outcome="failed") == failed_before + 1
+
+
+def add_job(db_session, **fields):
+    fields.setdefault("s3_url", "s3://imports-bucket/tickets/1.json")
+    job = TicketImportJob(created_by=uuid.uuid4(), **fields)
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+def test_claim_job_marks_processing_and_counts_attempts(db_session):
+    job = add_job(db_session, status=JobStatusEnum.FAILED, attempts=1)
+
+    claimed = WorkerService().claim_job(db_session, job.id)
+
+    assert claimed.status == JobStatusEnum.PROCESSING
+    assert claimed.attempts == 2
+
+
+def test_claim_job_skips_completed_and_missing_jobs(db_session):
+    job = add_job(db_session, status=JobStatusEnum.COMPLETED, attempts=1)
+
+    assert WorkerService().claim_job(db_session, job.id) is None
+    assert WorkerService().claim_job(db_session, 999) is None
+    db_session.refresh(job)
+    assert (job.status, job.attempts) == (JobStatusEnum.COMPLETED, 1)
+
+
+def test_claim_job_leaves_a_leased_job_alone(db_session):
+    job = add_job(db_session, status=JobStatusEnum.PROCESSING, attempts=1,
+                  updated_at=datetime.now(timezone.utc))
+
+    with pytest.raises(JobInProgressError):
+        WorkerService().claim_job(db_session, job.id)
+
+
+def test_claim_job_takes_over_an_expired_lease(db_session):
+    job = add_job(db_session, status=JobStatusEnum.PROCESSING, attempts=1,
+                  updated_at=datetime.now(timezone.utc) - timedelta(hours=1))
+
+    assert WorkerService().claim_job(db_session, job.id).attempts == 2
+
+
+def test_claim_job_gives_up_after_max_attempts(db_session, monkeypatch):
+    monkeypatch.setattr("worker.worker_service.WORKER_MAX_ATTEMPTS", 3)
+    job = add_job(db_session, status=JobStatusEnum.FAILED, attempts=3)
+
+    assert WorkerService().claim_job(db_session, job.id) is None
+    db_session.refresh(job)
+    assert job.status == JobStatusEnum.FAILED
+
+
+def test_failed_job_resumes_from_its_checkpoint(db_session, s3_returning, monkeypatch):
+    monkeypatch.setattr("worker.worker_service.IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr("worker.worker_service.IMPORT_CHECKPOINT_ROWS", 4)
+    job = add_job(db_session)
+    rows = import_rows(10)
+    broken = rows[:9] + ["not a ticket"]
+
+    with patch("worker.worker_service.aws_clients.async_client", new_callable=AsyncMock) as client:
+        client.return_value = s3_returning(broken)
+        with pytest.raises(ImportFormatError):
+            asyncio.run(WorkerService(db=db_session).process_job(job))
+
+        # Rows 0-7 were committed in two checkpoints; row 8 was rolled back with the failure
+        db_session.refresh(job)
+        assert (job.status, job.rows_processed) == (JobStatusEnum.FAILED, 8)
+        assert job.bytes_processed > 0
+        assert db_session.query(Ticket).count() == 8
+
+        client.return_value = s3_returning(rows)
+        asyncio.run(WorkerService(db=db_session).process_job(job))
+
+    db_session.refresh(job)
+    assert job.status == JobStatusEnum.COMPLETED
+    assert job.rows_processed == job.rows_imported == 10
+    descriptions = sorted(description for (description,) in db_session.query(Ticket.description))
+    assert descriptions == sorted(row["description"] for row in rows)
+
+
+class FakeS3:
+    """In-memory S3 that honours Range requests the way S3 does (clipped at the end of the object)."""
+
+    def __init__(self, s3_body, objects):
+        self.s3_body = s3_body
+        self.objects = objects
+
+    async def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.objects[Key])}
+
+    async def get_object(self, Bucket, Key, Range=None):
+        data = self.objects[Key]
+        if Range:
+            first, last = Range.removeprefix("bytes=").split("-")
+            data = data[int(first):int(last) + 1]
+        return {"Body": self.s3_body(data), "ContentLength": len(data)}
+
+
+class FakeSQS:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message_batch(self, QueueUrl, Entries):
+        self.messages.extend(json.loads(entry["MessageBody"]) for entry in Entries)
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+
+def test_large_ndjson_import_is_sharded(db_session, s3_body, monkeypatch):
+    monkeypatch.setattr("worker.worker_service.IMPORT_SHARD_BYTES", 1000)
+    monkeypatch.setattr("worker.worker_service.IMPORT_MAX_SHARDS", 4)
+    rows = import_rows(120)
+    data = "\n".join(json.dumps(row) for row in rows).encode()
+    s3, sqs = FakeS3(s3_body, {"tickets/1.ndjson": data}), FakeSQS()
+    parent = add_job(db_session, s3_url="s3://imports-bucket/tickets/1.ndjson")
+
+    async def clients(service, region_name=None):
+        return {"s3": s3, "sqs": sqs}[service]
+
+    async def deliver(job_id):
+        service = WorkerService(db=db_session)
+        job = service.claim_job(db_session, job_id)
+        if job is not None:
+            await service.process_job(job)
+
+    with patch("worker.worker_service.aws_clients.async_client", clients):
+        asyncio.run(deliver(parent.id))
+        db_session.refresh(parent)
+        assert parent.shards == 4
+        assert parent.status == JobStatusEnum.PROCESSING
+        assert len(sqs.messages) == 4
+        assert db_session.query(Ticket).count() == 0
+
+        for message in sqs.messages:
+            asyncio.run(deliver(message["job_id"]))
+
+    db_session.refresh(parent)
+    assert parent.status == JobStatusEnum.COMPLETED
+    assert parent.rows_imported == parent.rows_processed == 120
+    assert parent.bytes_processed == parent.bytes_total == len(data)
+    descriptions = sorted(description for (description,) in db_session.query(Ticket.description))
+    assert descriptions == sorted(row["description"] for row in rows)
+
+
+def test_gzip_import_is_loaded_whole(db_session, s3_body, monkeypatch):
+    monkeypatch.setattr("worker.worker_service.IMPORT_SHARD_BYTES", 100)
+    rows = import_rows(200)
+    data = gzip.compress("\n".join(json.dumps(row) for row in rows).encode())
+    s3, sqs = FakeS3(s3_body, {"tickets/1.ndjson.gz": data}), FakeSQS()
+    job = add_job(db_session, s3_url="s3://imports-bucket/tickets/1.ndjson.gz")
+
+    async def clients(service, region_name=None):
+        return {"s3": s3, "sqs": sqs}[service]
+
+    with patch("worker.worker_service.aws_clients.async_client", clients):
+        asyncio.run(WorkerService(db=db_session).process_job(job))
+
+    db_session.refresh(job)
+    assert job.status == JobStatusEnum.COMPLETED
+    assert job.shards == 0 and not sqs.messages
+    assert job.rows_imported == 200
+    assert job.bytes_processed == job.bytes_total == len(data)
+    assert db_session.query(Ticket).count() == 200
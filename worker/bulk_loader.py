@@ -0,0 +1,232 @@
+"""Bulk loading of imported tickets.
+
+On PostgreSQL, rows are streamed in batches into a temporary staging table
+with ``COPY`` (psycopg2 ``copy_expert`` or asyncpg ``copy_records_to_table``)
+and merged into ``tickets`` with a single ``INSERT ... SELECT``. Other
+databases and drivers fall back to a batched executemany into ``tickets``.
+Rows arrive one batch at a time, so a whole import never has to be in memory.
+
+Every row carries a SHA-256 of its content into ``tickets.content_hash``, and
+rows whose hash is already there are skipped (``ON CONFLICT DO NOTHING``), so
+a redelivered or overlapping import does not create duplicate tickets. The
+tickets actually inserted are added to the ticket counters when the loaded
+rows are merged, in the same transaction.
+
+Rows are validated against ``TicketCreate``, the schema of ``POST /tickets/``,
+before they are loaded. Invalid rows are skipped and counted in ``rejected``
+with the first ``IMPORT_MAX_ROW_ERRORS`` errors kept in ``errors``, so one bad
+row neither fails the whole import nor reaches ``tickets``.
+"""
+import csv
+import hashlib
+import io
+import json
+import uuid
+from itertools import islice
+from typing import Iterable, Iterator, List
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+from app.schemas.ticket import TicketCreate
+from common import ticket_stats
+from common.config import IMPORT_BATCH_SIZE, IMPORT_MAX_ROW_ERRORS
+from common.enums import TicketStatusEnum
+from common.models.ticket import Ticket
+
+STAGING_TABLE = "ticket_import_staging"
+STAGING_COLUMNS = ("reporter_name", "reporter_email", "description", "assigned_to_id", "content_hash")
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        reporter_name TEXT NOT NULL,
+        reporter_email TEXT NOT NULL,
+        description TEXT NOT NULL,
+        assigned_to_id UUID,
+        content_hash TEXT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# Rows are validated before they are staged; the assignment casts to the tickets columns still guard the lengths
+# Returns the inserted tickets per assignee for the ticket counters
+MERGE_SQL = f"""
+    WITH inserted AS (
+        INSERT INTO tickets (id, reporter_name, reporter_email, description, status,
+                             created_at, updated_at, assigned_to_id, content_hash)
+        SELECT gen_random_uuid(), reporter_name, reporter_email, description, :status,
+               now(), now(), assigned_to_id, content_hash
+        FROM {STAGING_TABLE}
+        ON CONFLICT (content_hash) DO NOTHING
+        RETURNING assigned_to_id, created_at
+    )
+    SELECT assigned_to_id, count(*), sum(floor(extract(epoch FROM created_at)))::bigint
+    FROM inserted GROUP BY assigned_to_id
+"""
+
+IMPORT_ROW = TypeAdapter(TicketCreate)
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING, for the executemany fallback
+CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def content_hash(reporter_name, reporter_email, description, assigned_to_id) -> str:
+    """Hex SHA-256 identifying an import row by its content."""
+    key = json.dumps([reporter_name, reporter_email, description, assigned_to_id], default=str)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _record(row: dict) -> tuple:
+    """The staging record for a row; raises ``ValidationError`` or ``ValueError`` for an invalid one."""
+    IMPORT_ROW.validate_python(row)
+    assigned_to_id = row.get("assigned_to_id")
+    # The raw values are stored, as before validation, so content hashes of earlier imports still match
+    record = (row["reporter_name"], row["reporter_email"], row["description"],
+              uuid.UUID(str(assigned_to_id)) if assigned_to_id else None)
+    return record + (content_hash(*record),)
+
+
+def _row_error(error: Exception) -> str:
+    # Field names and messages only: the rejected values may be personal data
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in error.errors())
+    return f"assigned_to_id: {error}"
+
+
+def _insert_statement(dialect_name: str):
+    insert = CONFLICT_INSERTS.get(dialect_name)
+    if insert is None:
+        statement = Ticket.__table__.insert()
+    else:
+        statement = insert(Ticket.__table__).on_conflict_do_nothing(index_elements=["content_hash"])
+    return statement.returning(Ticket.__table__.c.status, Ticket.__table__.c.assigned_to_id,
+                               Ticket.__table__.c.created_at)
+
+
+def _copy_psycopg2(driver_connection, records: List[tuple]):
+    buffer = io.StringIO()
+    # Strings are always quoted so empty values stay empty; FORCE_NULL turns "" into NULL for the UUID
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(records)
+    buffer.seek(0)
+    with driver_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NULL (assigned_to_id))", buffer)
+
+
+def _copy_asyncpg(driver_connection, records: List[tuple]):
+    # Called from inside AsyncSession.run_sync, so the coroutine can be awaited in place
+    await_only(driver_connection.copy_records_to_table(STAGING_TABLE, records=records,
+                                                       columns=STAGING_COLUMNS))
+
+
+COPY_DRIVERS = {"psycopg2": _copy_psycopg2, "asyncpg": _copy_asyncpg}
+
+
+class BulkTicketLoader:
+    """Loads import rows into ``tickets`` batch by batch.
+
+    Batches loaded between two ``finish`` calls belong to one transaction;
+    ``finish`` merges them and the caller commits, so a job can be committed
+    in chunks. ``load`` and ``finish`` take the session as their first
+    argument so the worker can run them through ``run_in_session`` while it
+    streams the import file.
+
+    ``first_row`` is the index in the import file of the first row loaded,
+    for a resumed job, so rejected rows are reported by their position.
+    """
+
+    def __init__(self, first_row: int = 0):
+        self.copy = None
+        self.started = False
+        # Rows loaded since the last finish, invalid ones included
+        self.loaded = 0
+        self.position = first_row
+        # Invalid rows skipped since the last finish, and the first errors among them
+        self.rejected = 0
+        self.errors: List[dict] = []
+        # Valid rows copied into the staging table since the last finish
+        self.staged = 0
+        # Rows skipped because a ticket with the same content hash exists, across all finishes
+        self.duplicates = 0
+        # Ticket counter deltas for the rows inserted since the last finish
+        self.counts = ticket_stats.new_deltas()
+
+    def _start(self, db: Session):
+        conn = db.connection()
+        if conn.dialect.name == "postgresql":
+            self.copy = COPY_DRIVERS.get(conn.dialect.driver)
+        if self.copy:
+            conn.execute(text(CREATE_STAGING_SQL))
+        self.started = True
+
+    def _records(self, rows: List[dict]) -> List[tuple]:
+        records = []
+        for position, row in enumerate(rows, self.position):
+            try:
+                records.append(_record(row))
+            except (ValidationError, ValueError) as e:
+                self.rejected += 1
+                if len(self.errors) < IMPORT_MAX_ROW_ERRORS:
+                    self.errors.append({"row": position, "error": _row_error(e)})
+        self.position += len(rows)
+        return records
+
+    def load(self, db: Session, rows: List[dict]) -> int:
+        """Load a batch and return how many rows it consumed, invalid ones included."""
+        records = self._records(rows)
+        self.loaded += len(rows) - len(records)
+        if not records:
+            return len(rows)
+        if not self.started:
+            self._start(db)
+        conn = db.connection()
+        if self.copy:
+            self.copy(conn.connection.driver_connection, records)
+            self.staged += len(records)
+        else:
+            # Column defaults fill in id, status and timestamps per row
+            inserted = conn.execute(_insert_statement(conn.dialect.name),
+                                    [dict(zip(STAGING_COLUMNS, record)) for record in records]).all()
+            for status, assigned_to_id, created_at in inserted:
+                ticket_stats.add(self.counts, status, assigned_to_id, created_at)
+            self.duplicates += len(records) - len(inserted)
+        self.loaded += len(records)
+        return len(rows)
+
+    def finish(self, db: Session) -> int:
+        """Merge the staged rows into tickets and return how many were loaded since the last finish.
+
+        The count includes rows skipped as duplicates or as invalid: it is the
+        number of rows consumed from the import, which is what a resumed job
+        skips. ``rejected`` and ``errors`` are reset here too, so read them first.
+        """
+        if self.started and self.copy:
+            conn = db.connection()
+            merged = 0
+            for assigned_to_id, tickets, created_at_sum in conn.execute(
+                    text(MERGE_SQL), {"status": TicketStatusEnum.new.name}):
+                ticket_stats.add(self.counts, TicketStatusEnum.new, assigned_to_id, None, tickets, created_at_sum)
+                merged += tickets
+            self.duplicates += self.staged - merged
+            conn.execute(text(f"DROP TABLE {STAGING_TABLE}"))
+        ticket_stats.apply(db, self.counts)
+        loaded, self.loaded, self.staged, self.started = self.loaded, 0, 0, False
+        self.rejected, self.errors = 0, []
+        self.counts = ticket_stats.new_deltas()
+        return loaded
+
+
+def batches(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Group rows into lists of at most ``size``."""
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def load_tickets(db: Session, rows: Iterable[dict], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """Insert import rows into ``tickets`` and return how many were loaded."""
+    loader = BulkTicketLoader()
+    for batch in batches(rows, batch_size):
+        loader.load(db, batch)
+    return loader.finish(db)
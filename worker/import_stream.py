@@ -0,0 +1,218 @@
+"""Incremental parsing of import files streamed from S3.
+
+An import file is either a JSON array of ticket objects or newline-delimited
+JSON (one object per line); the first non-whitespace character tells them
+apart. Either may be gzip-compressed, which is detected from the magic
+bytes. The body is read in ``IMPORT_READ_CHUNK_BYTES`` chunks and rows are
+yielded as soon as they are complete, so memory stays bounded by one chunk
+plus one row (capped at ``MAX_ROW_CHARS``) regardless of file size.
+"""
+import codecs
+import json
+import zlib
+from typing import AsyncIterator, List
+from common.config import IMPORT_READ_CHUNK_BYTES
+
+# Rows are small; a longer pending value means a malformed file, not a big ticket
+MAX_ROW_CHARS = 1024 * 1024
+WHITESPACE = " \t\r\n"
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+_decoder = json.JSONDecoder()
+
+
+class ImportFormatError(ValueError):
+    """The import file is not a JSON array or NDJSON stream of ticket objects."""
+
+
+class CountingBody:
+    """Wraps an S3 body and counts the bytes read from it, for progress reporting."""
+
+    def __init__(self, body):
+        self.body = body
+        self.bytes_read = 0
+
+    async def read(self, amt: int = -1) -> bytes:
+        data = await self.body.read(amt)
+        self.bytes_read += len(data)
+        return data
+
+
+class DecompressingBody:
+    """Wraps a body and transparently gunzips it if it starts with the gzip magic bytes.
+
+    Each ``read`` returns at most ``amt`` decompressed bytes, so a highly
+    compressed file cannot inflate past one chunk in memory.
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self._decompressor = None
+        self._pending = b""
+        self._sniffed = False
+        self._eof = False
+
+    async def _sniff(self, amt: int):
+        head = b""
+        while len(head) < len(GZIP_MAGIC) and (data := await self.body.read(amt)):
+            head += data
+        self._sniffed = True
+        if head.startswith(GZIP_MAGIC):
+            self._decompressor = zlib.decompressobj(wbits=31)
+        self._pending = head
+
+    async def read(self, amt: int = -1) -> bytes:
+        if amt is None or amt < 0:
+            amt = IMPORT_READ_CHUNK_BYTES
+        if not self._sniffed:
+            await self._sniff(amt)
+        if self._decompressor is None:
+            if self._pending:
+                data, self._pending = self._pending, b""
+                return data
+            return await self.body.read(amt)
+        while not self._eof:
+            if not self._pending:
+                self._pending = await self.body.read(amt)
+                if not self._pending:
+                    self._eof = True
+                    if not self._decompressor.eof:
+                        raise ImportFormatError("Truncated gzip import file")
+                    break
+            if self._decompressor.eof:
+                # Concatenated gzip members
+                self._decompressor = zlib.decompressobj(wbits=31)
+            try:
+                data = self._decompressor.decompress(self._pending, amt)
+            except zlib.error as exc:
+                raise ImportFormatError(f"Invalid gzip import file: {exc}") from None
+            self._pending = self._decompressor.unconsumed_tail or self._decompressor.unused_data
+            if data:
+                return data
+        return b""
+
+
+async def _read_text(body, chunk_size: int) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while data := await body.read(chunk_size):
+        if text := decoder.decode(data):
+            yield text
+    if text := decoder.decode(b"", final=True):
+        yield text
+
+
+def _skip_whitespace(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and buffer[pos] in WHITESPACE:
+        pos += 1
+    return pos
+
+
+async def _iter_json_array(chunks: AsyncIterator[str]) -> AsyncIterator:
+    # States: after "[" (value or "]"), after "," (value), after a value ("," or "]"), closed
+    first, value, separator, closed = range(4)
+    buffer, pos, state, eof = "", 0, None, False
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        if pos < len(buffer):
+            char = buffer[pos]
+            if state is None:
+                if char != "[":
+                    raise ImportFormatError("Expected a JSON array of tickets")
+                pos, state = pos + 1, first
+                continue
+            if state == closed:
+                raise ImportFormatError("Unexpected data after the JSON array")
+            if state == separator or (state == first and char == "]"):
+                if char not in ",]":
+                    raise ImportFormatError(f"Expected ',' or ']' at offset {pos}")
+                pos, state = pos + 1, value if char == "," else closed
+                continue
+            try:
+                row, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFormatError("Invalid JSON in import file") from None
+                if len(buffer) - pos > MAX_ROW_CHARS:
+                    raise ImportFormatError("Import row too large or malformed") from None
+            else:
+                # A value ending exactly at the buffer end might be cut short (e.g. a number)
+                if end < len(buffer) or eof:
+                    yield row
+                    pos, state = end, separator
+                    continue
+        elif eof:
+            if state != closed:
+                raise ImportFormatError("Import file ended before the JSON array was closed")
+            return
+
+        chunk = await anext(chunks, None)
+        buffer, pos = buffer[pos:] + (chunk or ""), 0
+        eof = chunk is None
+
+
+async def _iter_ndjson(chunks: AsyncIterator[str]) -> AsyncIterator:
+    pending, line_number = "", 0
+    async for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        if len(pending) > MAX_ROW_CHARS:
+            raise ImportFormatError("Import row too large or malformed")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _parse_line(line, line_number)
+    if pending.strip():
+        yield _parse_line(pending, line_number + 1)
+
+
+def _parse_line(line: str, line_number: int):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ImportFormatError(f"Invalid JSON on line {line_number}: {e.msg}") from None
+
+
+async def _prepend(first: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+async def iter_rows(body, chunk_size: int = IMPORT_READ_CHUNK_BYTES) -> AsyncIterator[dict]:
+    """Yield ticket rows from an S3 body (anything with an awaitable ``read(amt)``)."""
+    chunks = _read_text(body, chunk_size)
+    head = ""
+    async for chunk in chunks:
+        head += chunk
+        if head.strip():
+            break
+    if not head.strip():
+        return
+
+    parse = _iter_json_array if head.lstrip()[0] == "[" else _iter_ndjson
+    async for row in parse(_prepend(head, chunks)):
+        if not isinstance(row, dict):
+            raise ImportFormatError("Each ticket must be a JSON object")
+        yield row
+
+
+async def iter_batches(rows: AsyncIterator[dict], size: int) -> AsyncIterator[List[dict]]:
+    """Group rows into lists of at most ``size``."""
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def skip_rows(rows: AsyncIterator[dict], count: int) -> AsyncIterator[dict]:
+    """Drop the first ``count`` rows, to resume an import after its last checkpoint."""
+    async for row in rows:
+        if count:
+            count -= 1
+            continue
+        yield row
@@ -1,35 +1,77 @@
 import json
 import asyncio
-from common.db import SessionLocal
-from common.models.ticket import TicketImportJob
-from worker.worker_service import WorkerService
-from common.logger import logger
+from common.aws import aws_clients
+from common.config import WORKER_CONCURRENCY
+from common.db import dispose_async_engine, engine, run_in_session, session_scope
+from common.metrics import registry
+from common.migrate import upgrade
+from common.models import comment, user  # noqa: F401 - register mappers on Base
+from worker.worker_service import JobInProgressError, WorkerService
+from common.logger import correlation_id, flush_logs, logger
 
 
 def lambda_handler(event, context):
     """ Lambda handler to process ticket import jobs from SQS."""
-    session = SessionLocal()
-    worker_service = WorkerService(db=session)
+    # Deploy step: {"action": "migrate"} applies pending schema migrations from inside the VPC
+    if event.get("action") == "migrate":
+        applied = upgrade(engine)
+        logger.info("Applied migrations: %s", applied)
+        flush_logs()
+        return {"applied": applied}
 
     try:
-        for record in event.get("Records", []):
-            try:
-                msg = json.loads(record["body"])
-                job_id = msg["job_id"]
-                job = session.get(TicketImportJob, job_id)
-                if job is None:
-                    logger.warning(f"Job {job_id} not found")
-                    continue
+        # One event loop for the whole batch; its jobs run concurrently
+        records = event.get("Records", [])
+        results = asyncio.run(process_records(records))
+        # Only failed messages return to the queue (ReportBatchItemFailures)
+        failures = [{"itemIdentifier": record["messageId"]}
+                    for record, error in zip(records, results) if error is not None]
+        return {"batchItemFailures": failures}
+    except Exception as e:
+        logger.critical("Unexpected error in lambda_handler: %s", e, exc_info=True)
+        raise 
+    finally:
+        registry.flush_emf("worker")
+        flush_logs()
 
-                # Execute the job processing asynchronously
-                asyncio.run(worker_service.process_job(job))
 
-            except Exception as job_err:
-                logger.error(f"Error processing job {msg.get('job_id')}: {job_err}", exc_info=True)
+async def process_records(records: list) -> list:
+    """ Run the jobs of an SQS batch, at most WORKER_CONCURRENCY at a time.
 
-    except Exception as e:
-        logger.critical(f"Unexpected error in lambda_handler: {e}", exc_info=True)
-        raise 
+    Returns one entry per record: None on success, the exception otherwise.
+    """
+    semaphore = asyncio.Semaphore(WORKER_CONCURRENCY)
 
+    async def process(record: dict):
+        msg = {}
+        # Each record runs in its own task, so this only tags the lines logged for its job
+        correlation_id.set(record.get("messageId"))
+        try:
+            msg = json.loads(record["body"])
+            async with semaphore:
+                await run_job(msg["job_id"])
+        except JobInProgressError as busy:
+            logger.info("%s; returning message to the queue", busy)
+            return busy
+        except Exception as job_err:
+            logger.error("Error processing job %s: %s", msg.get("job_id"), job_err, exc_info=True)
+            return job_err
+
+    try:
+        return await asyncio.gather(*(process(record) for record in records))
     finally:
-        session.close()
+        # Clients and async DB connections are bound to this loop
+        await aws_clients.aclose()
+        await dispose_async_engine()
+
+
+async def run_job(job_id: int):
+    """ Process one job in its own session, unless it is done, claimed elsewhere or out of attempts."""
+    # process_job reads the claimed job on the event loop; expiring it on commit would
+    # make every such read a blocking SELECT there
+    async with session_scope(expire_on_commit=False) as session:
+        service = WorkerService(db=session)
+        job = await run_in_session(session, service.claim_job, job_id)
+        if job is None:
+            return
+        await service.process_job(job)
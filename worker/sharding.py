@@ -0,0 +1,65 @@
+"""Byte-range sharding of large NDJSON import files.
+
+A parent job whose file is larger than ``IMPORT_SHARD_BYTES`` is split into
+at most ``IMPORT_MAX_SHARDS`` contiguous byte ranges, each imported by its own
+child job. A shard owns every line that *starts* inside its range: it skips
+the partial line at its start (reading one byte early to see whether the
+range begins on a line boundary) and finishes the line that crosses its end.
+JSON array files cannot be split this way and are imported whole.
+"""
+import math
+from typing import List, Tuple
+
+# How far past its end a shard may read to finish its last line
+MAX_LINE_BYTES = 1024 * 1024
+
+
+def plan_shards(size: int, shard_bytes: int, max_shards: int) -> List[Tuple[int, int]]:
+    """Split ``size`` bytes into equal ``(start, end)`` ranges; empty if one worker should do it all."""
+    count = min(max_shards, math.ceil(size / shard_bytes))
+    if count <= 1:
+        return []
+    bounds = [size * i // count for i in range(count + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def shard_range_header(start: int, end: int) -> str:
+    """HTTP Range for a shard; S3 clips a range that runs past the end of the object."""
+    return f"bytes={max(start - 1, 0)}-{end + MAX_LINE_BYTES - 1}"
+
+
+class ShardBody:
+    """Presents only the lines of shard ``[start, end)`` from a body fetched with ``shard_range_header``."""
+
+    def __init__(self, body, start: int, end: int):
+        self.body = body
+        self.start = start
+        self.end = end
+        self._chunks = None
+
+    async def read(self, amt: int = -1) -> bytes:
+        if self._chunks is None:
+            self._chunks = self._iter_chunks(amt if amt and amt > 0 else 64 * 1024)
+        return await anext(self._chunks, b"")
+
+    async def _iter_chunks(self, chunk_size: int):
+        position = max(self.start - 1, 0)
+        skipping = self.start > 0
+        while data := await self.body.read(chunk_size):
+            chunk_start, position = position, position + len(data)
+            if skipping:
+                # Drop the tail of the line owned by the previous shard
+                newline = data.find(b"\n")
+                if newline < 0:
+                    continue
+                data, chunk_start, skipping = data[newline + 1:], chunk_start + newline + 1, False
+                if chunk_start >= self.end:
+                    return
+            # The newline ending the line that holds byte end - 1 closes the shard
+            search_from = max(self.end - 1 - chunk_start, 0)
+            newline = data.find(b"\n", search_from) if search_from < len(data) else -1
+            if newline >= 0:
+                yield data[:newline + 1]
+                return
+            if data:
+                yield data
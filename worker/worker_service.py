@@ -1,16 +1,79 @@
 # services/worker_service.py
-import json, aioboto3
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import update
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Session
-from common.models.ticket import TicketImportJob, Ticket
+from common.aws import aws_clients
+from common.db import DBSession, run_in_session
+from common.enums import JobStatusEnum
+from common.models.ticket import TicketImportJob
 from common.logger import logger
+from common.metrics import registry
+from common.config import (IMPORT_BATCH_SIZE, IMPORT_CHECKPOINT_ROWS, WORKER_MAX_ATTEMPTS, WORKER_JOB_LEASE_SECONDS,
+                           IMPORT_SHARD_BYTES, IMPORT_MAX_SHARDS, IMPORT_MAX_ROW_ERRORS, SQS_QUEUE_URL)
+from worker.bulk_loader import BulkTicketLoader
+from worker.import_stream import GZIP_MAGIC, CountingBody, DecompressingBody, iter_batches, iter_rows, skip_rows
+from worker.sharding import ShardBody, plan_shards, shard_range_header
+
+# Entries per SQS SendMessageBatch call
+SQS_MAX_BATCH = 10
+
+IMPORT_ROWS = registry.counter("import_rows_total", "Import rows parsed and loaded, duplicates included")
+IMPORT_ROWS_REJECTED = registry.counter("import_rows_rejected_total", "Invalid import rows skipped")
+IMPORT_BATCH_DURATION = registry.histogram("import_batch_duration_seconds", "Time to load one import batch")
+IMPORT_ROWS_PER_SECOND = registry.gauge("import_rows_per_second", "Load rate of the last completed import job",
+                                        unit="Count/Second")
+# outcome: completed, failed (the attempt raised and the message is retried) or gave_up (out of attempts)
+IMPORT_JOBS = registry.counter("import_jobs_total", "Import job attempts by outcome", ("outcome",))
+
+
+class JobInProgressError(Exception):
+    """Another worker holds the job; the message should come back once its lease ends."""
 
 
 class WorkerService:
-    def __init__(self, db: Session = None):
+    def __init__(self, db: DBSession = None):
         self.db = db
-        self.s3_session = aioboto3.Session()
     
+    def claim_job(self, db: Session, job_id: int) -> Optional[TicketImportJob]:
+        """Mark a job PROCESSING and count the attempt, or return None if there is nothing to do.
+
+        Completed jobs are never imported again, and jobs out of attempts are
+        marked FAILED so their message can be dropped.
+        """
+        job = db.get(TicketImportJob, job_id, with_for_update=True)
+        if job is None:
+            logger.warning("Job %s not found", job_id)
+            return None
+        if job.status == JobStatusEnum.COMPLETED:
+            logger.info("Job %s already completed, skipping redelivery", job_id)
+            db.rollback()
+            return None
+
+        now = datetime.now(timezone.utc)
+        if job.status == JobStatusEnum.PROCESSING and \
+                _as_utc(job.updated_at) > now - timedelta(seconds=WORKER_JOB_LEASE_SECONDS):
+            db.rollback()
+            raise JobInProgressError(f"Job {job_id} is being processed by another worker")
+        if job.attempts >= WORKER_MAX_ATTEMPTS:
+            logger.error("Job %s failed after %s attempts, giving up", job_id, job.attempts)
+            IMPORT_JOBS.inc(outcome="gave_up")
+            job.status = JobStatusEnum.FAILED
+            if job.parent_id is not None:
+                # The import can no longer complete
+                db.get(TicketImportJob, job.parent_id).status = JobStatusEnum.FAILED
+            db.commit()
+            return None
+
+        job.status = JobStatusEnum.PROCESSING
+        job.attempts += 1
+        job.updated_at = now
+        db.commit()
+        return job
+
     def _parse_s3_url(self, url: str):
         """Convert s3://bucket/key into bucket and key"""
         url = url.replace("s3://", "")
@@ -19,37 +82,164 @@ class WorkerService:
 
     async def process_job(self, job: TicketImportJob):
         """Process a ticket import job from S3."""
-        logger.info(f"Start processing job_id {job.id}")
+        job_id = job.id
+        logger.info("Start processing job_id %s", job_id)
         bucket, key = self._parse_s3_url(job.s3_url)
 
         try:
-            async with self.s3_session.client("s3") as s3_client:
-                logger.info(f"Downloading file from S3: {job.s3_url}")
+            s3_client = await aws_clients.async_client("s3")
+            # Only a fresh, unsharded job is split; a resumed one carries on where it stopped
+            if job.parent_id is None and not job.shards and not job.rows_processed:
+                ranges = await self._plan_shards(s3_client, bucket, key)
+                if ranges:
+                    await run_in_session(self.db, self._create_shards, job, ranges)
+            if job.shards:
+                # Parent of a sharded import: the children do the loading and complete it
+                await self._queue_shards(job)
+                return
+
+            logger.info("Streaming file from S3: %s", job.s3_url)
+            if job.range_end is None:
                 obj = await s3_client.get_object(Bucket=bucket, Key=key)
-                content = await obj["Body"].read()
-                tickets_list = json.loads(content)
-
-                for row in tickets_list:
-                    ticket = Ticket(
-                        reporter_name=row["reporter_name"],
-                        reporter_email=row["reporter_email"],
-                        description=row["description"],
-                        assigned_to_id=row["assigned_to_id"] if "assigned_to_id" in row else None,
-                    )
-                    self.db.add(ticket)
-                await self.db.commit()
-                logger.info(f"Inserted {len(tickets_list)} tickets for job_id {job.id}")
-
-            job.status = "COMPLETED"
-            job.processed_at = func.now()
-            self.db.add(job)
-            await self.db.commit()
-            logger.info(f"Job {job.id} completed successfully")
+                body = CountingBody(obj["Body"])
+                bytes_total = obj.get("ContentLength")
+            else:
+                obj = await s3_client.get_object(Bucket=bucket, Key=key,
+                                                 Range=shard_range_header(job.range_start, job.range_end))
+                body = CountingBody(ShardBody(obj["Body"], job.range_start, job.range_end))
+                bytes_total = job.range_end - job.range_start
+
+            # Rows are parsed and loaded batch by batch; the file is never held in memory whole.
+            # A retried job skips the rows committed by its last checkpoint. Progress counts
+            # the bytes read from S3, so gzip'd files are measured against their stored size.
+            rows = iter_rows(DecompressingBody(body))
+            if job.rows_processed:
+                logger.info("Resuming job_id %s after row %s", job_id, job.rows_processed)
+                rows = skip_rows(rows, job.rows_processed)
+
+            start = time.perf_counter()
+            loader = BulkTicketLoader(first_row=job.rows_processed)
+            loaded = 0
+            async for batch in iter_batches(rows, IMPORT_BATCH_SIZE):
+                batch_start = time.perf_counter()
+                IMPORT_ROWS.inc(await run_in_session(self.db, loader.load, batch))
+                IMPORT_BATCH_DURATION.observe(time.perf_counter() - batch_start)
+                if loader.loaded >= IMPORT_CHECKPOINT_ROWS:
+                    loaded += await run_in_session(self.db, self._checkpoint, job, loader, body.bytes_read, bytes_total)
+            loaded += await run_in_session(self.db, self._checkpoint, job, loader, body.bytes_read, bytes_total)
+            elapsed = time.perf_counter() - start
+            logger.info("Loaded %s tickets for job_id %s in %.3fs (%s duplicates skipped)",
+                        loaded, job_id, elapsed, loader.duplicates)
+
+            await run_in_session(self.db, self._finish_job, job, JobStatusEnum.COMPLETED, loaded, elapsed)
+            logger.info("Job %s completed successfully", job_id)
+            IMPORT_JOBS.inc(outcome="completed")
+            if elapsed:
+                IMPORT_ROWS_PER_SECOND.set(round(loaded / elapsed, 1))
         except Exception as e:
-            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
-            job.status = "FAILED"
-            self.db.add(job)
-            await self.db.commit()
+            logger.error("Job %s failed: %s", job_id, e, exc_info=True)
+            IMPORT_JOBS.inc(outcome="failed")
+            await run_in_session(self.db, Session.rollback)
+            await run_in_session(self.db, self._finish_job, job, JobStatusEnum.FAILED)
             raise e
-        finally:
-            await self.db.close()
+
+    async def _plan_shards(self, s3_client, bucket: str, key: str) -> List[Tuple[int, int]]:
+        """Byte ranges to split a large plain NDJSON file into, or an empty list to import it whole."""
+        size = (await s3_client.head_object(Bucket=bucket, Key=key))["ContentLength"]
+        ranges = plan_shards(size, IMPORT_SHARD_BYTES, IMPORT_MAX_SHARDS)
+        if not ranges:
+            return []
+        head = await (await s3_client.get_object(Bucket=bucket, Key=key, Range="bytes=0-1023"))["Body"].read()
+        if head.startswith(GZIP_MAGIC):
+            logger.info("s3://%s/%s is gzip-compressed; importing it without sharding", bucket, key)
+            return []
+        if head.lstrip().startswith(b"["):
+            logger.info("s3://%s/%s is a JSON array; importing it without sharding", bucket, key)
+            return []
+        return ranges
+
+    def _create_shards(self, db: Session, job: TicketImportJob, ranges: List[Tuple[int, int]]):
+        for range_start, range_end in ranges:
+            db.add(TicketImportJob(created_by=job.created_by, s3_url=job.s3_url, status=JobStatusEnum.PENDING,
+                                   parent_id=job.id, range_start=range_start, range_end=range_end))
+        job.shards = len(ranges)
+        job.bytes_total = ranges[-1][1]
+        db.commit()
+        logger.info("Split job_id %s into %s shards", job.id, len(ranges))
+
+    async def _queue_shards(self, job: TicketImportJob):
+        """Send one SQS message per shard that has not started yet."""
+        shard_ids = await run_in_session(self.db, lambda db: [
+            shard_id for (shard_id,) in db.query(TicketImportJob.id)
+            .filter(TicketImportJob.parent_id == job.id, TicketImportJob.status == JobStatusEnum.PENDING)
+            .order_by(TicketImportJob.id)])
+        sqs = await aws_clients.async_client("sqs")
+        for i in range(0, len(shard_ids), SQS_MAX_BATCH):
+            entries = [{"Id": str(shard_id), "MessageBody": json.dumps({"job_id": shard_id, "s3_url": job.s3_url})}
+                       for shard_id in shard_ids[i:i + SQS_MAX_BATCH]]
+            response = await sqs.send_message_batch(QueueUrl=SQS_QUEUE_URL, Entries=entries)
+            if response.get("Failed"):
+                raise RuntimeError(f"Could not queue shards of job {job.id}: {response['Failed']}")
+        logger.info("Queued %s shards of job_id %s", len(shard_ids), job.id)
+
+    def _checkpoint(self, db: Session, job: TicketImportJob, loader: BulkTicketLoader,
+                    bytes_read: int, bytes_total: Optional[int]) -> int:
+        """Commit the rows loaded since the last checkpoint together with the job's progress."""
+        rejected, errors = loader.rejected, loader.errors
+        loaded = loader.finish(db)
+        if job.parent_id is not None:
+            # A resumed shard re-reads the bytes it skips, so only count what is new to the parent
+            db.execute(update(TicketImportJob).where(TicketImportJob.id == job.parent_id).values(
+                rows_processed=TicketImportJob.rows_processed + loaded,
+                rows_rejected=TicketImportJob.rows_rejected + rejected,
+                bytes_processed=TicketImportJob.bytes_processed + max(bytes_read - job.bytes_processed, 0)))
+        if rejected:
+            logger.warning("Skipped %s invalid rows in job_id %s", rejected, job.id)
+            IMPORT_ROWS_REJECTED.inc(rejected)
+            job.rows_rejected += rejected
+            # A new list, so the JSON column is seen as changed
+            job.row_errors = ((job.row_errors or []) + errors)[:IMPORT_MAX_ROW_ERRORS]
+        job.rows_processed += loaded
+        job.bytes_processed = bytes_read
+        job.bytes_total = bytes_total
+        # The update also bumps updated_at, renewing the job's lease
+        db.commit()
+        return loaded
+
+    def _finish_job(self, db: Session, job: TicketImportJob, status: JobStatusEnum,
+                    rows_loaded: int = None, elapsed: float = None):
+        job.status = status
+        if status == JobStatusEnum.COMPLETED:
+            job.processed_at = func.now()
+            job.rows_imported = job.rows_processed - job.rows_rejected
+            # Throughput of this attempt only; a resumed job skipped its checkpointed rows
+            job.rows_per_second = round(rows_loaded / elapsed, 1) if elapsed else None
+            if job.parent_id is not None:
+                self._complete_parent(db, job)
+        db.add(job)
+        db.commit()
+
+    def _complete_parent(self, db: Session, job: TicketImportJob):
+        """Complete the parent once its last shard completes."""
+        # The row lock serializes shards finishing at the same time
+        parent = db.get(TicketImportJob, job.parent_id, with_for_update=True, populate_existing=True)
+        remaining = (db.query(TicketImportJob)
+                     .filter(TicketImportJob.parent_id == parent.id,
+                             TicketImportJob.id != job.id,
+                             TicketImportJob.status != JobStatusEnum.COMPLETED)
+                     .count())
+        if remaining:
+            return
+        now = datetime.now(timezone.utc)
+        parent.status = JobStatusEnum.COMPLETED
+        parent.processed_at = now
+        parent.rows_imported = parent.rows_processed - parent.rows_rejected
+        # End to end, from the upload to the last shard
+        elapsed = (now - _as_utc(parent.created_at)).total_seconds()
+        parent.rows_per_second = round(parent.rows_processed / elapsed, 1) if elapsed > 0 else None
+        logger.info("Job %s completed: all %s shards done", parent.id, parent.shards)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)